@@ -0,0 +1,172 @@
+# ---------------------------------------------------
+# Objectif : vérifier que l'extracteur rapide (lxml) donne exactement les
+# mêmes données que l'extracteur de référence (BeautifulSoup), et mesurer
+# le temps d'analyse par page de chacun.
+#
+# Usage :
+#   python3 benchmark_extractors.py                     # cache HTML, sinon pages du dépôt
+#   python3 benchmark_extractors.py --fixtures pages/   # fichiers *.html
+#   python3 benchmark_extractors.py --stats-only        # coût d'une projection
+# ---------------------------------------------------
+
+import argparse
+import glob
+import os
+import random
+import statistics
+import sys
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from benchmark_pipeline import synthetic_film_page
+from fast_extractor import extract_movie_data_fast
+from html_cache import HtmlCache
+from movie_fields import STATS_FIELDS, resolve_fields
+from scraperletterboxd import (HTML_CACHE_DIR, HTML_CACHE_MAX_BYTES,
+                               extract_movie_data)
+
+# Pages synthétiques livrées avec le dépôt (cas limites des extracteurs :
+# langue de repli, festival de première, services, page sans statistiques,
+# page 404), utilisées quand il n'y a pas de cache HTML.
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            "fixtures", "extractor_pages")
+# Pages complètes générées comme celles de benchmark_pipeline.py
+SYNTHETIC_PAGES = 5
+
+
+def iter_fixture_pages(fixtures_dir: str) -> Iterator[Tuple[str, str]]:
+    """Pages sauvegardées (*.html) d'un dossier : (url fictive, html)."""
+    for path in sorted(glob.glob(os.path.join(fixtures_dir, "*.html"))):
+        slug = os.path.splitext(os.path.basename(path))[0]
+        with open(path, "r", encoding="utf-8") as f:
+            yield f"https://letterboxd.com/film/{slug}/", f.read()
+
+
+def iter_cached_pages(cache_dir: str, limit: int) -> Iterator[Tuple[str, str]]:
+    """Pages du cache HTML du scraper : (url, html)."""
+    cache = HtmlCache(cache_dir, HTML_CACHE_MAX_BYTES, track_access=False)
+    try:
+        for i, (url, _) in enumerate(cache.iter_urls()):
+            if i >= limit:
+                break
+            html = cache.get(url)
+            if html is not None:
+                yield url, html
+    finally:
+        cache.close()
+
+
+def iter_shipped_pages() -> Iterator[Tuple[str, str]]:
+    """Pages du dépôt : cas limites écrits à la main, puis pages synthétiques."""
+    yield from iter_fixture_pages(FIXTURES_DIR)
+    rng = random.Random(0)
+    for i in range(SYNTHETIC_PAGES):
+        yield (f"https://letterboxd.com/film/bench-film-{i}/",
+               synthetic_film_page(i, rng, padding_kb=0))
+
+
+def iter_default_pages(cache_dir: str, limit: int) -> Iterator[Tuple[str, str]]:
+    """Pages du cache HTML s'il en contient, sinon les pages du dépôt."""
+    found = False
+    if os.path.isdir(cache_dir):
+        for page in iter_cached_pages(cache_dir, limit):
+            found = True
+            yield page
+    if not found:
+        print(f"ℹ️ Pas de cache HTML dans '{cache_dir}' : pages de {FIXTURES_DIR} "
+              f"et {SYNTHETIC_PAGES} pages synthétiques.")
+        yield from iter_shipped_pages()
+
+
+def time_extractor(extract: Callable, html: str, url: str, repeat: int,
+                   fields: Optional[frozenset] = None):
+    """Meilleur temps (s) sur `repeat` exécutions, et le résultat."""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = extract(html, url, fields)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def describe_timings(label: str, timings: List[float]) -> str:
+    timings = sorted(timings)
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    return (f"{label:<6} moyenne {statistics.mean(timings) * 1000:7.2f} ms | "
+            f"médiane {statistics.median(timings) * 1000:7.2f} ms | "
+            f"p95 {p95 * 1000:7.2f} ms")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Parité et temps d'analyse des extracteurs bs4 / lxml.")
+    parser.add_argument("--fixtures", help="Dossier de pages *.html sauvegardées.")
+    parser.add_argument("--cache-dir", default=HTML_CACHE_DIR,
+                        help="Cache HTML du scraper (si --fixtures est absent ; "
+                             "à défaut, pages livrées dans fixtures/extractor_pages).")
+    parser.add_argument("--limit", type=int, default=200,
+                        help="Nombre maximal de pages lues depuis le cache.")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Répétitions par page (on garde le meilleur temps).")
+    projection = parser.add_mutually_exclusive_group()
+    projection.add_argument("--fields",
+                            help="Champs à extraire, séparés par des virgules : mesure "
+                                 "la projection face à l'extraction complète.")
+    projection.add_argument("--stats-only", action="store_true",
+                            help=f"Projection sur {', '.join(STATS_FIELDS)}.")
+    args = parser.parse_args()
+    try:
+        fields = resolve_fields(STATS_FIELDS if args.stats_only else (
+            args.fields.split(",") if args.fields else None))
+    except ValueError as e:
+        parser.error(str(e))
+
+    pages = (iter_fixture_pages(args.fixtures) if args.fixtures
+             else iter_default_pages(args.cache_dir, args.limit))
+
+    bs4_times, lxml_times = [], []
+    # Temps de l'extraction complète, quand une projection est mesurée
+    bs4_full_times, lxml_full_times = [], []
+    mismatches: Dict[str, List[str]] = {}
+    for url, html in pages:
+        t_ref, reference = time_extractor(extract_movie_data, html, url, args.repeat, fields)
+        t_fast, fast = time_extractor(extract_movie_data_fast, html, url, args.repeat,
+                                      fields)
+        bs4_times.append(t_ref)
+        lxml_times.append(t_fast)
+        if fields is not None:
+            bs4_full_times.append(time_extractor(extract_movie_data, html, url,
+                                                 args.repeat)[0])
+            lxml_full_times.append(time_extractor(extract_movie_data_fast, html, url,
+                                                  args.repeat)[0])
+        for key, expected in reference.items():
+            if fast.get(key) != expected:
+                mismatches.setdefault(key, []).append(
+                    f"{url}: bs4={expected!r} lxml={fast.get(key)!r}"
+                )
+
+    if not bs4_times:
+        print("❌ Aucune page à analyser (cache vide ou dossier sans *.html).")
+        return 1
+
+    print(f"📄 {len(bs4_times)} pages analysées ({args.repeat} répétitions chacune)")
+    print(describe_timings("bs4", bs4_times))
+    print(describe_timings("lxml", lxml_times))
+    print(f"⚡ Accélération : x{sum(bs4_times) / sum(lxml_times):.1f}")
+    if fields is not None:
+        print(f"📉 Projection ({', '.join(sorted(fields))}) : "
+              f"{sum(bs4_times) / sum(bs4_full_times):.0%} du temps complet en bs4, "
+              f"{sum(lxml_times) / sum(lxml_full_times):.0%} en lxml")
+
+    if mismatches:
+        print("\n❌ PARITÉ : différences trouvées")
+        for key, examples in sorted(mismatches.items()):
+            print(f"  {key} : {len(examples)} page(s), ex. {examples[0][:200]}")
+        return 1
+    print("\n✅ PARITÉ : résultats identiques sur toutes les pages.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
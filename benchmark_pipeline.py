@@ -0,0 +1,388 @@
+# ---------------------------------------------------
+# Objectif : mesurer le débit de toute la chaîne SANS réseau. Un serveur
+# local (mock_letterboxd_server.py) sert des pages de films et des pages
+# "popular", avec latence, erreurs 500 et 429 réglables ; on lance ensuite
+# scrape_letterboxd.py (découverte des liens) puis scraperletterboxd.py
+# (scraping des films) contre ce serveur, chacun dans son propre processus.
+#
+# Rapport : films/s, latences p50/p99 par étape (téléchargement, analyse,
+# écriture), pic de mémoire (RSS) et octets écrits. Les résultats peuvent
+# être sauvegardés puis comparés d'un run à l'autre.
+#
+# Usage :
+#   python3 benchmark_pipeline.py --films 500 --latency-ms 50 --jitter-ms 20
+#   python3 benchmark_pipeline.py --pages pages/ --save bench.json
+#   python3 benchmark_pipeline.py --cache-dir html_cache --compare bench.json
+# ---------------------------------------------------
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from mock_letterboxd_server import (MockLetterboxdServer, load_pages_cache,
+                                    load_pages_dir)
+
+FILMS_PER_POPULAR_PAGE = 72
+DISCOVERY_OUTPUT = "all_letterboxd_links.txt"
+
+# Page de film synthétique : tous les blocs lus par les extracteurs, plus
+# un remplissage qui imite le poids d'une vraie page (critiques, listes...).
+SYNTHETIC_FILM_PAGE = """<!DOCTYPE html><html><head><title>{title} ({year}) - Letterboxd</title></head><body>
+<section class="film-header"><h1 class="headline-1 primaryname"><span class="name">{title}</span></h1>
+<div class="releaseyear"><a href="/films/year/{year}/">{year}</a></div>
+<p class="credits">Directed by <a class="contributor" href="/director/{director_slug}/"><span class="prettify">{director}</span></a></p></section>
+<div class="review body-text -prose -hero prettify"><div class="truncate"><p>{synopsis}</p></div></div>
+<div id="tab-cast"><div class="cast-list text-sluglist"><p>{cast}</p></div></div>
+<div id="tab-details"><h3><span>Studios</span></h3><div class="text-sluglist"><p><a href="/studio/{studio_slug}/" class="text-slug">{studio}</a></p></div>
+<h3><span>Country</span></h3><div class="text-sluglist"><p><a href="/films/country/{country_slug}/" class="text-slug">{country}</a></p></div>
+<h3><span>Primary Language</span></h3><div class="text-sluglist"><p><a href="/films/language/english/" class="text-slug">English</a></p></div>
+<h3><span>Spoken Languages</span></h3><div class="text-sluglist"><p><a href="/films/language/english/" class="text-slug">English</a> <a href="/films/language/french/" class="text-slug">French</a></p></div></div>
+<div id="tab-genres"><h3><span>Genres</span></h3><div class="text-sluglist capitalize"><p>{genres}</p></div>
+<h3><span>Themes</span></h3><div class="text-sluglist"><p><a href="/films/theme/{theme_slug}/" class="text-slug">{theme}</a><a href="/films/theme/" class="text-slug">Show All…</a></p></div></div>
+<div id="tab-releases"><h3 class="release-table-title">Theatrical</h3><div class="release-table -bydate"></div></div>
+<p class="text-link text-footer">{duration}&nbsp;mins &nbsp; More at IMDb</p>
+<section class="services"><p class="service -mubi"><a href="#"><span class="brand"></span><span class="title"><span class="name">Mubi</span><span class="locale">FR</span></span></a><span class="options"><a href="#"><span class="extended">Stream</span></a></span></p></section>
+<span class="average-rating"><a href="/film/{slug}/ratings/" data-original-title="Weighted average of {rating} based on {ratings_count}&nbsp;ratings">{rating}</a></span>
+<div class="production-statistic -watches" aria-label="Watched by {views}&nbsp;members"></div>
+<div class="production-statistic -lists" aria-label="Appears in {lists} lists"></div>
+<div class="production-statistic -likes" aria-label="Liked by {likes} members"></div>
+<a href="/film/{slug}/fans/">{fans}&nbsp;fans</a>
+<section class="film-recent-reviews"><ul>{padding}</ul></section>
+</body></html>"""
+
+PADDING_ITEM = ('<li class="film-detail"><div class="film-detail-content">'
+                '<p class="attribution"><a class="context" href="/member/film/">Review by '
+                '<strong class="name">member</strong></a></p><div class="body-text -prose">'
+                '<p>Lorem ipsum dolor sit amet, consectetur adipiscing elit.</p></div></div></li>')
+
+GENRES = ("Drama", "Comedy", "Thriller", "Horror", "Romance", "Documentary")
+COUNTRIES = ("France", "USA", "South Korea", "Japan", "Italy", "Brazil")
+
+
+# ====================================================================
+#                        PAGES SERVIES PAR LE SERVEUR
+# ====================================================================
+
+def synthetic_film_page(index: int, rng: random.Random, padding_kb: int) -> str:
+    genres = rng.sample(GENRES, 2)
+    country = rng.choice(COUNTRIES)
+    padding = PADDING_ITEM * max(0, padding_kb * 1024 // len(PADDING_ITEM))
+    return SYNTHETIC_FILM_PAGE.format(
+        slug=f"bench-film-{index}", title=f"Bench Film {index}",
+        year=rng.randint(1920, 2025), duration=rng.randint(70, 200),
+        director=f"Director {index % 97}", director_slug=f"director-{index % 97}",
+        synopsis="A synthetic synopsis for the offline benchmark. " * 3,
+        cast=" ".join(f'<a href="/actor/actor-{(index + i) % 500}/" class="text-slug tooltip">'
+                      f'Actor {(index + i) % 500}</a>' for i in range(12)),
+        studio=f"Studio {index % 31}", studio_slug=f"studio-{index % 31}",
+        country=country, country_slug=country.lower().replace(" ", "-"),
+        genres="".join(f'<a href="/films/genre/{g.lower()}/" class="text-slug">{g}</a>'
+                       for g in genres),
+        theme=f"Theme {index % 13}", theme_slug=f"theme-{index % 13}",
+        rating=f"{rng.uniform(0.5, 5.0):.2f}", ratings_count=f"{rng.randint(10, 10 ** 6):,}",
+        views=f"{rng.randint(10, 10 ** 7):,}", lists=f"{rng.randint(1, 10 ** 5):,}",
+        likes=f"{rng.randint(1, 10 ** 6):,}", fans=f"{rng.randint(1, 999)}",
+        padding=padding,
+    )
+
+
+def popular_list_page(film_paths: List[str]) -> str:
+    """Page /films/popular/page/N/ au format lu par `extract_film_links`."""
+    items = "".join(f'<li class="posteritem"><div class="react-component"><a class="frame" '
+                    f'href="{path}"></a></div></li>' for path in film_paths)
+    return (f"<!DOCTYPE html><html><body><ul class=\"poster-list\">{items}</ul>"
+            f"<!-- {'padding ' * 200} --></body></html>")
+
+
+def build_pages(args: argparse.Namespace) -> Dict[str, str]:
+    """Pages de films (dossier, cache HTML ou synthétiques) + pages "popular"."""
+    if args.pages:
+        pages = load_pages_dir(args.pages)
+    elif args.cache_dir:
+        pages = load_pages_cache(args.cache_dir, args.films)
+    else:
+        rng = random.Random(args.seed)
+        pages = {f"/film/bench-film-{i}/": synthetic_film_page(i, rng, args.padding_kb)
+                 for i in range(args.films)}
+    film_paths = sorted(path for path in pages if path.startswith("/film/"))
+    for start in range(0, len(film_paths), FILMS_PER_POPULAR_PAGE):
+        page = start // FILMS_PER_POPULAR_PAGE + 1
+        pages[f"/films/popular/page/{page}/"] = popular_list_page(
+            film_paths[start:start + FILMS_PER_POPULAR_PAGE])
+    return pages
+
+
+# ====================================================================
+#                 PROCESSUS ENFANTS (UN PAR SCRIPT MESURÉ)
+# ====================================================================
+
+def timed(samples: List[float], func: Callable) -> Callable:
+    """Enveloppe une coroutine pour mesurer chacune de ses exécutions."""
+    async def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            samples.append(time.perf_counter() - started)
+    return wrapper
+
+
+def timed_sync(samples: List[float], func: Callable) -> Callable:
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            samples.append(time.perf_counter() - started)
+    return wrapper
+
+
+def bytes_written_by_process() -> Optional[int]:
+    """Octets écrits par ce processus (Linux : /proc/self/io), None ailleurs."""
+    try:
+        with open("/proc/self/io", "r") as f:
+            for line in f:
+                if line.startswith("wchar:"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+def run_discovery_child(args: argparse.Namespace) -> Dict[str, Any]:
+    import scrape_letterboxd as discovery
+
+    stages: Dict[str, List[float]] = {"page": [], "extract": []}
+    fetch_pages = discovery.fetch_pages
+
+    def timed_fetch_pages(fetch, *fetch_args, **fetch_kwargs):
+        return fetch_pages(timed(stages["page"], fetch), *fetch_args, **fetch_kwargs)
+
+    discovery.fetch_pages = timed_fetch_pages
+    discovery.extract_film_links = timed_sync(stages["extract"],
+                                              discovery.extract_film_links)
+    started = time.perf_counter()
+    _, unique_total = asyncio.run(discovery.discover_links(
+        args.popular_pages, DISCOVERY_OUTPUT, args.concurrency, "http", args.base_url
+    ))
+    return {"elapsed": time.perf_counter() - started, "items": unique_total,
+            "item_label": "liens", "stages": stages, "statuses": {}}
+
+
+def run_scraper_child(args: argparse.Namespace) -> Dict[str, Any]:
+    import scraperletterboxd as scraper
+    from checkpoint import CheckpointIndex
+
+    scraper.LINKS_FILE_PATH = DISCOVERY_OUTPUT
+    scraper.LETTERBOXD_BASE_URL = args.base_url
+    scraper.EXTRACTOR_BACKEND = args.extractor
+    scraper.CONCURRENT_REQUESTS = args.concurrency
+    scraper.RATE_CONTROLLER = "adaptive"
+    scraper.RATE_INITIAL = args.rate
+    scraper.RATE_MAX_GLOBAL = args.rate
+    scraper.RATE_MIN = min(scraper.RATE_MIN, args.rate)
+    scraper.RATE_MAX_PER_HOST = {}
+    # Relances rapides : on mesure le pipeline, pas l'attente de politesse
+    scraper.RETRY_BASE_DELAY_S = 0.2
+    scraper.RETRY_MAX_DELAY_S = 2.0
+
+    stages: Dict[str, List[float]] = {"fetch": [], "parse": [], "write": []}
+    scraper.get_html = timed(stages["fetch"], scraper.get_html)
+    scraper.parse_html = timed(stages["parse"], scraper.parse_html)
+    scraper.write_outcome = timed(stages["write"], scraper.write_outcome)
+
+    started = time.perf_counter()
+    asyncio.run(scraper.main())
+    elapsed = time.perf_counter() - started
+    with CheckpointIndex(scraper.CHECKPOINT_DB_PATH) as checkpoint:
+        statuses = checkpoint.status_counts()
+    return {"elapsed": elapsed, "items": statuses.get("ok", 0), "item_label": "films",
+            "stages": stages, "statuses": statuses}
+
+
+CHILDREN = {"discovery": run_discovery_child, "scraper": run_scraper_child}
+
+
+def child_main(args: argparse.Namespace):
+    result = CHILDREN[args.child](args)
+    result["wchar"] = bytes_written_by_process()
+    with open(args.result_file, "w", encoding="utf-8") as f:
+        json.dump(result, f)
+
+
+# ====================================================================
+#                            MESURE ET RAPPORT
+# ====================================================================
+
+def percentile(values: List[float], q: float) -> float:
+    """Percentile avec interpolation linéaire (q entre 0 et 100)."""
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    position = (len(values) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (position - low)
+
+
+def directory_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def run_child(name: str, args: argparse.Namespace, workdir: str,
+              base_url: str) -> Dict[str, Any]:
+    """Lance un script mesuré dans son propre processus (RSS et I/O isolés)."""
+    result_file = os.path.join(workdir, f"bench_{name}.json")
+    log_file = os.path.join(workdir, f"bench_{name}.log")
+    command = [sys.executable, os.path.abspath(__file__), "--child", name,
+               "--result-file", result_file, "--base-url", base_url,
+               "--concurrency", str(args.concurrency), "--rate", str(args.rate),
+               "--extractor", args.extractor,
+               "--popular-pages", str(args.popular_pages)]
+    size_before = directory_size(workdir)
+    started = time.perf_counter()
+    with open(log_file, "w", encoding="utf-8") as log:
+        process = subprocess.Popen(command, cwd=workdir, stdout=log,
+                                   stderr=subprocess.STDOUT)
+        _, status, rusage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+    wall = time.perf_counter() - started
+    if process.returncode != 0 or not os.path.exists(result_file):
+        raise RuntimeError(f"{name} a échoué (code {process.returncode}), voir {log_file}")
+
+    with open(result_file, "r", encoding="utf-8") as f:
+        result = json.load(f)
+    os.remove(result_file)
+    result["wall"] = wall
+    result["peak_rss_mb"] = rusage.ru_maxrss / 1024  # ru_maxrss en Ko sous Linux
+    result["bytes_on_disk"] = directory_size(workdir) - size_before - os.path.getsize(log_file)
+    result["latency_ms"] = {
+        stage: {"n": len(samples), "p50": percentile(samples, 50) * 1000,
+                "p99": percentile(samples, 99) * 1000}
+        for stage, samples in result.pop("stages").items()
+    }
+    result["per_second"] = result["items"] / result["elapsed"] if result["elapsed"] else 0.0
+    return result
+
+
+def print_report(label: str, result: Dict[str, Any], baseline: Optional[Dict[str, Any]]):
+    def delta(current: float, previous: Optional[float]) -> str:
+        if not previous:
+            return ""
+        return f" ({(current - previous) / previous * 100:+.0f} %)"
+
+    previous = baseline or {}
+    print(f"\n== {label} ==")
+    print(f"  {result['items']} {result['item_label']} en {result['elapsed']:.1f} s -> "
+          f"{result['per_second']:.1f} {result['item_label']}/s"
+          f"{delta(result['per_second'], previous.get('per_second'))} "
+          f"{result['statuses'] or ''}")
+    for stage, latency in result["latency_ms"].items():
+        old = previous.get("latency_ms", {}).get(stage, {})
+        print(f"  {stage:<8} p50 {latency['p50']:8.1f} ms{delta(latency['p50'], old.get('p50'))}"
+              f"   p99 {latency['p99']:8.1f} ms{delta(latency['p99'], old.get('p99'))}"
+              f"   (n={latency['n']})")
+    written = result["wchar"] if result["wchar"] is not None else result["bytes_on_disk"]
+    print(f"  RSS max {result['peak_rss_mb']:.1f} Mo"
+          f"{delta(result['peak_rss_mb'], previous.get('peak_rss_mb'))} | "
+          f"{written / 1024 ** 2:.1f} Mo écrits "
+          f"({result['bytes_on_disk'] / 1024 ** 2:.1f} Mo sur disque) | "
+          f"processus {result['wall']:.1f} s")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Banc d'essai hors ligne : découverte + scraping contre un serveur local.")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--pages", help="Dossier de pages de films <slug>.html.")
+    source.add_argument("--cache-dir", help="Pages enregistrées dans le cache HTML du scraper.")
+    parser.add_argument("--films", type=int, default=500,
+                        help="Nombre de films synthétiques (ou limite du cache).")
+    parser.add_argument("--padding-kb", type=int, default=120,
+                        help="Poids ajouté à chaque page synthétique (défaut : %(default)s Ko).")
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.01)
+    parser.add_argument("--throttle-rate", type=float, default=0.01)
+    parser.add_argument("--concurrency", type=int, default=8,
+                        help="Workers du scraper et pages de découverte en parallèle.")
+    parser.add_argument("--rate", type=float, default=200.0,
+                        help="Plafond de débit du scraper (req/s).")
+    parser.add_argument("--extractor", choices=("bs4", "lxml"), default="bs4")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workdir", help="Dossier de travail (temporaire par défaut).")
+    parser.add_argument("--keep", action="store_true", help="Conserve le dossier de travail.")
+    parser.add_argument("--save", help="Enregistre les résultats (JSON).")
+    parser.add_argument("--compare", help="Résultats d'un run précédent à comparer.")
+    # Options internes des processus enfants
+    parser.add_argument("--child", choices=sorted(CHILDREN), help=argparse.SUPPRESS)
+    parser.add_argument("--result-file", help=argparse.SUPPRESS)
+    parser.add_argument("--base-url", help=argparse.SUPPRESS)
+    parser.add_argument("--popular-pages", type=int, default=0, help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.child:
+        child_main(args)
+        return
+
+    pages = build_pages(args)
+    args.popular_pages = sum(1 for path in pages if path.startswith("/films/popular/"))
+    films = len(pages) - args.popular_pages
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="letterboxd_bench_")
+    os.makedirs(workdir, exist_ok=True)
+    server = MockLetterboxdServer(pages, latency_s=args.latency_ms / 1000,
+                                  jitter_s=args.jitter_ms / 1000,
+                                  error_rate=args.error_rate,
+                                  throttle_rate=args.throttle_rate, seed=args.seed)
+    print(f"🧪 Serveur local {server.base_url} : {films} films, {args.popular_pages} pages "
+          f"populaires, latence {args.latency_ms:.0f}+{args.jitter_ms:.0f} ms, "
+          f"{args.error_rate:.0%} d'erreurs 500, {args.throttle_rate:.0%} de 429.")
+    print(f"📁 Dossier de travail : {workdir}")
+
+    results: Dict[str, Any] = {"config": {k: v for k, v in vars(args).items()
+                                          if k not in ("child", "result_file", "base_url",
+                                                       "save", "compare", "keep")}}
+    try:
+        with server:
+            for name, label in (("discovery", "scrape_letterboxd.py (découverte)"),
+                                ("scraper", "scraperletterboxd.py (films)")):
+                results[name] = run_child(name, args, workdir, server.base_url)
+                print_report(label, results[name], (baseline or {}).get(name))
+            results["server"] = {"requests": server.request_count,
+                                 "status_counts": server.status_counts}
+        print(f"\n🌐 Requêtes servies : {server.request_count} {server.status_counts}")
+    finally:
+        if not args.keep and not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+        print(f"💾 Résultats enregistrés dans {args.save}.")
+
+
+if __name__ == "__main__":
+    main()
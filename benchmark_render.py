@@ -0,0 +1,120 @@
+# ---------------------------------------------------
+# Objectif : comparer le rendu navigateur allégé ("lean") au rendu complet
+# ("full") sur les mêmes pages de films : temps par page, octets reçus,
+# requêtes servies ou bloquées, et parité des données extraites.
+#
+# Usage :
+#   python3 benchmark_render.py                     # 20 premiers liens du fichier propre
+#   python3 benchmark_render.py --limit 50
+#   python3 benchmark_render.py --base-url http://127.0.0.1:8765   # serveur local
+# ---------------------------------------------------
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from crawl4ai import AsyncWebCrawler
+
+from browser_render import (FIRST_PARTY_DOMAINS, RENDER_FULL, RENDER_LEAN, RenderStats,
+                            build_browser_config, build_run_config, lean_page_hook)
+from checkpoint import iter_remaining_links
+from film_urls import rebase_url
+from http_fetcher import is_page_complete
+from scraperletterboxd import LINKS_FILE_PATH, NAVIGATION_TIMEOUT_MS, run_extractor
+
+
+async def render_pages(mode: str, links: List[str], base_url: Optional[str],
+                       browser_type: str) -> Tuple[List[float], RenderStats, Dict[str, Dict]]:
+    """Rend chaque page avec un navigateur neuf : (temps par page, compteurs, données)."""
+    stats = RenderStats()
+    first_party = FIRST_PARTY_DOMAINS
+    if base_url:
+        first_party += (urlsplit(base_url).hostname,)
+    crawler = AsyncWebCrawler(config=build_browser_config(browser_type))
+    crawler.crawler_strategy.set_hook(
+        "on_page_context_created",
+        lean_page_hook(first_party, stats, block=mode == RENDER_LEAN))
+    config = build_run_config(mode, NAVIGATION_TIMEOUT_MS)
+    timings: List[float] = []
+    extracted: Dict[str, Dict] = {}
+    await crawler.start()
+    try:
+        for link in links:
+            started = time.perf_counter()
+            result = await crawler.arun(url=rebase_url(link, base_url), config=config)
+            timings.append(time.perf_counter() - started)
+            html = result.html or ""
+            if not is_page_complete(html):
+                print(f"  ⚠️ [{mode}] page incomplète : {link}")
+            extracted[link] = run_extractor(html, link)
+    finally:
+        await crawler.close()
+    return timings, stats, extracted
+
+
+def describe_mode(mode: str, timings: List[float], stats: RenderStats) -> str:
+    pages = len(timings)
+    c = stats.counters
+    timings = sorted(timings)
+    p95 = timings[min(pages - 1, int(pages * 0.95))]
+    return (f"{mode:<5} moyenne {statistics.mean(timings) * 1000:7.0f} ms | "
+            f"médiane {statistics.median(timings) * 1000:7.0f} ms | "
+            f"p95 {p95 * 1000:7.0f} ms | {c['bytes'] / pages / 1024:7.0f} Ko/page | "
+            f"{c['allowed'] / pages:5.1f} requêtes/page | "
+            f"{(c['blocked_type'] + c['blocked_third_party']) / pages:5.1f} bloquées/page")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Temps et octets par page : rendu navigateur lean / full.")
+    parser.add_argument("--links", default=LINKS_FILE_PATH,
+                        help="Fichier de liens (défaut : %(default)s).")
+    parser.add_argument("--limit", type=int, default=20,
+                        help="Nombre de pages rendues dans chaque mode.")
+    parser.add_argument("--base-url",
+                        help="Hôte de remplacement, ex: http://127.0.0.1:8765 "
+                             "(mock_letterboxd_server.py).")
+    parser.add_argument("--browser", default="firefox",
+                        help="Navigateur Playwright (défaut : %(default)s).")
+    args = parser.parse_args()
+
+    try:
+        links = list(iter_remaining_links(args.links, args.limit, set()))
+    except FileNotFoundError:
+        print(f"❌ Erreur: Le fichier '{args.links}' est introuvable.")
+        return 1
+    if not links:
+        print("❌ Aucun lien à rendre.")
+        return 1
+
+    results = {}
+    for mode in (RENDER_FULL, RENDER_LEAN):
+        print(f"🦊 Rendu {mode} de {len(links)} pages...")
+        results[mode] = asyncio.run(render_pages(mode, links, args.base_url, args.browser))
+
+    full_times, full_stats, full_data = results[RENDER_FULL]
+    lean_times, lean_stats, lean_data = results[RENDER_LEAN]
+    print(f"\n📄 {len(links)} pages rendues dans chaque mode")
+    print(describe_mode(RENDER_FULL, full_times, full_stats))
+    print(describe_mode(RENDER_LEAN, lean_times, lean_stats))
+    full_bytes = full_stats.counters["bytes"]
+    print(f"⚡ Lean : x{sum(full_times) / sum(lean_times):.1f} plus rapide, "
+          f"{lean_stats.counters['bytes'] / full_bytes if full_bytes else 0:.0%} des octets")
+
+    mismatches = [(link, key) for link in links
+                  for key, expected in full_data[link].items()
+                  if lean_data[link].get(key) != expected]
+    if mismatches:
+        print(f"\n❌ PARITÉ : {len(mismatches)} champ(s) différent(s), "
+              f"ex. {mismatches[0][1]} sur {mismatches[0][0]}")
+        return 1
+    print("\n✅ PARITÉ : mêmes données extraites dans les deux modes.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
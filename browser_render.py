@@ -0,0 +1,127 @@
+from typing import Awaitable, Callable, Dict, Iterable, Optional
+from urllib.parse import urlsplit
+
+from crawl4ai import BrowserConfig, CacheMode, CrawlerRunConfig
+
+from http_fetcher import REQUIRED_MARKERS, STATS_MARKERS
+
+# ====================================================================
+#             RENDU NAVIGATEUR : COMPLET OU ALLÉGÉ ("LEAN")
+# ====================================================================
+# "full" : on attend l'événement `load`, c'est-à-dire chaque affiche,
+# image de fond, police, publicité et script d'analyse de la page, dont
+# l'extracteur ne lit rien.
+# "lean" : les images, médias, polices et feuilles de style sont bloqués,
+# ainsi que toute requête vers un domaine tiers. La page est rendue dès
+# que les blocs lus par l'extracteur sont dans le DOM (mêmes marqueurs que
+# `is_page_complete`), ou au plus tard à la fin du chargement.
+
+RENDER_FULL = "full"
+RENDER_LEAN = "lean"
+
+# Types de ressources Playwright inutiles à l'extraction
+LEAN_BLOCKED_RESOURCE_TYPES = frozenset({
+    "image", "media", "font", "stylesheet", "manifest", "texttrack",
+})
+# Domaines du site (pages, scripts et fragments chargés en XHR) : tout le
+# reste (publicité, analytics, widgets) est bloqué en mode allégé.
+FIRST_PARTY_DOMAINS = ("letterboxd.com", "ltrbxd.com")
+
+
+def build_browser_config(browser_type: str = "firefox") -> BrowserConfig:
+    """Navigateur headless partagé par les deux modes de rendu."""
+    return BrowserConfig(browser_type=browser_type, headless=True, verbose=False)
+
+
+def markers_ready_js() -> str:
+    """
+    Condition d'attente (JavaScript) : les blocs de `is_page_complete` sont
+    présents, ou la page a fini de charger (film sans note, page d'erreur).
+    """
+    required = " && ".join(f"document.querySelector('.{marker}')"
+                           for marker in REQUIRED_MARKERS)
+    stats = " || ".join(f"document.querySelector('.{marker}')"
+                        for marker in STATS_MARKERS)
+    return (f"js:() => ({required} && ({stats})) !== null"
+            f" || document.readyState === 'complete'")
+
+
+def build_run_config(mode: str, timeout_ms: int) -> CrawlerRunConfig:
+    """Paramètres d'une navigation selon le mode de rendu."""
+    if mode == RENDER_FULL:
+        return CrawlerRunConfig(wait_until="load", page_timeout=timeout_ms,
+                                cache_mode=CacheMode.BYPASS, verbose=False)
+    if mode == RENDER_LEAN:
+        return CrawlerRunConfig(wait_until="domcontentloaded", page_timeout=timeout_ms,
+                                wait_for=markers_ready_js(), wait_for_timeout=timeout_ms,
+                                delay_before_return_html=0, cache_mode=CacheMode.BYPASS,
+                                verbose=False)
+    raise ValueError(f"Mode de rendu inconnu : {mode!r} ({RENDER_FULL} ou {RENDER_LEAN}).")
+
+
+def is_first_party(url: str, hosts: Iterable[str]) -> bool:
+    """Vrai si l'hôte de `url` est l'un de `hosts` ou l'un de leurs sous-domaines."""
+    host = (urlsplit(url).hostname or "").lower()
+    return any(host == allowed or host.endswith("." + allowed) for allowed in hosts)
+
+
+class RenderStats:
+    """Requêtes servies / bloquées et octets reçus par le navigateur."""
+
+    def __init__(self):
+        self.counters: Dict[str, int] = {"allowed": 0, "blocked_type": 0,
+                                         "blocked_third_party": 0, "bytes": 0}
+
+    def describe(self) -> str:
+        c = self.counters
+        return (f"{c['allowed']} requêtes servies, {c['blocked_type']} bloquées (type), "
+                f"{c['blocked_third_party']} bloquées (domaine tiers), "
+                f"{c['bytes'] / 1024 ** 2:.1f} Mo reçus")
+
+
+def lean_page_hook(first_party_hosts: Iterable[str],
+                   stats: Optional[RenderStats] = None,
+                   block: bool = True) -> Callable[..., Awaitable]:
+    """
+    Hook crawl4ai `on_page_context_created` : filtre les requêtes de chaque
+    nouvelle page (si `block`) et compte les octets reçus (si `stats`).
+    block=False sert à mesurer le mode complet avec le même compteur.
+    """
+    hosts = tuple(host.lower() for host in first_party_hosts)
+
+    async def handle_route(route):
+        request = route.request
+        if request.resource_type in LEAN_BLOCKED_RESOURCE_TYPES:
+            if stats is not None:
+                stats.counters["blocked_type"] += 1
+            await route.abort()
+        elif not is_first_party(request.url, hosts):
+            if stats is not None:
+                stats.counters["blocked_third_party"] += 1
+            await route.abort()
+        else:
+            if stats is not None:
+                stats.counters["allowed"] += 1
+            await route.continue_()
+
+    async def count_bytes(request):
+        try:
+            sizes = await request.sizes()
+        except Exception:
+            return  # page déjà fermée
+        stats.counters["bytes"] += (sizes.get("responseBodySize", 0)
+                                    + sizes.get("responseHeadersSize", 0))
+
+    def count_request(request):
+        stats.counters["allowed"] += 1
+
+    async def hook(page, context=None, **kwargs):
+        if block:
+            await page.route("**/*", handle_route)
+        if stats is not None:
+            if not block:
+                page.on("request", count_request)
+            page.on("requestfinished", count_bytes)
+        return page
+
+    return hook
@@ -0,0 +1,164 @@
+import sqlite3
+import time
+from typing import Callable, Container, Dict, Iterable, Iterator, List, Optional, Set
+
+from movie_fields import is_error_record
+
+# ====================================================================
+#                   INDEX DE REPRISE (CHECKPOINT PAR URL)
+# ====================================================================
+# Une petite table SQLite indexée par `film_url` mémorise le statut de
+# chaque film traité. La reprise ne dépend plus de la position dans la
+# liste : les films terminés dans le désordre par `asyncio` sont
+# correctement reconnus.
+
+STATUS_OK = "ok"
+STATUS_NOT_FOUND = "not_found"
+STATUS_NETWORK_ERROR = "network_error"
+# Autre URL d'un film déjà scrapé (voir film_identity.py) : rien à exporter
+STATUS_ALIAS = "alias"
+
+
+class CheckpointIndex:
+    """Index persistant `film_url` -> (statut, horodatage)."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.pending = 0
+        self._conn = sqlite3.connect(db_path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS checkpoint ("
+            " film_url TEXT PRIMARY KEY,"
+            " status TEXT NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def mark(self, film_url: str, status: str, timestamp: Optional[float] = None):
+        """Enregistre (ou met à jour) le statut d'un film. Validé par `commit()`."""
+        self._conn.execute(
+            "INSERT INTO checkpoint (film_url, status, updated_at) VALUES (?, ?, ?)"
+            " ON CONFLICT(film_url) DO UPDATE SET"
+            " status = excluded.status, updated_at = excluded.updated_at",
+            (film_url, status, timestamp if timestamp is not None else time.time()),
+        )
+        self.pending += 1
+
+    def forget(self, film_url: str):
+        """Retire un film de l'index : il sera traité à nouveau. Validé par `commit()`."""
+        self._conn.execute("DELETE FROM checkpoint WHERE film_url = ?", (film_url,))
+        self.pending += 1
+
+    def commit(self):
+        """Valide les statuts en attente."""
+        self._conn.commit()
+        self.pending = 0
+
+    def close(self):
+        """Validation finale puis fermeture de la base."""
+        self.commit()
+        self._conn.close()
+
+    def __contains__(self, film_url: object) -> bool:
+        """Le film a-t-il déjà été traité ? (recherche indexée, rien n'est chargé en mémoire)"""
+        return self._conn.execute("SELECT 1 FROM checkpoint WHERE film_url = ?",
+                                  (film_url,)).fetchone() is not None
+
+    def status(self, film_url: str) -> Optional[str]:
+        """Statut enregistré d'une URL (None si elle n'a pas encore été traitée)."""
+        row = self._conn.execute("SELECT status FROM checkpoint WHERE film_url = ?",
+                                 (film_url,)).fetchone()
+        return row[0] if row else None
+
+    def updated_at(self, film_url: str) -> Optional[float]:
+        """Horodatage du dernier statut d'une URL (None si elle n'a pas été traitée)."""
+        row = self._conn.execute("SELECT updated_at FROM checkpoint WHERE film_url = ?",
+                                 (film_url,)).fetchone()
+        return row[0] if row else None
+
+    def count(self) -> int:
+        """Nombre d'URLs déjà traitées (tous statuts confondus)."""
+        return self._conn.execute("SELECT COUNT(*) FROM checkpoint").fetchone()[0]
+
+    def done_urls(self) -> Set[str]:
+        """Ensemble des URLs déjà traitées (tous statuts confondus)."""
+        return {row[0] for row in self._conn.execute("SELECT film_url FROM checkpoint")}
+
+    def urls_with_status(self, status: str) -> List[str]:
+        """URLs ayant un statut donné (ex: échecs réseau à relancer)."""
+        return [row[0] for row in self._conn.execute(
+            "SELECT film_url FROM checkpoint WHERE status = ? ORDER BY film_url",
+            (status,)
+        )]
+
+    def status_counts(self) -> Dict[str, int]:
+        """Nombre de films par statut."""
+        return dict(self._conn.execute(
+            "SELECT status, COUNT(*) FROM checkpoint GROUP BY status"
+        ))
+
+    def is_empty(self) -> bool:
+        return self._conn.execute("SELECT 1 FROM checkpoint LIMIT 1").fetchone() is None
+
+    def __enter__(self) -> "CheckpointIndex":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def status_for_record(record: Dict) -> str:
+    """
+    Déduit le statut de checkpoint d'une ligne d'export. Les anciennes lignes
+    d'erreur ne distinguent pas 404 et réseau : elles sont classées en réseau.
+    """
+    if is_error_record(record):
+        return STATUS_NETWORK_ERROR
+    return STATUS_OK
+
+
+def seed_from_records(index: CheckpointIndex, records: Iterable[Dict]) -> int:
+    """Remplit l'index à partir d'un export existant (migration unique)."""
+    count = 0
+    for record in records:
+        url = record.get("film_url")
+        if url:
+            index.mark(url, status_for_record(record))
+            count += 1
+    index.commit()
+    return count
+
+
+def iter_remaining_links(filepath: str, limit: int, done: Container[str],
+                         skip: Optional[Callable[[str], bool]] = None) -> Iterator[str]:
+    """
+    Une seule passe sur le fichier de liens : ne garde que les URLs à traiter.
+    `done` peut être l'index lui-même : chaque lien est vérifié dans SQLite
+    au lieu de charger toutes les URLs traitées en mémoire. `skip` écarte en
+    plus les URLs pour lesquelles il est vrai (ex. alias d'un film connu).
+    """
+    seen = 0
+    with open(filepath, "r", encoding="utf-8") as f:
+        for line in f:
+            link = line.strip()
+            if not link:
+                continue
+            seen += 1
+            if link not in done and not (skip and skip(link)):
+                yield link
+            if seen >= limit:
+                break
+
+
+def count_links(filepath: str, limit: int) -> int:
+    """Compte les liens non vides du fichier (lecture en flux, mémoire constante)."""
+    count = 0
+    with open(filepath, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                count += 1
+                if count >= limit:
+                    break
+    return count
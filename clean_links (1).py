@@ -1,22 +1,42 @@
 # ---------------------------------------------------
-# Objectif : créer un nouveau fichier avec les liens des films sans doublons
+# Objectif : ajouter au fichier propre les liens des films découverts, sans doublons
 # ---------------------------------------------------
+# Les liens sont lus au fil de l'eau et ramenés à la forme canonique
+# https://letterboxd.com/film/<slug>/ (http, www, slash final, sous-pages
+# /reviews/... donnent le même lien). Les liens déjà vus sont mémorisés dans
+# un index SQLite sur disque : la mémoire reste bornée, même pour des
+# dizaines de millions de liens. Le fichier propre n'est jamais réécrit :
+# seuls les nouveaux liens y sont ajoutés, et un nouveau passage ne lit que
+# les lignes ajoutées au fichier brut depuis le précédent.
 
-# Étape 1 : Lecture du fichier original
-with open("all_letterboxd_links.txt", "r", encoding="utf-8") as f:
-    lines = [line.strip() for line in f if line.strip()]  # on supprime les lignes vides
+from link_dedup import LinkDeduplicator
 
-# Étape 2 : Suppression des doublons
-unique_links = sorted(set(lines))  # un set garde uniquement les valeurs uniques
+FICHIER_BRUT = "all_letterboxd_links.txt"
+FICHIER_PROPRE = "all_letterboxd_links_clean.txt"
+# Index des liens déjà présents dans le fichier propre
+FICHIER_INDEX = "all_letterboxd_links_seen.sqlite"
 
-# Étape 3 : Création d’un nouveau fichier propre
-with open("all_letterboxd_links_clean.txt", "w", encoding="utf-8") as f:
-    for link in unique_links:
-        f.write(link + "\n")
+dedup = LinkDeduplicator(FICHIER_INDEX, FICHIER_PROPRE)
+try:
+    # Étape 1 : Index aligné sur le fichier propre existant
+    rattrapes = dedup.sync_clean_file()
+    if rattrapes:
+        print(f"🔁 Index {FICHIER_INDEX} : {rattrapes} liens du fichier propre intégrés.")
 
-# Étape 4 : Résumé
+    # Étape 2 : Lecture des nouveaux liens, normalisation et ajout des liens inédits
+    try:
+        stats = dedup.merge(FICHIER_BRUT)
+    except FileNotFoundError:
+        print(f"❌ Erreur: Le fichier '{FICHIER_BRUT}' est introuvable.")
+        raise SystemExit(1)
+    total_unique = len(dedup)
+finally:
+    dedup.close()
+
+# Étape 3 : Résumé
 print("🧹 Nettoyage terminé avec succès !")
-print(f"Total initial : {len(lines)} liens")
-print(f"Total unique  : {len(unique_links)} liens")
-print(f"Doublons supprimés : {len(lines) - len(unique_links)}")
-print("📁 Nouveau fichier créé : all_letterboxd_links_clean.txt")
\ No newline at end of file
+print(f"Nouveaux liens lus : {stats['read']} liens")
+print(f"Liens ajoutés      : {stats['new']} liens")
+print(f"Doublons supprimés : {stats['duplicates']}")
+print(f"Liens ignorés (pas une page de film) : {stats['invalid']}")
+print(f"📁 {FICHIER_PROPRE} : {total_unique} liens uniques")
@@ -0,0 +1,180 @@
+import hashlib
+import json
+import math
+import os
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# ====================================================================
+#          AGRÉGATS INCRÉMENTAUX PAR DÉCENNIE (ÉTAT PERSISTANT)
+# ====================================================================
+# Pour chaque décennie : nombre, somme, somme des carrés et un histogramme
+# des notes au centième. Les notes Letterboxd ont au plus deux décimales
+# sur [0, 5] : l'histogramme (≤ 501 cases) est un résumé fusionnable ET
+# exact, dont on tire les quantiles du box plot sans relire les films.
+# L'état mémorise aussi jusqu'où le CSV a déjà été intégré (high-water
+# mark) : une nouvelle analyse ne lit que les lignes ajoutées depuis.
+
+# Octets relus à la fin de la partie déjà intégrée pour vérifier qu'elle
+# n'a pas changé (CSV réécrit, ré-extraction...).
+FINGERPRINT_BYTES = 4096
+
+
+class RatingSketch:
+    """Nombre, somme, somme des carrés et histogramme des notes (au centième)."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.histogram: Dict[int, int] = {}
+
+    def add(self, ratings: np.ndarray):
+        """Intègre un tableau de notes."""
+        ratings = np.asarray(ratings, dtype="float64")
+        if ratings.size == 0:
+            return
+        self.count += int(ratings.size)
+        self.total += float(ratings.sum())
+        self.total_sq += float(np.square(ratings).sum())
+        cents, counts = np.unique(np.rint(ratings * 100).astype("int64"),
+                                  return_counts=True)
+        for cent, count in zip(cents.tolist(), counts.tolist()):
+            self.histogram[cent] = self.histogram.get(cent, 0) + count
+
+    def merge(self, other: "RatingSketch"):
+        self.count += other.count
+        self.total += other.total
+        self.total_sq += other.total_sq
+        for cent, count in other.histogram.items():
+            self.histogram[cent] = self.histogram.get(cent, 0) + count
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else math.nan
+
+    @property
+    def std(self) -> float:
+        """Écart-type (échantillon) à partir de la somme des carrés."""
+        if self.count < 2:
+            return math.nan
+        variance = (self.total_sq - self.total ** 2 / self.count) / (self.count - 1)
+        return math.sqrt(max(variance, 0.0))
+
+    def _value_at(self, cents: List[int], cumulative: np.ndarray, rank: int) -> float:
+        """Valeur de rang `rank` (0 = plus petite) de la distribution."""
+        return cents[int(np.searchsorted(cumulative, rank, side="right"))] / 100
+
+    def quantile(self, q: float) -> float:
+        """Quantile avec interpolation linéaire (même définition que numpy)."""
+        return self.quantiles([q])[0]
+
+    def quantiles(self, qs: List[float]) -> List[float]:
+        if not self.count:
+            return [math.nan for _ in qs]
+        cents = sorted(self.histogram)
+        cumulative = np.cumsum([self.histogram[c] for c in cents])
+        values = []
+        for q in qs:
+            position = q * (self.count - 1)
+            low, high = math.floor(position), math.ceil(position)
+            low_value = self._value_at(cents, cumulative, low)
+            high_value = self._value_at(cents, cumulative, high)
+            values.append(low_value + (high_value - low_value) * (position - low))
+        return values
+
+    def box_stats(self, label: str, whisker: float = 1.5) -> Dict[str, Any]:
+        """Statistiques au format de `matplotlib.axes.Axes.bxp` (sans points aberrants)."""
+        q1, median, q3 = self.quantiles([0.25, 0.5, 0.75])
+        iqr = q3 - q1
+        values = [c / 100 for c in sorted(self.histogram)]
+        inside = [v for v in values if q1 - whisker * iqr <= v <= q3 + whisker * iqr]
+        return {"label": label, "med": median, "q1": q1, "q3": q3,
+                "whislo": min(inside), "whishi": max(inside),
+                "mean": self.mean, "fliers": []}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"count": self.count, "sum": self.total, "sumsq": self.total_sq,
+                "histogram": {str(c): n for c, n in sorted(self.histogram.items())}}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RatingSketch":
+        sketch = cls()
+        sketch.count = data["count"]
+        sketch.total = data["sum"]
+        sketch.total_sq = data["sumsq"]
+        sketch.histogram = {int(c): n for c, n in data["histogram"].items()}
+        return sketch
+
+
+def _fingerprint(csv_path: str, offset: int) -> str:
+    """Empreinte de l'en-tête et de la fin de la partie déjà intégrée du CSV."""
+    digest = hashlib.sha1()
+    with open(csv_path, "rb") as f:
+        digest.update(f.readline())
+        start = max(0, offset - FINGERPRINT_BYTES)
+        f.seek(start)
+        digest.update(f.read(offset - start))
+    return digest.hexdigest()
+
+
+class DecadeAggregateState:
+    """Sketches par décennie + position déjà intégrée du CSV, sauvegardés en JSON."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.offset = 0
+        self.fingerprint = ""
+        self.rows = 0
+        self.decades: Dict[int, RatingSketch] = {}
+
+    @classmethod
+    def load(cls, path: str) -> "DecadeAggregateState":
+        state = cls(path)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return state
+        state.offset = data["offset"]
+        state.fingerprint = data["fingerprint"]
+        state.rows = data["rows"]
+        state.decades = {int(d): RatingSketch.from_dict(s)
+                         for d, s in data["decades"].items()}
+        return state
+
+    def save(self):
+        """Écriture atomique (fichier temporaire puis remplacement)."""
+        data = {"offset": self.offset, "fingerprint": self.fingerprint,
+                "rows": self.rows,
+                "decades": {str(d): s.to_dict() for d, s in sorted(self.decades.items())}}
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+    def resume_offset(self, csv_path: str) -> Optional[int]:
+        """
+        Position à partir de laquelle lire les nouvelles lignes, ou None si le
+        CSV ne prolonge plus la partie déjà intégrée (tout est alors recalculé).
+        """
+        if self.offset == 0:
+            return None
+        size = os.path.getsize(csv_path)
+        if size < self.offset or _fingerprint(csv_path, self.offset) != self.fingerprint:
+            return None
+        return self.offset
+
+    def reset(self):
+        self.offset, self.fingerprint, self.rows = 0, "", 0
+        self.decades = {}
+
+    def add(self, decade: int, ratings: np.ndarray):
+        self.decades.setdefault(int(decade), RatingSketch()).add(ratings)
+
+    def mark_read(self, csv_path: str, offset: int, rows: int):
+        """Enregistre la nouvelle fin de la partie intégrée (high-water mark)."""
+        self.offset = offset
+        self.fingerprint = _fingerprint(csv_path, offset)
+        self.rows += rows
@@ -0,0 +1,254 @@
+import csv
+import hashlib
+import json
+import os
+from array import array
+from typing import Any, Dict, Iterator, List
+
+import numpy as np
+
+from movie_fields import is_error_record
+
+# ====================================================================
+#                     SINK D'EXPORT INCRÉMENTAL (AJOUT SEUL)
+# ====================================================================
+# Chaque film terminé est AJOUTÉ (une ligne) au fichier JSON Lines et au
+# CSV : le coût d'écriture par film reste constant, quelle que soit la
+# taille du jeu de données. Le JSON consolidé n'est construit qu'une
+# seule fois, à la fin, par `finalize()`.
+# Le JSONL est un journal : un film relancé peut y apparaître plusieurs
+# fois. Les exports consolidés n'en gardent que le dernier succès.
+
+
+def iter_jsonl_records(jsonl_path: str) -> Iterator[Dict[str, Any]]:
+    """Parcourt les enregistrements d'un fichier JSON Lines (ligne par ligne)."""
+    try:
+        with open(jsonl_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # Dernière ligne tronquée (arrêt brutal) : on l'ignore.
+                    continue
+    except FileNotFoundError:
+        return
+
+
+def write_json_array(records: Iterator[Dict[str, Any]], json_path: str) -> int:
+    """
+    Écrit un tableau JSON (même format que `json.dump(..., indent=4)`) en
+    streaming, via un fichier temporaire remplacé atomiquement.
+    """
+    tmp_path = json_path + ".tmp"
+    count = 0
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write("[")
+        for record in records:
+            body = json.dumps(record, ensure_ascii=False, indent=4)
+            body = "\n".join("    " + line for line in body.splitlines())
+            f.write(("," if count else "") + "\n" + body)
+            count += 1
+        f.write("\n]" if count else "]")
+    os.replace(tmp_path, json_path)
+    return count
+
+
+def url_hash(film_url: str) -> int:
+    """Empreinte 64 bits d'une URL (clé compacte des index en tableaux)."""
+    digest = hashlib.blake2b(film_url.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def final_record_positions(jsonl_path: str) -> np.ndarray:
+    """
+    Positions (triées) des lignes à garder : la dernière ligne valide de
+    chaque film. L'index tient dans deux tableaux d'entiers (16 octets par
+    ligne) au lieu d'un dictionnaire d'URLs : la mémoire ne dépend plus de
+    la longueur des URLs ni du coût des objets Python.
+    """
+    hashes = array("Q")
+    positions = array("q")
+    for index, record in enumerate(iter_jsonl_records(jsonl_path)):
+        if not is_error_record(record):
+            hashes.append(url_hash(record.get("film_url") or ""))
+            positions.append(index)
+    if not positions:
+        return np.empty(0, dtype="int64")
+    hashes_np = np.frombuffer(hashes, dtype="uint64")
+    positions_np = np.frombuffer(positions, dtype="int64")
+    # Tri par (URL, position) : la dernière ligne de chaque groupe est la bonne
+    order = np.lexsort((positions_np, hashes_np))
+    sorted_hashes = hashes_np[order]
+    is_last = np.append(sorted_hashes[1:] != sorted_hashes[:-1], True)
+    return np.sort(positions_np[order][is_last])
+
+
+def iter_final_records(jsonl_path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Dernier enregistrement valide de chaque film, dans l'ordre du JSONL.
+    Les lignes d'erreur (anciens exports) sont écartées : les échecs sont
+    suivis par le checkpoint et le fichier des échecs.
+    """
+    # 1re passe : position de la dernière ligne valide de chaque URL
+    keep = final_record_positions(jsonl_path)
+    if keep.size == 0:
+        return
+    # 2e passe : on ne rend que ces lignes-là (les positions sont triées)
+    next_keep = 0
+    for index, record in enumerate(iter_jsonl_records(jsonl_path)):
+        if index == keep[next_keep]:
+            yield record
+            next_keep += 1
+            if next_keep == keep.size:
+                return
+
+
+def write_csv(records: Iterator[Dict[str, Any]], csv_path: str, keys: List[str]) -> int:
+    """Réécrit le CSV en streaming, via un fichier temporaire remplacé atomiquement."""
+    tmp_path = csv_path + ".tmp"
+    count = 0
+    with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=keys, extrasaction='ignore')
+        writer.writeheader()
+        for record in records:
+            writer.writerow(record)
+            count += 1
+    os.replace(tmp_path, csv_path)
+    return count
+
+
+# Fin de ligne du CSV (`csv` écrit "\r\n" ; un synopsis peut contenir "\n")
+CSV_LINE_END = b"\r\n"
+
+
+def truncate_partial_tail(path: str, terminator: bytes = b"\n",
+                          block_size: int = 64 * 1024) -> bytes:
+    """
+    Coupe la fin d'un fichier après son dernier `terminator` (ligne écrite à
+    moitié lors d'un arrêt brutal) et retourne les octets coupés. Sans cela,
+    le premier enregistrement ajouté à la reprise serait collé à la ligne
+    incomplète, puis écarté à la lecture.
+    """
+    try:
+        size = os.path.getsize(path)
+    except FileNotFoundError:
+        return b""
+    with open(path, "r+b") as f:
+        cut, end = 0, size
+        # Lecture à rebours par blocs (qui se chevauchent d'un terminateur)
+        while end > 0:
+            start = max(0, end - block_size)
+            f.seek(start)
+            index = f.read(end - start).rfind(terminator)
+            if index >= 0:
+                cut = start + index + len(terminator)
+                break
+            end = start + len(terminator) - 1 if start else 0
+        if cut == size:
+            return b""
+        f.seek(cut)
+        tail = f.read()
+        f.truncate(cut)
+        f.flush()
+        os.fsync(f.fileno())
+    return tail
+
+
+class IncrementalExportSink:
+    """Ajoute un enregistrement par film au JSONL et au CSV (fsync par lots)."""
+
+    def __init__(self, jsonl_path: str, csv_path: str, keys: List[str],
+                 fsync_every: int = 25, truncate: bool = False):
+        self.jsonl_path = jsonl_path
+        self.csv_path = csv_path
+        self.keys = keys
+        self.fsync_every = max(1, fsync_every)
+        self._pending = 0
+        # Ligne incomplète coupée à la réouverture (arrêt brutal) : les films
+        # validés sans ligne complète doivent être traités à nouveau.
+        self.interrupted = False
+
+        # truncate=True : on repart de fichiers vides (ré-extraction complète).
+        mode = "w" if truncate else "a"
+        if not truncate:
+            jsonl_tail = truncate_partial_tail(jsonl_path)
+            csv_tail = truncate_partial_tail(csv_path, CSV_LINE_END)
+            self.interrupted = bool(jsonl_tail or csv_tail)
+            if self.interrupted:
+                print(f"⚠️ Écriture interrompue : {len(jsonl_tail)} octets retirés de "
+                      f"{jsonl_path}, {len(csv_tail)} de {csv_path}.")
+        csv_is_new = (truncate or not os.path.exists(csv_path)
+                      or os.path.getsize(csv_path) == 0)
+        self._jsonl_file = open(jsonl_path, mode, encoding="utf-8")
+        self._csv_file = open(csv_path, mode, encoding="utf-8", newline="")
+        self._csv_writer = csv.DictWriter(self._csv_file, fieldnames=keys,
+                                          extrasaction='ignore')
+        if csv_is_new:
+            self._csv_writer.writeheader()
+
+    def write(self, record: Dict[str, Any]):
+        """Ajoute un film aux deux fichiers (coût O(1), indépendant du total)."""
+        self._jsonl_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._csv_writer.writerow(record)
+        self._pending += 1
+        if self._pending >= self.fsync_every:
+            self.flush()
+
+    def flush(self):
+        """Vide les tampons et force l'écriture sur disque (fsync)."""
+        for f in (self._jsonl_file, self._csv_file):
+            if f.closed:
+                continue
+            f.flush()
+            os.fsync(f.fileno())
+        self._pending = 0
+
+    def close(self):
+        """Flush final puis fermeture des fichiers."""
+        if self._jsonl_file.closed:
+            return
+        self.flush()
+        self._jsonl_file.close()
+        self._csv_file.close()
+
+    def finalize(self, json_path: str) -> int:
+        """
+        Construit une seule fois le JSON consolidé à partir du JSONL, et
+        réécrit le CSV avec le même contenu (un film par ligne, sans erreurs).
+        """
+        self.close()
+        write_csv(iter_final_records(self.jsonl_path), self.csv_path, self.keys)
+        return write_json_array(iter_final_records(self.jsonl_path), json_path)
+
+    def __enter__(self) -> "IncrementalExportSink":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def count_jsonl_records(jsonl_path: str) -> int:
+    """Compte les enregistrements d'un JSONL sans les charger en mémoire."""
+    return sum(1 for _ in iter_jsonl_records(jsonl_path))
+
+
+def migrate_legacy_json(json_path: str, jsonl_path: str) -> int:
+    """
+    Conversion unique de l'ancien export (tableau JSON complet) en JSONL,
+    pour pouvoir reprendre un scraping lancé avec l'ancienne version.
+    """
+    if os.path.exists(jsonl_path) or not os.path.exists(json_path):
+        return 0
+    try:
+        with open(json_path, "r", encoding="utf-8") as f:
+            legacy = json.load(f)
+    except json.JSONDecodeError:
+        print("⚠️ ERREUR : Le fichier JSON est corrompu. Démarrage à zéro.")
+        return 0
+    with open(jsonl_path, "w", encoding="utf-8") as f:
+        for record in legacy:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    return len(legacy)
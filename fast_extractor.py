@@ -0,0 +1,406 @@
+import re
+from typing import Any, Collection, Dict, List, Optional, Tuple
+
+from movie_fields import (default_movie_data, parse_count, project_record,
+                          safe_extract, wants)
+
+try:
+    import lxml.html
+    from lxml import etree
+except ImportError:  # backend optionnel : `pip install lxml`
+    lxml = None
+
+# ====================================================================
+#               EXTRACTEUR RAPIDE (lxml, UN SEUL PARCOURS DE L'ARBRE)
+# ====================================================================
+# Même résultat que `extract_movie_data` (BeautifulSoup), mais l'arbre lxml
+# n'est parcouru qu'une seule fois : chaque élément utile est rangé au
+# passage, puis les champs sont calculés à partir de ces éléments.
+# La parité avec l'extracteur de référence est vérifiée par
+# `benchmark_extractors.py`.
+
+_DURATION_RE = re.compile(r"(\d+)\s*mins")
+_RATINGS_COUNT_RE = re.compile(r"based on ([\d,]+)\s*ratings")
+_ARIA_COUNT_RE = re.compile(r"(\d{1,3}(?:,\d{3})*)")
+_STAT_CLASSES = {
+    "production-statistic -watches": "views_count",
+    "production-statistic -lists": "lists_count",
+    "production-statistic -likes": "likes_count",
+}
+
+
+# Champs que quelques requêtes XPath suffisent à extraire (sans parcours complet)
+DIRECT_FIELDS = frozenset((
+    "avg_rating", "ratings_count", "views_count", "lists_count", "likes_count",
+    "fans_count", "is_top_250_ranked",
+))
+
+
+def direct_fields_only(fields: Optional[Collection[str]]) -> bool:
+    """
+    Vrai si lxml est installé et que `fields` ne demande que des champs de
+    DIRECT_FIELDS : l'extraction se limite alors à quelques requêtes XPath.
+    """
+    return lxml is not None and fields is not None and DIRECT_FIELDS.issuperset(fields)
+
+
+# Test XPath « l'élément a la classe {} » (équivalent de `css_class in _classes(el)`)
+_HAS_CLASS = "contains(concat(' ', normalize-space(@class), ' '), ' {} ')"
+
+
+def _classes(el) -> List[str]:
+    return el.get("class", "").split()
+
+
+def _has_ancestor(el, tag: Optional[str], css_class: str) -> bool:
+    ancestors = el.iterancestors(tag) if tag else el.iterancestors()
+    return any(css_class in _classes(a) for a in ancestors)
+
+
+def _text(el) -> str:
+    """Équivalent de `tag.text` (BeautifulSoup)."""
+    return el.text_content()
+
+
+def _stripped_text(el) -> str:
+    """Équivalent de `tag.get_text(strip=True)` (BeautifulSoup)."""
+    return "".join(t.strip() for t in el.xpath(".//text()"))
+
+
+def _bs_string(el) -> Optional[str]:
+    """Équivalent de `tag.string` : le texte si l'élément n'a qu'un seul enfant."""
+    children = el.getchildren()
+    count = (1 if el.text else 0) + len(children) + sum(1 for c in children if c.tail)
+    if count != 1:
+        return None
+    if el.text:
+        return el.text
+    child = children[0]
+    if not isinstance(child.tag, str):
+        return child.text
+    return _bs_string(child)
+
+
+def _parent(el, tag: str):
+    """Équivalent de `tag.find_parent(name)`."""
+    return next(el.iterancestors(tag), None)
+
+
+def _next_sibling(el, tag: str, class_attr: Optional[str] = None):
+    """Équivalent de `tag.find_next_sibling(name, class_=...)`."""
+    for sibling in el.itersiblings():
+        if sibling.tag == tag and (class_attr is None or sibling.get("class") == class_attr):
+            return sibling
+    return None
+
+
+def _descendants(el, tag: str, css_class: Optional[str] = None):
+    return [d for d in el.iterdescendants(tag)
+            if css_class is None or css_class in _classes(d)]
+
+
+def _first_descendant(el, tag: str, css_class: Optional[str] = None):
+    return next((d for d in el.iterdescendants(tag)
+                 if css_class is None or css_class in _classes(d)), None)
+
+
+def _find_stat_elements(root) -> Tuple[Any, Any, Any, Dict[str, Any], bool]:
+    """
+    Mêmes éléments que le parcours unique, pour les seuls champs de
+    DIRECT_FIELDS : titre, note, statistiques, fans et top 250 (premier
+    élément dans l'ordre du document, comme pendant le parcours).
+    """
+    def first(xpath: str):
+        found = root.xpath(xpath)
+        return found[0] if found else None
+
+    name_span = first(f"//h1[{_HAS_CLASS.format('headline-1')}]"
+                      f"//span[{_HAS_CLASS.format('name')}]")
+    rating_link = first(f"//span[{_HAS_CLASS.format('average-rating')}]//a")
+    fans_link = first("//a[contains(@href, '/fans/')]")
+    stat_divs = {}
+    for css_class, key in _STAT_CLASSES.items():
+        stat_div = first(f"//div[@class='{css_class}']")
+        if stat_div is not None:
+            stat_divs[key] = stat_div
+    is_top_250 = bool(root.xpath(
+        "//a[contains(@href, 'official-top-250-narrative-feature-films')]"))
+    return name_span, rating_link, fans_link, stat_divs, is_top_250
+
+
+def extract_movie_data_fast(html: str, url: str,
+                            fields: Optional[Collection[str]] = None) -> Dict[str, Any]:
+    """
+    Analyse le HTML avec lxml et extrait toutes les métadonnées du film.
+    `fields` : champs à extraire (None = tous), comme `extract_movie_data`.
+    """
+    if lxml is None:
+        raise ImportError("L'extracteur 'lxml' nécessite le paquet 'lxml'.")
+    data: Dict[str, Any] = default_movie_data(url)
+    try:
+        root = lxml.html.document_fromstring(html)
+    except (etree.ParserError, ValueError):
+        return project_record(data, fields)
+
+    # --- Parcours unique : on range chaque élément utile au passage ---
+    name_span = year_link = duration_p = synopsis_p = None
+    primary_span = spoken_span = language_span = country_span = None
+    rating_link = fans_link = services_section = None
+    is_top_250 = False
+    h3s, theme_links, studio_links, director_spans, cast_links = [], [], [], [], []
+    stat_divs: Dict[str, Any] = {}
+
+    # Profondeur d'imbrication dans les conteneurs qui servent de contexte
+    # aux sélecteurs descendants (ex: `div.cast-list p a`), tenue à jour
+    # pendant le parcours : aucune remontée vers les ancêtres n'est nécessaire.
+    inside = {"headline": 0, "average_rating": 0, "cast_list": 0, "cast_p": 0,
+              "contributor": 0, "truncate": 0}
+    opened: List[List[str]] = []
+
+    walk = etree.iterwalk(root, events=("start", "end"))
+    if fields is not None and DIRECT_FIELDS.issuperset(fields):
+        # Projection limitée aux statistiques : quelques requêtes XPath
+        # (exécutées en C) remplacent le parcours complet de l'arbre.
+        name_span, rating_link, fans_link, stat_divs, is_top_250 = _find_stat_elements(root)
+        walk = ()
+
+    for event, el in walk:
+        if event == "end":
+            for context in opened.pop():
+                inside[context] -= 1
+            continue
+        entered: List[str] = []
+        opened.append(entered)
+        tag = el.tag
+        if not isinstance(tag, str):
+            continue
+        classes = _classes(el)
+        if tag == "a":
+            href = el.get("href")
+            if href is not None:
+                if year_link is None and "/films/year/" in href:
+                    year_link = el
+                if "/studio/" in href:
+                    studio_links.append(el)
+                if fans_link is None and "/fans/" in href:
+                    fans_link = el
+                if "official-top-250-narrative-feature-films" in href:
+                    is_top_250 = True
+            if "text-slug" in classes:
+                theme_links.append(el)
+            if rating_link is None and inside["average_rating"]:
+                rating_link = el
+            if inside["cast_p"]:
+                cast_links.append(el)
+            if "contributor" in classes:
+                entered.append("contributor")
+        elif tag == "span":
+            if name_span is None and "name" in classes and inside["headline"]:
+                name_span = el
+            if "prettify" in classes and inside["contributor"]:
+                director_spans.append(el)
+            if "average-rating" in classes:
+                entered.append("average_rating")
+            string = _bs_string(el)
+            if string:
+                if primary_span is None and "Primary Language" in string:
+                    primary_span = el
+                if spoken_span is None and "Spoken Languages" in string:
+                    spoken_span = el
+                if language_span is None and "Language" in string:
+                    language_span = el
+                if country_span is None and ("Country" in string or "Countries" in string):
+                    country_span = el
+        elif tag == "p":
+            if duration_p is None and "text-link" in classes and "text-footer" in classes:
+                duration_p = el
+            if synopsis_p is None and inside["truncate"]:
+                synopsis_p = el
+            if inside["cast_list"]:
+                entered.append("cast_p")
+        elif tag == "h1":
+            if "headline-1" in classes:
+                entered.append("headline")
+        elif tag == "h3":
+            h3s.append(el)
+        elif tag == "div":
+            key = _STAT_CLASSES.get(el.get("class"))
+            if key and key not in stat_divs:
+                stat_divs[key] = el
+            if "cast-list" in classes:
+                entered.append("cast_list")
+            if "truncate" in classes:
+                entered.append("truncate")
+        elif tag == "section":
+            if services_section is None and "services" in classes:
+                services_section = el
+        for context in entered:
+            inside[context] += 1
+
+    # --- Extraction de Base (Vérification de Succès) ---
+    data["film_name"] = safe_extract(lambda: _text(name_span).strip(), default="")
+    if not data["film_name"]:
+        return project_record(data, fields)
+
+    # --- Métadonnées Simples ---
+    if wants(fields, "release_year"):
+        data["release_year"] = safe_extract(
+            lambda: int(_text(year_link).strip()), default=None
+        )
+    if wants(fields, "duration_min"):
+        data["duration_min"] = safe_extract(
+            lambda: int(_DURATION_RE.search(_text(duration_p)).group(1)), default=None
+        )
+    if wants(fields, "synopsis"):
+        data["synopsis"] = safe_extract(lambda: _text(synopsis_p).strip(), default="")
+
+    def extract_languages():
+        main_lang, spoken_list = "", ""
+        if primary_span is not None and spoken_span is not None:
+            main_lang_div = _next_sibling(_parent(primary_span, "h3"), "div")
+            spoken_lang_div = _next_sibling(_parent(spoken_span, "h3"), "div")
+            main_lang = _stripped_text(main_lang_div) if main_lang_div is not None else ""
+            spoken_langs = [_text(a).strip() for a in spoken_lang_div.iterdescendants("a")]
+            spoken_list = " | ".join(spoken_langs)
+        elif language_span is not None:
+            lang_div = _next_sibling(_parent(language_span, "h3"), "div")
+            main_lang = _stripped_text(lang_div) if lang_div is not None else ""
+            spoken_list = main_lang  # Fallback
+        return main_lang, spoken_list
+
+    if wants(fields, "main_language", "spoken_languages"):
+        data["main_language"], data["spoken_languages"] = safe_extract(
+            extract_languages, default=("", "")
+        )
+
+    def extract_genres():
+        genre_div = next(
+            (_next_sibling(h3, "div") for h3 in h3s
+             if _first_descendant(h3, "span") is not None
+             and "Genre" in _text(_first_descendant(h3, "span"))), None
+        )
+        genres = ([_text(a).strip() for a in genre_div.iterdescendants("a")]
+                  if genre_div is not None else [])
+        return " | ".join(genres), genres[0] if genres else ""
+
+    if wants(fields, "genres", "first_genre"):
+        data["genres"], data["first_genre"] = safe_extract(extract_genres, default=("", ""))
+
+    def extract_themes():
+        themes = set()
+        for t in theme_links:
+            href = t.get("href", "")
+            label = _stripped_text(t)
+            if (('/theme/' in href or '/mini-theme/' in href)
+                    and not label.startswith('Show All') and label):
+                themes.add(label)
+        return " | ".join(sorted(themes))
+
+    if wants(fields, "themes"):
+        data["themes"] = safe_extract(extract_themes, default="")
+
+    def extract_cast_and_directors():
+        directors = " | ".join(_text(s).strip() for s in director_spans)
+        cast = [_text(a).strip() for a in cast_links]
+        return directors, " | ".join(cast), cast[0] if cast else ""
+
+    if wants(fields, "directors", "cast", "first_actor"):
+        data["directors"], data["cast"], data["first_actor"] = safe_extract(
+            extract_cast_and_directors, default=("", "", "")
+        )
+    if wants(fields, "studios"):
+        data["studios"] = safe_extract(
+            lambda: " | ".join(_text(a).strip() for a in studio_links), default=""
+        )
+
+    def extract_countries():
+        if country_span is None:
+            return ""
+        country_div = _next_sibling(_parent(country_span, "h3"), "div")
+        return " | ".join(_text(a).strip()
+                          for a in _descendants(country_div, "a", "text-slug"))
+
+    if wants(fields, "origin_countries"):
+        data["origin_countries"] = safe_extract(extract_countries, default="")
+    if wants(fields, "release_type"):
+        data["release_type"] = safe_extract(
+            lambda: " | ".join(_text(h3).strip() for h3 in h3s
+                               if "release-table-title" in _classes(h3)), default=""
+        )
+
+    def extract_premiere():
+        premiere_section = next(
+            (h3 for h3 in h3s if "Premiere" in (_bs_string(h3) or "")), None
+        )
+        festivals = []
+        if premiere_section is not None:
+            block = _next_sibling(premiere_section, "div", "release-table -bydate")
+            if block is not None:
+                for li in _descendants(block, "li", "listitem"):
+                    fest_tag = _first_descendant(li, "span", "release-note")
+                    if fest_tag is not None and 'festival' in _text(fest_tag).lower():
+                        festivals.append(_text(fest_tag).strip())
+        return " | ".join(festivals)
+
+    if wants(fields, "premiere_festival"):
+        data["premiere_festival"] = safe_extract(extract_premiere, default="")
+
+    def extract_watch_platforms():
+        # Même comportement que l'extracteur de référence (parité) : seul le
+        # premier service nommé est pris en compte.
+        if services_section is None:
+            return None
+        platforms = []
+        for service in _descendants(services_section, "p", "service"):
+            name_tag = _first_descendant(service, "span", "name")
+            if name_tag is None or not _text(name_tag).strip():
+                continue
+            locale_tag = _first_descendant(service, "span", "locale")
+            options = [_text(opt).strip()
+                       for opt in _descendants(service, "span", "extended")
+                       if any(_has_ancestor(a, None, "options")
+                              for a in opt.iterancestors("a"))]
+            platform_name = (f"{_text(name_tag).strip()} ({_text(locale_tag).strip()})"
+                             if locale_tag is not None else _text(name_tag).strip())
+            if options:
+                platforms.append(f"{platform_name}: {', '.join(options)}")
+            return " | ".join(platforms)
+        return None
+
+    if wants(fields, "where_to_watch"):
+        data["where_to_watch"] = safe_extract(extract_watch_platforms, default="")
+
+    # --- Bloc d'extraction des Statistiques ---
+    if wants(fields, "avg_rating"):
+        data["avg_rating"] = safe_extract(
+            lambda: float(_text(rating_link).strip()), default=0.0
+        )
+
+    def extract_ratings_count():
+        if rating_link is not None and rating_link.get("data-original-title"):
+            match = _RATINGS_COUNT_RE.search(rating_link.get("data-original-title"))
+            if match:
+                return parse_count(match.group(1))
+        return 0
+
+    if wants(fields, "ratings_count"):
+        data["ratings_count"] = safe_extract(extract_ratings_count, default=0)
+
+    def extract_statistic(key: str) -> int:
+        stat_div = stat_divs.get(key)
+        if stat_div is not None and stat_div.get("aria-label"):
+            match = _ARIA_COUNT_RE.search(stat_div.get("aria-label"))
+            if match:
+                return parse_count(match.group(1))
+        return 0
+
+    for key in _STAT_CLASSES.values():
+        if wants(fields, key):
+            data[key] = safe_extract(lambda: extract_statistic(key), default=0)
+    if wants(fields, "fans_count"):
+        data["fans_count"] = safe_extract(
+            lambda: parse_count(_text(fans_link).strip()), default=0
+        )
+    data["is_top_250_ranked"] = is_top_250
+
+    return project_record(data, fields)
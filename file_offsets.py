@@ -0,0 +1,46 @@
+import hashlib
+import os
+from typing import Iterator, Tuple
+
+# ====================================================================
+#            LECTURE INCRÉMENTALE DES FICHIERS EN AJOUT SEUL
+# ====================================================================
+# Les fichiers produits au fil de l'eau (liens, JSONL, CSV) sont relus à
+# partir de la position déjà traitée (high-water mark). L'empreinte de la
+# partie déjà lue permet de détecter un fichier réécrit entre-temps : sa
+# lecture reprend alors à zéro.
+
+# Octets relus à la fin de la partie déjà lue pour vérifier qu'elle n'a pas changé.
+FINGERPRINT_BYTES = 4096
+
+
+def iter_complete_lines(path: str, offset: int) -> Iterator[Tuple[str, int]]:
+    """
+    Lignes de `path` à partir de l'octet `offset`, avec la position qui suit
+    chacune. Une dernière ligne sans retour à la ligne (écriture en cours)
+    est laissée pour le passage suivant.
+    """
+    with open(path, "rb") as f:
+        f.seek(offset)
+        for raw in f:
+            if not raw.endswith(b"\n"):
+                return
+            offset += len(raw)
+            yield raw.decode("utf-8", errors="replace").strip(), offset
+
+
+def prefix_fingerprint(path: str, offset: int) -> str:
+    """
+    Empreinte de la partie déjà lue (`offset` premiers octets) d'un fichier
+    en ajout seul : identité du fichier, première ligne et derniers octets
+    lus. Un fichier réécrit (remplacé par `os.replace`, même à taille égale
+    ou supérieure) n'a plus la même empreinte : sa lecture reprend à zéro.
+    """
+    stat = os.stat(path)
+    digest = hashlib.sha1(f"{stat.st_dev}:{stat.st_ino}".encode())
+    with open(path, "rb") as f:
+        digest.update(f.readline(min(offset, FINGERPRINT_BYTES)))
+        start = max(0, offset - FINGERPRINT_BYTES)
+        f.seek(start)
+        digest.update(f.read(offset - start))
+    return digest.hexdigest()
@@ -0,0 +1,350 @@
+# ---------------------------------------------------
+# Objectif : préparer les films scrapés pour l'analyse multi-dimensionnelle.
+# Les champs catégoriels (genres, pays, langues, réalisateurs) sont découpés
+# UNE fois et codés en entiers : une table de libellés par dimension et un
+# pont film × valeur en tableaux numpy. Les regroupements (genre × décennie,
+# pays × genre...) se calculent ensuite en quelques millisecondes, sans
+# relire ni redécouper de chaînes.
+#
+# Usage :
+#   python3 film_dimensions.py build
+#   python3 film_dimensions.py groupby genres decade --min-films 20
+#   python3 film_dimensions.py groupby directors --where origin_countries=France
+#   python3 film_dimensions.py crosstab genres decade --value weighted_mean
+# ---------------------------------------------------
+
+import argparse
+import math
+import os
+import time
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from export_sink import iter_final_records
+from movie_fields import is_error_record, split_multi_value
+
+JSONL_FILE_PATH = "movies_data_PROGRESSIVE.jsonl"
+FILM_DIMENSIONS_PATH = "film_dimensions.npz"
+
+# Champs codés en dimensions (multi-valués ou non : même représentation)
+DIMENSION_FIELDS = ("genres", "origin_countries", "main_language",
+                    "spoken_languages", "directors")
+# Dimension calculée à partir de l'année de sortie (pas de table stockée)
+DECADE = "decade"
+# Quantiles calculés par défaut par `group_by`
+DEFAULT_QUANTILES = (0.25, 0.5, 0.75)
+# Version du format du fichier .npz (reconstruit si elle change)
+FORMAT_VERSION = 1
+
+
+def source_fingerprint(path: str) -> np.ndarray:
+    """(taille, date de modification) du fichier source des tables."""
+    stat = os.stat(path)
+    return np.array([FORMAT_VERSION, stat.st_size, stat.st_mtime_ns], dtype="int64")
+
+
+class FilmDimensions:
+    """
+    Faits par film (année, note moyenne, nombre de notes) et, pour chaque
+    dimension, ses libellés et son pont film × valeur : deux tableaux
+    d'entiers (`films`, `codes`) triés par film. Les films sans note ont
+    une note NaN et sont ignorés par les agrégats.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self.arrays = arrays
+        self.film_url = arrays["film_url"]
+        self.release_year = arrays["release_year"]
+        self.avg_rating = arrays["avg_rating"]
+        self.ratings_count = arrays["ratings_count"]
+        # Décennie : dimension virtuelle tirée de l'année (0 = inconnue)
+        known = np.flatnonzero(self.release_year > 0)
+        decades = (self.release_year[known] // 10) * 10
+        self._decade_labels, decade_codes = np.unique(decades, return_inverse=True)
+        self._decade_bridge = (known.astype("int32"), decade_codes.astype("int32"))
+
+    @property
+    def films(self) -> int:
+        return int(self.film_url.size)
+
+    # --- Construction / persistance ---
+
+    @classmethod
+    def build(cls, records: Iterable[Dict[str, Any]]) -> "FilmDimensions":
+        """Découpe et code en une passe les champs de DIMENSION_FIELDS."""
+        urls: List[str] = []
+        years = array("h")
+        ratings = array("f")
+        counts = array("q")
+        codes: Dict[str, Dict[str, int]] = {field: {} for field in DIMENSION_FIELDS}
+        bridge_films = {field: array("i") for field in DIMENSION_FIELDS}
+        bridge_codes = {field: array("i") for field in DIMENSION_FIELDS}
+        for record in records:
+            if is_error_record(record):
+                continue
+            film = len(urls)
+            urls.append(record["film_url"])
+            years.append(int(record.get("release_year") or 0))
+            rating = float(record.get("avg_rating") or 0.0)
+            ratings.append(rating if rating else math.nan)  # note absente enregistrée à 0.0
+            counts.append(int(record.get("ratings_count") or 0))
+            for field in DIMENSION_FIELDS:
+                table = codes[field]
+                # dict.fromkeys : une valeur répétée ne compte qu'une fois par film
+                for value in dict.fromkeys(split_multi_value(record.get(field))):
+                    bridge_films[field].append(film)
+                    bridge_codes[field].append(table.setdefault(value, len(table)))
+
+        arrays = {
+            "film_url": np.array(urls, dtype=str),
+            "release_year": np.frombuffer(years, dtype="int16").copy(),
+            "avg_rating": np.frombuffer(ratings, dtype="float32").copy(),
+            "ratings_count": np.frombuffer(counts, dtype="int64").copy(),
+        }
+        for field in DIMENSION_FIELDS:
+            # Libellés rangés dans l'ordre des codes (ordre d'apparition)
+            arrays[f"{field}.labels"] = np.array(list(codes[field]), dtype=str)
+            arrays[f"{field}.films"] = np.frombuffer(bridge_films[field], dtype="int32").copy()
+            arrays[f"{field}.codes"] = np.frombuffer(bridge_codes[field], dtype="int32").copy()
+        return cls(arrays)
+
+    @classmethod
+    def from_jsonl(cls, jsonl_path: str) -> "FilmDimensions":
+        """Tables construites depuis le dernier enregistrement valide de chaque film."""
+        return cls.build(iter_final_records(jsonl_path))
+
+    def save(self, path: str, source: Optional[np.ndarray] = None):
+        """Écrit toutes les tables dans un seul .npz (remplacé atomiquement)."""
+        arrays = dict(self.arrays)
+        if source is not None:
+            arrays["source"] = source
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "FilmDimensions":
+        with np.load(path, allow_pickle=False) as data:
+            return cls({name: data[name] for name in data.files})
+
+    @classmethod
+    def load_or_build(cls, jsonl_path: str = JSONL_FILE_PATH,
+                      path: str = FILM_DIMENSIONS_PATH) -> Tuple["FilmDimensions", bool]:
+        """
+        Charge les tables si elles correspondent encore au JSONL, sinon les
+        reconstruit et les enregistre. Retourne (tables, reconstruites ?).
+        """
+        source = source_fingerprint(jsonl_path)
+        if os.path.exists(path):
+            dimensions = cls.load(path)
+            stored = dimensions.arrays.get("source")
+            if stored is not None and np.array_equal(stored, source):
+                return dimensions, False
+        dimensions = cls.from_jsonl(jsonl_path)
+        dimensions.save(path, source)
+        return dimensions, True
+
+    # --- Accès aux dimensions ---
+
+    def labels(self, dimension: str) -> np.ndarray:
+        """Libellés d'une dimension, indexés par code."""
+        if dimension == DECADE:
+            return self._decade_labels
+        self._check_dimension(dimension)
+        return self.arrays[f"{dimension}.labels"]
+
+    def bridge(self, dimension: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Pont (indices de films, codes), trié par film."""
+        if dimension == DECADE:
+            return self._decade_bridge
+        self._check_dimension(dimension)
+        return self.arrays[f"{dimension}.films"], self.arrays[f"{dimension}.codes"]
+
+    def code_of(self, dimension: str, value: Any) -> int:
+        """Code d'une valeur (-1 si absente)."""
+        labels = self.labels(dimension)
+        if dimension == DECADE:
+            value = int(value)
+        matches = np.flatnonzero(labels == value)
+        return int(matches[0]) if matches.size else -1
+
+    def film_mask(self, where: Optional[Dict[str, Any]] = None) -> np.ndarray:
+        """Films notés qui ont TOUTES les valeurs de `where` ({dimension: valeur})."""
+        mask = ~np.isnan(self.avg_rating)
+        for dimension, value in (where or {}).items():
+            films, codes = self.bridge(dimension)
+            selected = np.zeros(self.films, dtype=bool)
+            selected[films[codes == self.code_of(dimension, value)]] = True
+            mask &= selected
+        return mask
+
+    def _check_dimension(self, dimension: str):
+        if f"{dimension}.labels" not in self.arrays:
+            raise ValueError(f"Dimension inconnue : {dimension}. Dimensions disponibles : "
+                             f"{', '.join(DIMENSION_FIELDS + (DECADE,))}.")
+
+    # --- Regroupements vectorisés ---
+
+    def _rows(self, dimensions: Sequence[str],
+              mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray, Tuple[int, ...]]:
+        """
+        Lignes (film, clé de groupe) du croisement des dimensions : un film
+        multi-valué apparaît une fois par combinaison de ses valeurs. La clé
+        est le code mixte des dimensions (décodée par `np.unravel_index`).
+        """
+        films = np.flatnonzero(mask).astype("int64")
+        keys = np.zeros(films.size, dtype="int64")
+        shape = []
+        for dimension in dimensions:
+            bridge_films, bridge_codes = self.bridge(dimension)
+            sizes = np.bincount(bridge_films, minlength=self.films)
+            starts = np.cumsum(sizes) - sizes
+            # Chaque ligne est répétée autant de fois que le film a de valeurs
+            repeats = sizes[films]
+            total = int(repeats.sum())
+            offsets = np.arange(total) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+            positions = np.repeat(starts[films], repeats) + offsets
+            n_labels = len(self.labels(dimension))
+            films = np.repeat(films, repeats)
+            keys = np.repeat(keys, repeats) * n_labels + bridge_codes[positions]
+            shape.append(n_labels)
+        return films, keys, tuple(shape)
+
+    def group_by(self, *dimensions: str, where: Optional[Dict[str, Any]] = None,
+                 quantiles: Sequence[float] = DEFAULT_QUANTILES,
+                 min_films: int = 1) -> pd.DataFrame:
+        """
+        Par combinaison des valeurs de `dimensions` : nombre de films, note
+        moyenne, moyenne pondérée par `ratings_count` et quantiles (même
+        interpolation linéaire que numpy). Seuls les films notés comptent.
+        """
+        if not dimensions:
+            raise ValueError("Au moins une dimension est nécessaire.")
+        films, keys, shape = self._rows(dimensions, self.film_mask(where))
+        columns = list(dimensions) + ["films", "mean", "weighted_mean"] + [
+            f"q{round(q * 100)}" for q in quantiles]
+        if films.size == 0:
+            return pd.DataFrame(columns=columns)
+
+        groups, inverse = np.unique(keys, return_inverse=True)
+        ratings = self.avg_rating[films].astype("float64")
+        weights = self.ratings_count[films].astype("float64")
+        counts = np.bincount(inverse)
+        weight_totals = np.bincount(inverse, weights)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            result = {
+                "films": counts,
+                "mean": np.bincount(inverse, ratings) / counts,
+                "weighted_mean": np.bincount(inverse, ratings * weights) / weight_totals,
+            }
+        # Quantiles : notes triées par groupe, puis lecture aux rangs voulus
+        ordered = ratings[np.lexsort((ratings, inverse))]
+        starts = np.cumsum(counts) - counts
+        for q in quantiles:
+            position = q * (counts - 1)
+            lower = np.floor(position).astype("int64")
+            upper = np.minimum(lower + 1, counts - 1)
+            fraction = position - lower
+            low_values = ordered[starts + lower]
+            result[f"q{round(q * 100)}"] = (low_values + (ordered[starts + upper] - low_values)
+                                           * fraction)
+
+        frame = pd.DataFrame(result)
+        for position, (dimension, codes) in enumerate(
+                zip(dimensions, np.unravel_index(groups, shape))):
+            frame.insert(position, dimension, self.labels(dimension)[codes])
+        return frame[frame["films"] >= min_films].reset_index(drop=True)[columns]
+
+    def crosstab(self, rows: str, columns: str, value: str = "mean",
+                 where: Optional[Dict[str, Any]] = None, min_films: int = 1) -> pd.DataFrame:
+        """Tableau croisé `rows` × `columns` d'une statistique de `group_by`."""
+        grouped = self.group_by(rows, columns, where=where, min_films=min_films)
+        return grouped.pivot(index=rows, columns=columns, values=value)
+
+
+# ====================================================================
+#                         LIGNE DE COMMANDE
+# ====================================================================
+
+
+def parse_where(conditions: Optional[List[str]]) -> Dict[str, str]:
+    """['origin_countries=France'] -> {'origin_countries': 'France'}"""
+    where = {}
+    for condition in conditions or []:
+        dimension, _, value = condition.partition("=")
+        where[dimension] = value
+    return where
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Dimensions catégorielles codées en entiers et regroupements rapides.")
+    parser.add_argument("--jsonl", default=JSONL_FILE_PATH,
+                        help="Export du scraper (défaut : %(default)s).")
+    parser.add_argument("--tables", default=FILM_DIMENSIONS_PATH,
+                        help="Fichier des tables (défaut : %(default)s).")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("build", help="Reconstruit les tables depuis le JSONL.")
+
+    dimensions = f"Dimensions : {', '.join(DIMENSION_FIELDS + (DECADE,))}."
+    groupby = commands.add_parser("groupby", help="Statistiques par combinaison de valeurs.")
+    groupby.add_argument("dimensions", nargs="+", help=dimensions)
+    crosstab = commands.add_parser("crosstab", help="Tableau croisé de deux dimensions.")
+    crosstab.add_argument("rows", help=dimensions)
+    crosstab.add_argument("columns")
+    crosstab.add_argument("--value", default="mean",
+                          help="films, mean, weighted_mean, q25, q50 ou q75.")
+    for command in (groupby, crosstab):
+        command.add_argument("--where", action="append", metavar="DIMENSION=VALEUR",
+                             help="Ne garde que les films ayant cette valeur (répétable).")
+        command.add_argument("--min-films", type=int, default=1)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    started = time.perf_counter()
+    try:
+        if args.command == "build":
+            dimensions = FilmDimensions.from_jsonl(args.jsonl)
+            dimensions.save(args.tables, source_fingerprint(args.jsonl))
+            rebuilt = True
+        else:
+            dimensions, rebuilt = FilmDimensions.load_or_build(args.jsonl, args.tables)
+    except FileNotFoundError:
+        print(f"❌ Erreur: Le fichier '{args.jsonl}' est introuvable.")
+        return
+    if rebuilt:
+        sizes = ", ".join(f"{field} {len(dimensions.labels(field))}"
+                          for field in DIMENSION_FIELDS)
+        print(f"✅ Tables construites pour {dimensions.films} films ({sizes} valeurs) "
+              f"en {time.perf_counter() - started:.1f} s -> {args.tables}")
+    if args.command == "build":
+        return
+
+    started = time.perf_counter()
+    where = parse_where(args.where)
+    try:
+        if args.command == "groupby":
+            table = dimensions.group_by(*args.dimensions, where=where,
+                                        min_films=args.min_films)
+        else:
+            table = dimensions.crosstab(args.rows, args.columns, args.value, where=where,
+                                        min_films=args.min_films)
+    except ValueError as error:
+        print(f"❌ {error}")
+        return
+    elapsed = time.perf_counter() - started
+    with pd.option_context("display.max_rows", None, "display.width", 200,
+                           "display.float_format", "{:.2f}".format):
+        print(table.to_string())
+    print(f"\n{len(table)} lignes en {elapsed * 1000:.1f} ms.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+import re
+import sqlite3
+import time
+from typing import Dict, Optional, Tuple
+
+from film_urls import FILM_SLUG_RE, canonical_film_url
+
+# ====================================================================
+#            IDENTITÉ DES FILMS (URL CANONIQUE, ID INTERNE, ALIAS)
+# ====================================================================
+# Un même film peut être atteint par plusieurs `/film/<slug>/` (ancien
+# slug redirigé, variante). Chaque page fournit son URL canonique
+# (`<link rel="canonical">`) et l'identifiant interne du film
+# (`data-film-id` de l'élément principal). L'URL canonique est la clé du
+# film ; l'identifiant ne sert qu'en l'absence d'URL canonique, car la page
+# contient aussi les `data-film-id` des films liés (affiches, suggestions),
+# parfois avant celui du film. L'index associe chaque URL vue à sa clé ;
+# la première URL scrapée d'un film en est l'URL principale, les autres
+# sont des alias : ni re-téléchargés, ni exportés une seconde fois.
+
+CANONICAL_RE = re.compile(
+    r"""<link[^>]+rel=["']canonical["'][^>]*href=["']([^"']+)["']"""
+    r"""|<link[^>]+href=["']([^"']+)["'][^>]*rel=["']canonical["']""",
+    re.IGNORECASE,
+)
+OG_URL_RE = re.compile(r"""<meta[^>]+property=["']og:url["'][^>]*content=["']([^"']+)["']""",
+                       re.IGNORECASE)
+FILM_ID_RE = re.compile(r"""data-film-id=["'](\d+)["']""")
+# Slug porté par l'élément d'un film : data-film-slug / data-item-slug,
+# ou lien /film/<slug>/ (data-item-link, data-target-link, href)
+ELEMENT_SLUG_RE = re.compile(
+    r"""data-(?:film|item)-slug=["']([^"']+)["']|/film/([^/"'?#\s]+)""")
+
+
+def main_film_id(html: str, film_url: Optional[str]) -> Optional[str]:
+    """
+    `data-film-id` de l'élément du film de la page : le premier élément dont
+    le slug est celui de `film_url`. Les films liés portent un autre slug ;
+    sans élément correspondant, l'identifiant est inconnu (None).
+    """
+    if film_url is None:
+        return None
+    slug_match = FILM_SLUG_RE.search(film_url)
+    if slug_match is None:
+        return None
+    slug = slug_match.group(1).lower()
+    for match in FILM_ID_RE.finditer(html):
+        # Balise ouvrante qui porte l'attribut
+        start = html.rfind("<", 0, match.start())
+        end = html.find(">", match.end())
+        tag = html[start:end if end >= 0 else len(html)]
+        if any((found[0] or found[1]).lower() == slug
+               for found in ELEMENT_SLUG_RE.findall(tag)):
+            return match.group(1)
+    return None
+
+
+def extract_film_identity(html: str, film_url: Optional[str] = None
+                          ) -> Tuple[Optional[str], Optional[str]]:
+    """
+    (identifiant interne, URL canonique `/film/<slug>/`) d'une page de film.
+    Chaque valeur vaut None si la page ne la fournit pas. L'identifiant est
+    celui de l'élément dont le slug est celui de l'URL canonique, à défaut
+    celui de `film_url` (URL visitée).
+    """
+    canonical = None
+    match = CANONICAL_RE.search(html) or OG_URL_RE.search(html)
+    if match is not None:
+        canonical = canonical_film_url(next(group for group in match.groups() if group))
+    reference_url = canonical or (canonical_film_url(film_url) if film_url else None)
+    return main_film_id(html, reference_url), canonical
+
+
+def film_key(film_id: Optional[str], canonical_url: Optional[str]) -> Optional[str]:
+    """Clé d'un film : son URL canonique, sinon son identifiant interne."""
+    if canonical_url:
+        return canonical_url
+    if film_id:
+        return f"id:{film_id}"
+    return None
+
+
+class FilmAliasIndex:
+    """Index persistant URL -> clé de film, et clé de film -> URL principale."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._conn = sqlite3.connect(db_path, timeout=60.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS aliases ("
+            " film_url TEXT PRIMARY KEY,"
+            " film_key TEXT NOT NULL) WITHOUT ROWID"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS films ("
+            " film_key TEXT PRIMARY KEY,"
+            " film_id TEXT,"
+            " canonical_url TEXT,"
+            " primary_url TEXT NOT NULL,"
+            " first_seen REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS films_by_id ON films(film_id)")
+        self._migrate_id_keys()
+        self._conn.commit()
+
+    def _migrate_id_keys(self):
+        """
+        Anciens index : la clé était l'identifiant interne (`id:<n>`). Les films
+        dont l'URL canonique est connue passent sur cette clé ; si elle existe
+        déjà, leurs URLs rejoignent ce film.
+        """
+        self._conn.execute(
+            "UPDATE aliases SET film_key = (SELECT f.canonical_url FROM films AS f"
+            " WHERE f.film_key = aliases.film_key)"
+            " WHERE film_key LIKE 'id:%' AND EXISTS (SELECT 1 FROM films AS f"
+            " WHERE f.film_key = aliases.film_key AND f.canonical_url IS NOT NULL)"
+        )
+        self._conn.execute(
+            "UPDATE OR IGNORE films SET film_key = canonical_url"
+            " WHERE film_key LIKE 'id:%' AND canonical_url IS NOT NULL"
+        )
+        self._conn.execute(
+            "DELETE FROM films WHERE film_key LIKE 'id:%' AND canonical_url IS NOT NULL"
+        )
+
+    def record(self, film_url: str, film_id: Optional[str],
+               canonical_url: Optional[str]) -> str:
+        """
+        Enregistre l'identité lue sur la page de `film_url` et retourne l'URL
+        principale du film : `film_url` elle-même, ou l'URL déjà scrapée dont
+        elle est un alias. Validé immédiatement (transaction courte) : les
+        workers du mode distribué partagent l'index sans se bloquer.
+        """
+        key = film_key(film_id, canonical_url)
+        if canonical_url is None and film_id:
+            # Page sans URL canonique : l'identifiant désigne un film déjà connu
+            row = self._conn.execute("SELECT film_key FROM films WHERE film_id = ?"
+                                     " ORDER BY first_seen LIMIT 1", (film_id,)).fetchone()
+            if row is not None:
+                key = row[0]
+        if key is None:
+            return film_url  # page sans identité : traitée comme un film à part
+        self._conn.execute(
+            "INSERT OR IGNORE INTO films VALUES (?, ?, ?, ?, ?)",
+            (key, film_id, canonical_url, film_url, time.time()),
+        )
+        # L'URL visitée et l'URL canonique désignent toutes deux ce film
+        self._conn.executemany(
+            "INSERT INTO aliases (film_url, film_key) VALUES (?, ?)"
+            " ON CONFLICT(film_url) DO UPDATE SET film_key = excluded.film_key",
+            [(url, key) for url in {film_url, canonical_url} if url],
+        )
+        primary_url = self._conn.execute("SELECT primary_url FROM films WHERE film_key = ?",
+                                         (key,)).fetchone()[0]
+        self._conn.commit()
+        return primary_url
+
+    def duplicate_of(self, film_url: str) -> Optional[str]:
+        """URL principale d'un film déjà connu dont `film_url` est un alias (sinon None)."""
+        row = self._conn.execute(
+            "SELECT f.primary_url FROM aliases AS a JOIN films AS f USING (film_key)"
+            " WHERE a.film_url = ?", (film_url,),
+        ).fetchone()
+        if row is None or row[0] == film_url:
+            return None
+        return row[0]
+
+    def counts(self) -> Dict[str, int]:
+        films, urls = self._conn.execute(
+            "SELECT (SELECT COUNT(*) FROM films), (SELECT COUNT(*) FROM aliases)"
+        ).fetchone()
+        return {"films": films, "urls": urls}
+
+    def close(self):
+        self._conn.commit()
+        self._conn.close()
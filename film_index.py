@@ -0,0 +1,366 @@
+# ---------------------------------------------------
+# Objectif : charger les films scrapés dans une base SQLite indexée
+# (tables de liaison genres / casting / réalisateurs / studios / pays /
+# thèmes, index B-tree, recherche plein texte FTS5 sur le synopsis) pour
+# répondre aux questions ad hoc en quelques millisecondes.
+#
+# Usage :
+#   python3 film_index.py ingest
+#   python3 film_index.py director "Bong Joon-ho"
+#   python3 film_index.py decades --genre Drama --country France
+#   python3 film_index.py search "heist AND family"
+#   python3 film_index.py sql "SELECT COUNT(*) FROM films"
+# ---------------------------------------------------
+
+import argparse
+import json
+import os
+import sqlite3
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from file_offsets import prefix_fingerprint
+from movie_fields import is_error_record, split_multi_value
+
+FILM_INDEX_DB_PATH = "films_index.sqlite"
+JSONL_FILE_PATH = "movies_data_PROGRESSIVE.jsonl"
+
+# Colonnes scalaires de la table `films` (les listes vont dans les tables de liaison)
+FILM_COLUMNS = (
+    "film_url", "film_name", "release_year", "duration_min", "main_language",
+    "spoken_languages", "first_genre", "synopsis", "first_actor", "release_type",
+    "premiere_festival", "where_to_watch", "avg_rating", "ratings_count",
+    "views_count", "lists_count", "likes_count", "fans_count", "is_top_250_ranked",
+)
+
+# Champ multi-valué -> (table de liaison, table de dimension)
+LINK_TABLES = {
+    "genres": ("film_genres", "genres"),
+    "directors": ("film_directors", "people"),
+    "cast": ("film_cast", "people"),
+    "studios": ("film_studios", "studios"),
+    "origin_countries": ("film_countries", "countries"),
+    "themes": ("film_themes", "themes"),
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS films (
+    film_id INTEGER PRIMARY KEY,
+    film_url TEXT NOT NULL UNIQUE,
+    film_name TEXT NOT NULL,
+    release_year INTEGER,
+    duration_min INTEGER,
+    main_language TEXT,
+    spoken_languages TEXT,
+    first_genre TEXT,
+    synopsis TEXT,
+    first_actor TEXT,
+    release_type TEXT,
+    premiere_festival TEXT,
+    where_to_watch TEXT,
+    avg_rating REAL,
+    ratings_count INTEGER,
+    views_count INTEGER,
+    lists_count INTEGER,
+    likes_count INTEGER,
+    fans_count INTEGER,
+    is_top_250_ranked INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_films_release_year ON films(release_year);
+CREATE INDEX IF NOT EXISTS idx_films_avg_rating ON films(avg_rating);
+CREATE INDEX IF NOT EXISTS idx_films_ratings_count ON films(ratings_count);
+
+-- Recherche plein texte sur le synopsis (table FTS5 à contenu externe)
+CREATE VIRTUAL TABLE IF NOT EXISTS films_fts USING fts5(
+    synopsis, content='films', content_rowid='film_id'
+);
+CREATE TRIGGER IF NOT EXISTS films_fts_insert AFTER INSERT ON films BEGIN
+    INSERT INTO films_fts(rowid, synopsis) VALUES (new.film_id, new.synopsis);
+END;
+CREATE TRIGGER IF NOT EXISTS films_fts_delete AFTER DELETE ON films BEGIN
+    INSERT INTO films_fts(films_fts, rowid, synopsis)
+    VALUES ('delete', old.film_id, old.synopsis);
+END;
+CREATE TRIGGER IF NOT EXISTS films_fts_update AFTER UPDATE OF synopsis ON films BEGIN
+    INSERT INTO films_fts(films_fts, rowid, synopsis)
+    VALUES ('delete', old.film_id, old.synopsis);
+    INSERT INTO films_fts(rowid, synopsis) VALUES (new.film_id, new.synopsis);
+END;
+
+-- Position déjà ingérée de chaque fichier source (ingestion incrémentale)
+CREATE TABLE IF NOT EXISTS ingest_state (
+    source TEXT PRIMARY KEY,
+    offset INTEGER NOT NULL,
+    updated_at REAL NOT NULL,
+    fingerprint TEXT
+);
+"""
+
+
+def _dimension_schema(dimension: str) -> str:
+    return (f"CREATE TABLE IF NOT EXISTS {dimension} ("
+            f" id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);")
+
+
+def _link_schema(link_table: str, dimension: str) -> str:
+    # Clé primaire (film, valeur) + index inverse (valeur, film) pour les
+    # requêtes du type "films du réalisateur X"
+    return (f"CREATE TABLE IF NOT EXISTS {link_table} ("
+            f" film_id INTEGER NOT NULL REFERENCES films(film_id) ON DELETE CASCADE,"
+            f" {dimension}_id INTEGER NOT NULL REFERENCES {dimension}(id),"
+            f" position INTEGER NOT NULL,"
+            f" PRIMARY KEY (film_id, {dimension}_id)) WITHOUT ROWID;"
+            f"CREATE INDEX IF NOT EXISTS idx_{link_table}_reverse"
+            f" ON {link_table}({dimension}_id, film_id);")
+
+
+class FilmIndex:
+    """Base SQLite des films, alimentée par upsert sur `film_url`."""
+
+    def __init__(self, db_path: str = FILM_INDEX_DB_PATH):
+        self.db_path = db_path
+        self._conn = sqlite3.connect(db_path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(SCHEMA)
+        for link_table, dimension in LINK_TABLES.values():
+            self._conn.executescript(_dimension_schema(dimension))
+            self._conn.executescript(_link_schema(link_table, dimension))
+        # Bases créées avant l'empreinte de la partie ingérée
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(ingest_state)")]
+        if "fingerprint" not in columns:
+            self._conn.execute("ALTER TABLE ingest_state ADD COLUMN fingerprint TEXT")
+        self._conn.commit()
+        # Cache nom -> id des dimensions (évite un SELECT par valeur)
+        self._dimension_ids: Dict[Tuple[str, str], int] = {}
+
+    def _dimension_id(self, dimension: str, name: str) -> int:
+        key = (dimension, name)
+        cached = self._dimension_ids.get(key)
+        if cached is not None:
+            return cached
+        self._conn.execute(f"INSERT OR IGNORE INTO {dimension} (name) VALUES (?)", (name,))
+        dimension_id = self._conn.execute(
+            f"SELECT id FROM {dimension} WHERE name = ?", (name,)
+        ).fetchone()[0]
+        self._dimension_ids[key] = dimension_id
+        return dimension_id
+
+    def upsert(self, record: Dict[str, Any]) -> int:
+        """Insère ou met à jour un film et remplace ses liaisons. Retourne film_id."""
+        values = [record.get(column) for column in FILM_COLUMNS]
+        updates = ", ".join(f"{c} = excluded.{c}" for c in FILM_COLUMNS[1:])
+        self._conn.execute(
+            f"INSERT INTO films ({', '.join(FILM_COLUMNS)})"
+            f" VALUES ({', '.join('?' for _ in FILM_COLUMNS)})"
+            f" ON CONFLICT(film_url) DO UPDATE SET {updates}",
+            values,
+        )
+        film_id = self._conn.execute(
+            "SELECT film_id FROM films WHERE film_url = ?", (record["film_url"],)
+        ).fetchone()[0]
+
+        for field, (link_table, dimension) in LINK_TABLES.items():
+            self._conn.execute(f"DELETE FROM {link_table} WHERE film_id = ?", (film_id,))
+            rows = {}
+            for position, name in enumerate(split_multi_value(record.get(field))):
+                dimension_id = self._dimension_id(dimension, name.strip())
+                rows.setdefault(dimension_id, position)  # doublons : 1re position
+            self._conn.executemany(
+                f"INSERT INTO {link_table} (film_id, {dimension}_id, position)"
+                f" VALUES (?, ?, ?)",
+                [(film_id, dimension_id, position)
+                 for dimension_id, position in rows.items()],
+            )
+        return film_id
+
+    def ingest_jsonl(self, jsonl_path: str, batch_size: int = 500) -> Tuple[int, int]:
+        """
+        Ingère les lignes ajoutées au JSONL depuis la dernière ingestion.
+        Si le JSONL a été réécrit (--reextract, --dedup-films), il est relu en
+        entier et les films qui n'y figurent plus sont supprimés de l'index.
+        Retourne (films insérés ou mis à jour, lignes ignorées).
+        """
+        source = os.path.abspath(jsonl_path)
+        row = self._conn.execute(
+            "SELECT offset, fingerprint FROM ingest_state WHERE source = ?", (source,)
+        ).fetchone()
+        offset, fingerprint = row if row else (0, None)
+        rewritten = bool(offset) and (os.path.getsize(jsonl_path) < offset
+                                      or prefix_fingerprint(jsonl_path, offset) != fingerprint)
+        if rewritten:
+            # Fichier réécrit : on repart du début, l'upsert rend la
+            # ré-ingestion idempotente. Les URLs vues sont notées pour
+            # supprimer ensuite les autres ; la position n'est enregistrée
+            # qu'à la fin (un arrêt en cours relance une relecture complète).
+            offset = 0
+            self._conn.execute("CREATE TEMP TABLE IF NOT EXISTS ingest_seen ("
+                               " film_url TEXT PRIMARY KEY) WITHOUT ROWID")
+            self._conn.execute("DELETE FROM temp.ingest_seen")
+
+        upserted, skipped, pending = 0, 0, 0
+        with open(jsonl_path, "rb") as f:
+            f.seek(offset)
+            for line in iter(f.readline, b""):
+                if not line.endswith(b"\n"):
+                    break  # ligne en cours d'écriture : reprise au prochain passage
+                offset += len(line)
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    record = None
+                if record is None or is_error_record(record):
+                    skipped += 1
+                    continue
+                self.upsert(record)
+                if rewritten:
+                    self._conn.execute("INSERT OR IGNORE INTO temp.ingest_seen VALUES (?)",
+                                       (record["film_url"],))
+                upserted += 1
+                pending += 1
+                if pending >= batch_size:
+                    if rewritten:
+                        self._conn.commit()
+                    else:
+                        self._save_offset(source, jsonl_path, offset)
+                    pending = 0
+        if rewritten:
+            self._conn.execute("DELETE FROM films WHERE film_url NOT IN"
+                               " (SELECT film_url FROM temp.ingest_seen)")
+            self._conn.execute("DELETE FROM temp.ingest_seen")
+        self._save_offset(source, jsonl_path, offset)
+        return upserted, skipped
+
+    def _save_offset(self, source: str, jsonl_path: str, offset: int):
+        self._conn.execute(
+            "INSERT INTO ingest_state (source, offset, updated_at, fingerprint)"
+            " VALUES (?, ?, ?, ?)"
+            " ON CONFLICT(source) DO UPDATE SET offset = excluded.offset,"
+            " updated_at = excluded.updated_at, fingerprint = excluded.fingerprint",
+            (source, offset, time.time(), prefix_fingerprint(jsonl_path, offset)),
+        )
+        self._conn.commit()
+
+    def query(self, sql: str, params: Sequence[Any] = ()) -> Tuple[List[str], List[Tuple]]:
+        """Exécute une requête et retourne (noms de colonnes, lignes)."""
+        cursor = self._conn.execute(sql, params)
+        columns = [d[0] for d in cursor.description] if cursor.description else []
+        return columns, cursor.fetchall()
+
+    def films_by_person(self, name: str, role: str = "directors") -> Tuple[List[str], List[Tuple]]:
+        link_table = LINK_TABLES[role][0]
+        return self.query(
+            f"SELECT f.film_name, f.release_year, f.avg_rating, f.film_url"
+            f" FROM people p JOIN {link_table} l ON l.people_id = p.id"
+            f" JOIN films f ON f.film_id = l.film_id"
+            f" WHERE p.name = ? COLLATE NOCASE ORDER BY f.release_year",
+            (name,),
+        )
+
+    def decade_ratings(self, genre: Optional[str] = None,
+                       country: Optional[str] = None) -> Tuple[List[str], List[Tuple]]:
+        """Note moyenne par décennie, filtrée par genre et/ou pays."""
+        joins, where, params = [], ["f.avg_rating > 0", "f.release_year IS NOT NULL"], []
+        if genre:
+            joins.append("JOIN film_genres fg ON fg.film_id = f.film_id"
+                         " JOIN genres g ON g.id = fg.genres_id")
+            where.append("g.name = ? COLLATE NOCASE")
+            params.append(genre)
+        if country:
+            joins.append("JOIN film_countries fc ON fc.film_id = f.film_id"
+                         " JOIN countries c ON c.id = fc.countries_id")
+            where.append("c.name = ? COLLATE NOCASE")
+            params.append(country)
+        return self.query(
+            f"SELECT (f.release_year / 10) * 10 AS decade, COUNT(*) AS films,"
+            f" ROUND(AVG(f.avg_rating), 3) AS avg_rating"
+            f" FROM films f {' '.join(joins)} WHERE {' AND '.join(where)}"
+            f" GROUP BY decade ORDER BY decade",
+            params,
+        )
+
+    def search_synopsis(self, text: str, limit: int = 20) -> Tuple[List[str], List[Tuple]]:
+        """Recherche FTS5 (syntaxe MATCH : mots, "phrases", AND/OR/NOT, préfixes*)."""
+        return self.query(
+            "SELECT f.film_name, f.release_year, f.avg_rating, f.film_url"
+            " FROM films_fts JOIN films f ON f.film_id = films_fts.rowid"
+            " WHERE films_fts MATCH ? ORDER BY rank LIMIT ?",
+            (text, limit),
+        )
+
+    def close(self):
+        self._conn.commit()
+        self._conn.close()
+
+    def __enter__(self) -> "FilmIndex":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def print_table(columns: List[str], rows: List[Tuple], elapsed: float):
+    """Affichage en colonnes alignées, suivi du temps de requête."""
+    if rows:
+        cells = [[("" if v is None else str(v)) for v in row] for row in rows]
+        widths = [min(60, max(len(c), *(len(r[i]) for r in cells)))
+                  for i, c in enumerate(columns)]
+        print("  ".join(c.ljust(w) for c, w in zip(columns, widths)))
+        print("  ".join("-" * w for w in widths))
+        for row in cells:
+            print("  ".join(v[:w].ljust(w) for v, w in zip(row, widths)))
+    print(f"\n{len(rows)} lignes en {elapsed * 1000:.1f} ms.")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Index SQLite des films scrapés.")
+    parser.add_argument("--db", default=FILM_INDEX_DB_PATH,
+                        help="Base SQLite (défaut : %(default)s).")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest = commands.add_parser("ingest", help="Ingère les nouvelles lignes du JSONL.")
+    ingest.add_argument("--jsonl", default=JSONL_FILE_PATH)
+
+    for role, help_text in (("director", "Films d'un réalisateur."),
+                            ("actor", "Films d'un acteur ou d'une actrice.")):
+        person = commands.add_parser(role, help=help_text)
+        person.add_argument("name")
+
+    decades = commands.add_parser("decades", help="Note moyenne par décennie.")
+    decades.add_argument("--genre")
+    decades.add_argument("--country")
+
+    search = commands.add_parser("search", help="Recherche plein texte dans les synopsis.")
+    search.add_argument("text")
+    search.add_argument("--limit", type=int, default=20)
+
+    sql = commands.add_parser("sql", help="Requête SQL libre.")
+    sql.add_argument("query")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    with FilmIndex(args.db) as index:
+        started = time.perf_counter()
+        if args.command == "ingest":
+            upserted, skipped = index.ingest_jsonl(args.jsonl)
+            print(f"✅ {upserted} films ingérés dans {args.db} ({skipped} lignes ignorées) "
+                  f"en {time.perf_counter() - started:.1f} s.")
+            return
+        if args.command == "director":
+            columns, rows = index.films_by_person(args.name, "directors")
+        elif args.command == "actor":
+            columns, rows = index.films_by_person(args.name, "cast")
+        elif args.command == "decades":
+            columns, rows = index.decade_ratings(args.genre, args.country)
+        elif args.command == "search":
+            columns, rows = index.search_synopsis(args.text, args.limit)
+        else:
+            columns, rows = index.query(args.query)
+        print_table(columns, rows, time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    main()
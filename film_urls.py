@@ -0,0 +1,59 @@
+import re
+from typing import Optional
+from urllib.parse import urlsplit, urlunsplit
+
+# ====================================================================
+#                       NORMALISATION DES URLS DE FILMS
+# ====================================================================
+
+LETTERBOXD_HOST = "letterboxd.com"
+# Slug d'un film dans n'importe quel chemin Letterboxd :
+# /film/<slug>/, /film/<slug>/reviews/, /<membre>/film/<slug>/...
+FILM_SLUG_RE = re.compile(r"/film/([^/?#\s]+)")
+
+
+def normalize_film_url(url: str) -> str:
+    """
+    Forme normalisée d'une URL (https, hôte en minuscules, sans query ni
+    fragment, avec slash final) pour que deux écritures de la même page
+    partagent la même clé.
+    """
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    path = parts.path or "/"
+    if not path.endswith("/"):
+        path += "/"
+    return urlunsplit(("https", host, path, "", ""))
+
+
+def canonical_film_url(url: str) -> Optional[str]:
+    """
+    URL canonique `https://letterboxd.com/film/<slug>/` de la page d'un film,
+    quelle que soit la variante découverte (http, www, sans slash final,
+    sous-page /reviews/, /members/..., activité d'un membre, lien relatif).
+    Retourne None si l'URL ne désigne pas un film Letterboxd.
+    """
+    url = url.strip()
+    if url.startswith("/"):
+        url = f"https://{LETTERBOXD_HOST}{url}"
+    parts = urlsplit(url)
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if host != LETTERBOXD_HOST:
+        return None
+    match = FILM_SLUG_RE.search(parts.path)
+    if match is None:
+        return None
+    return f"https://{LETTERBOXD_HOST}/film/{match.group(1).lower()}/"
+
+
+def rebase_url(url: str, base_url: Optional[str]) -> str:
+    """Remplace schéma et hôte de `url` par ceux de `base_url` (serveur de test)."""
+    if not base_url:
+        return url
+    base = urlsplit(base_url)
+    parts = urlsplit(url)
+    return urlunsplit((base.scheme, base.netloc, parts.path, parts.query, ""))
@@ -0,0 +1,254 @@
+import gzip
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterator, Optional, Tuple
+
+from film_urls import normalize_film_url
+
+try:
+    import zstandard
+except ImportError:  # zstd optionnel : gzip (bibliothèque standard) sinon
+    zstandard = None
+
+# ====================================================================
+#                   CACHE DISQUE DU HTML BRUT (COMPRESSÉ)
+# ====================================================================
+# Chaque page récupérée est conservée compressée, adressée par le hash de
+# son URL normalisée et rangée dans des sous-dossiers (ab/cd/<hash>.gz)
+# pour éviter les répertoires géants. Une petite base SQLite garde les
+# métadonnées (URL, date de récupération, tailles, dernier accès) et sert
+# à l'éviction LRU quand le budget disque est dépassé. Les derniers accès
+# sont écrits par lots (pas une transaction par lecture), et `put` peut
+# tourner dans un thread pendant que la boucle asyncio lit le cache.
+
+CODEC_GZIP = "gzip"
+CODEC_ZSTD = "zstd"
+_EXTENSIONS = {CODEC_GZIP: ".html.gz", CODEC_ZSTD: ".html.zst"}
+
+
+def cache_key(url: str) -> str:
+    """Clé d'adressage : SHA-1 de l'URL normalisée."""
+    return hashlib.sha1(normalize_film_url(url).encode("utf-8")).hexdigest()
+
+
+def _compress(data: bytes, codec: str) -> bytes:
+    if codec == CODEC_ZSTD:
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+
+def _decompress(data: bytes, codec: str) -> bytes:
+    if codec == CODEC_ZSTD:
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+class HtmlCache:
+    """Stockage compressé et partitionné du HTML brut, avec budget disque."""
+
+    def __init__(self, root: str, max_bytes: int, codec: Optional[str] = None,
+                 track_access: bool = True, access_batch: int = 256):
+        self.root = root
+        self.max_bytes = max_bytes
+        # track_access=False : lecteurs qui ne doivent rien écrire dans l'index
+        # (processus de ré-extraction, bancs d'essai)
+        self.track_access = track_access
+        self.access_batch = max(1, access_batch)
+        # Derniers accès en attente d'écriture (clé -> horodatage)
+        self._accessed: Dict[str, float] = {}
+        if codec is None:
+            codec = CODEC_ZSTD if zstandard is not None else CODEC_GZIP
+        if codec == CODEC_ZSTD and zstandard is None:
+            raise ImportError("Le codec zstd nécessite le paquet 'zstandard'.")
+        self.codec = codec
+        os.makedirs(root, exist_ok=True)
+        # Connexion partagée entre la boucle et le thread d'écriture (verrou)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(os.path.join(root, "index.sqlite"), timeout=60.0,
+                                     check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " key TEXT PRIMARY KEY,"
+            " url TEXT NOT NULL,"
+            " codec TEXT NOT NULL,"
+            " fetched_at REAL NOT NULL,"
+            " raw_size INTEGER NOT NULL,"
+            " stored_size INTEGER NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS pages_last_access ON pages (last_access)"
+        )
+        self._conn.commit()
+        self.total_bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(stored_size), 0) FROM pages"
+        ).fetchone()[0]
+
+    def _path(self, key: str, codec: str) -> str:
+        return os.path.join(self.root, key[:2], key[2:4], key + _EXTENSIONS[codec])
+
+    def get(self, url: str, max_age: Optional[float] = None) -> Optional[str]:
+        """Retourne le HTML en cache (ou None s'il est absent ou trop vieux)."""
+        key = cache_key(url)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT codec, fetched_at FROM pages WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        codec, fetched_at = row
+        if max_age is not None and time.time() - fetched_at > max_age:
+            return None
+        try:
+            with open(self._path(key, codec), "rb") as f:
+                html = _decompress(f.read(), codec).decode("utf-8")
+        except (FileNotFoundError, OSError, EOFError):
+            self._forget(key)
+            return None
+        if self.track_access:
+            with self._lock:
+                self._accessed[key] = time.time()
+                if len(self._accessed) >= self.access_batch:
+                    self.flush_access()
+        return html
+
+    def flush_access(self):
+        """Écrit en une transaction les derniers accès en attente."""
+        with self._lock:
+            if not self._accessed:
+                return
+            accessed, self._accessed = self._accessed, {}
+            self._conn.executemany(
+                "UPDATE pages SET last_access = ? WHERE key = ?",
+                [(timestamp, key) for key, timestamp in accessed.items()],
+            )
+            self._conn.commit()
+
+    def put(self, url: str, html: str, fetched_at: Optional[float] = None):
+        """
+        Ajoute (ou remplace) une page, puis applique le budget disque.
+        Compression et écriture bloquent : à appeler hors de la boucle
+        asyncio (`asyncio.to_thread`).
+        """
+        key = cache_key(url)
+        raw = html.encode("utf-8")
+        blob = _compress(raw, self.codec)
+        path = self._path(key, self.codec)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(blob)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            previous = self._conn.execute(
+                "SELECT codec, stored_size FROM pages WHERE key = ?", (key,)
+            ).fetchone()
+            if previous is not None:
+                self.total_bytes -= previous[1]
+                if previous[0] != self.codec:
+                    self._remove_file(key, previous[0])
+            now = time.time()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, normalize_film_url(url), self.codec,
+                 fetched_at if fetched_at is not None else now,
+                 len(raw), len(blob), now),
+            )
+            self._conn.commit()
+            self.total_bytes += len(blob)
+            if self.total_bytes > self.max_bytes:
+                self.enforce_budget()
+
+    def iter_urls(self) -> Iterator[Tuple[str, float]]:
+        """Parcourt les (URL, date de récupération) présentes dans le cache."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT url, fetched_at FROM pages ORDER BY url"
+            ).fetchall()
+        yield from rows
+
+    def enforce_budget(self, target_ratio: float = 0.9) -> int:
+        """Évince les pages les moins récemment utilisées jusqu'à ~90 % du budget."""
+        target = int(self.max_bytes * target_ratio)
+        evicted = 0
+        with self._lock:
+            # Ordre LRU à jour : les accès en attente d'abord
+            self.flush_access()
+            rows = self._conn.execute(
+                "SELECT key, codec, stored_size FROM pages ORDER BY last_access"
+            ).fetchall()
+            for key, codec, stored_size in rows:
+                if self.total_bytes <= target:
+                    break
+                self._remove_file(key, codec)
+                self._conn.execute("DELETE FROM pages WHERE key = ?", (key,))
+                self._accessed.pop(key, None)
+                self.total_bytes -= stored_size
+                evicted += 1
+            self._conn.commit()
+        return evicted
+
+    def compact(self, max_age: Optional[float] = None) -> Dict[str, int]:
+        """
+        Supprime les entrées expirées, les entrées dont le fichier a disparu
+        et les fichiers orphelins (écritures interrompues), puis applique le budget.
+        """
+        # Même verrou que `put`, qui peut tourner dans un thread
+        with self._lock:
+            stats = {"expired": 0, "missing": 0, "orphans": 0}
+            known = set()
+            now = time.time()
+            for key, codec, fetched_at in self._conn.execute(
+                    "SELECT key, codec, fetched_at FROM pages").fetchall():
+                path = self._path(key, codec)
+                if max_age is not None and now - fetched_at > max_age:
+                    self._remove_file(key, codec)
+                    self._forget(key, commit=False)
+                    stats["expired"] += 1
+                elif not os.path.exists(path):
+                    self._forget(key, commit=False)
+                    stats["missing"] += 1
+                else:
+                    known.add(path)
+            self._conn.commit()
+
+            for dirpath, _, filenames in os.walk(self.root):
+                for name in filenames:
+                    path = os.path.join(dirpath, name)
+                    if name.startswith("index.sqlite") or path in known:
+                        continue
+                    os.remove(path)
+                    stats["orphans"] += 1
+
+            self.total_bytes = self._conn.execute(
+                "SELECT COALESCE(SUM(stored_size), 0) FROM pages"
+            ).fetchone()[0]
+            stats["evicted"] = self.enforce_budget()
+        return stats
+
+    def _remove_file(self, key: str, codec: str):
+        try:
+            os.remove(self._path(key, codec))
+        except FileNotFoundError:
+            pass
+
+    def _forget(self, key: str, commit: bool = True):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT stored_size FROM pages WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                self.total_bytes -= row[0]
+                self._conn.execute("DELETE FROM pages WHERE key = ?", (key,))
+                if commit:
+                    self._conn.commit()
+
+    def close(self):
+        self.flush_access()
+        self._conn.close()
@@ -0,0 +1,129 @@
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import httpx
+
+from rate_controller import (OUTCOME_ERROR, OUTCOME_OK, OUTCOME_THROTTLED,
+                             RateController)
+
+# ====================================================================
+#             RÉCUPÉRATION À DEUX NIVEAUX (HTTP D'ABORD, NAVIGATEUR ENSUITE)
+# ====================================================================
+# Niveau 1 : client HTTP asynchrone partagé (keep-alive, HTTP/2, pool de
+# connexions), quelques millisecondes de CPU par page.
+# Niveau 2 : rendu complet dans le navigateur (crawl4ai), uniquement si la
+# page du niveau 1 ne contient pas les blocs lus par l'extracteur.
+
+# Marqueurs HTML indispensables à `extract_movie_data`
+REQUIRED_MARKERS = ("headline-1",)
+# Au moins un de ces blocs doit être présent (note moyenne ou statistiques)
+STATS_MARKERS = ("average-rating", "production-statistic")
+
+BROWSER_HEADERS = {
+    "User-Agent": ("Mozilla/5.0 (X11; Linux x86_64; rv:128.0) "
+                   "Gecko/20100101 Firefox/128.0"),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.5",
+}
+
+
+class BlockedPageError(ValueError):
+    """Réponse 429 ou HTML tronqué : le site limite probablement notre débit."""
+
+
+def is_page_complete(html: str) -> bool:
+    """Vrai si la page contient tout ce que l'extracteur lit (sinon : navigateur)."""
+    return (all(marker in html for marker in REQUIRED_MARKERS)
+            and any(marker in html for marker in STATS_MARKERS))
+
+
+def build_http_client(pool_size: int, timeout_s: float,
+                      http2: bool = True) -> httpx.AsyncClient:
+    """Client HTTP partagé par tous les workers (connexions réutilisées)."""
+    try:
+        return httpx.AsyncClient(
+            http2=http2,
+            headers=BROWSER_HEADERS,
+            follow_redirects=True,
+            timeout=httpx.Timeout(timeout_s),
+            limits=httpx.Limits(max_connections=pool_size,
+                                max_keepalive_connections=pool_size),
+        )
+    except ImportError:
+        # HTTP/2 nécessite le paquet 'h2' : repli en HTTP/1.1 keep-alive
+        return build_http_client(pool_size, timeout_s, http2=False)
+
+
+class TieredFetcher:
+    """Essaie le client HTTP, puis escalade vers le navigateur si nécessaire."""
+
+    def __init__(self, rate_controller: RateController,
+                 browser_fetch: Callable[[str], Awaitable[str]],
+                 http_client: Optional[httpx.AsyncClient] = None,
+                 min_html_length: int = 1000, metrics: Optional[Any] = None):
+        self.rate_controller = rate_controller
+        # Optionnel : objet avec observe(étape, secondes) et increment(compteur)
+        self.metrics = metrics
+        self.browser_fetch = browser_fetch
+        self.http_client = http_client
+        self.min_html_length = min_html_length
+        self.counters: Dict[str, int] = {"http": 0, "escalated": 0, "browser": 0}
+
+    async def _timed(self, url: str, request: Callable[[], Awaitable[Any]],
+                     stage: str) -> Any:
+        """Exécute une requête sous contrôle du débit et lui renvoie le résultat."""
+        waited = time.monotonic()
+        await self.rate_controller.acquire(url)
+        started = time.monotonic()
+        try:
+            result = await request()
+        except BlockedPageError:
+            self._record(url, stage, OUTCOME_THROTTLED, waited, started)
+            raise
+        except Exception:
+            self._record(url, stage, OUTCOME_ERROR, waited, started)
+            raise
+        self._record(url, stage, OUTCOME_OK, waited, started)
+        return result
+
+    def _record(self, url: str, stage: str, outcome: str, waited: float, started: float):
+        """Retour au contrôleur de débit, et aux métriques si elles sont branchées."""
+        latency = time.monotonic() - started
+        self.rate_controller.feedback(url, outcome, latency, stage)
+        if self.metrics is not None:
+            self.metrics.observe("rate_wait", started - waited)
+            self.metrics.observe(stage, latency)
+            if outcome != OUTCOME_OK:
+                self.metrics.increment(f"{stage}_{outcome}")
+
+    async def _http_get(self, url: str) -> Tuple[int, str]:
+        response = await self.http_client.get(url)
+        if response.status_code == 429:
+            raise BlockedPageError("HTTP 429 : trop de requêtes.")
+        html = response.text
+        # Une vraie 404 est renvoyée telle quelle (titre absent -> "not_found")
+        if response.status_code == 404:
+            return response.status_code, html
+        if response.status_code >= 500:
+            response.raise_for_status()
+        if len(html) < self.min_html_length:
+            raise BlockedPageError("Contenu HTML vide ou trop court. Erreur de page "
+                                   "ou blocage probable.")
+        return response.status_code, html
+
+    async def fetch(self, url: str) -> str:
+        """Retourne le HTML de `url` en utilisant le niveau le moins coûteux possible."""
+        if self.http_client is not None:
+            status, html = await self._timed(url, lambda: self._http_get(url), "fetch_http")
+            if status == 404 or is_page_complete(html):
+                # Page complète, ou vraie 404 : inutile d'escalader
+                self.counters["http"] += 1
+                return html
+            self.counters["escalated"] += 1
+        html = await self._timed(url, lambda: self.browser_fetch(url), "fetch_browser")
+        self.counters["browser"] += 1
+        return html
+
+    def describe(self) -> str:
+        return (f"HTTP {self.counters['http']} | navigateur {self.counters['browser']} "
+                f"(dont {self.counters['escalated']} escaladés)")
@@ -0,0 +1,135 @@
+import os
+import sqlite3
+from typing import Dict
+
+from file_offsets import iter_complete_lines
+from film_urls import canonical_film_url
+
+# ====================================================================
+#          DÉDOUBLONNAGE EN FLUX DES LIENS (ENSEMBLE PERSISTANT)
+# ====================================================================
+# Les liens découverts sont lus au fil de l'eau, ramenés à leur forme
+# canonique `/film/<slug>/` et comparés à un ensemble persistant (table
+# SQLite indexée) : la mémoire reste bornée quel que soit le nombre de
+# liens. Les nouveaux liens sont AJOUTÉS au fichier propre, qui n'est
+# jamais réécrit. L'index mémorise aussi jusqu'où le fichier brut a déjà
+# été lu : un nouveau passage ne traite que les liens ajoutés depuis.
+
+# Nombre de liens traités entre deux validations (fichier propre puis index).
+COMMIT_EVERY = 50_000
+
+
+class LinkDeduplicator:
+    """Ensemble persistant des URLs canoniques déjà présentes dans le fichier propre."""
+
+    def __init__(self, db_path: str, clean_path: str):
+        self.db_path = db_path
+        self.clean_path = clean_path
+        self._conn = sqlite3.connect(db_path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS seen_links (film_url TEXT PRIMARY KEY) WITHOUT ROWID"
+        )
+        # Positions déjà intégrées : fichier propre et fichier(s) brut(s)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS file_offsets ("
+            " path TEXT PRIMARY KEY,"
+            " offset INTEGER NOT NULL)"
+        )
+        self._conn.commit()
+
+    def _offset(self, path: str) -> int:
+        row = self._conn.execute("SELECT offset FROM file_offsets WHERE path = ?",
+                                 (os.path.abspath(path),)).fetchone()
+        return row[0] if row else 0
+
+    def _set_offset(self, path: str, offset: int):
+        self._conn.execute(
+            "INSERT INTO file_offsets (path, offset) VALUES (?, ?)"
+            " ON CONFLICT(path) DO UPDATE SET offset = excluded.offset",
+            (os.path.abspath(path), offset),
+        )
+
+    def _add(self, film_url: str) -> bool:
+        """Ajoute une URL à l'ensemble ; True si elle n'y était pas."""
+        cursor = self._conn.execute(
+            "INSERT OR IGNORE INTO seen_links (film_url) VALUES (?)", (film_url,)
+        )
+        return cursor.rowcount == 1
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM seen_links").fetchone()[0]
+
+    def sync_clean_file(self) -> int:
+        """
+        Aligne l'ensemble sur le fichier propre : intègre les lignes écrites
+        après la dernière validation (interruption, ajout à la main) et
+        repart de zéro si le fichier a été raccourci (réécrit à la main).
+        Retourne le nombre de lignes intégrées.
+        """
+        try:
+            size = os.path.getsize(self.clean_path)
+        except FileNotFoundError:
+            size = 0
+        offset = self._offset(self.clean_path)
+        if size < offset:
+            self._conn.execute("DELETE FROM seen_links")
+            offset = 0
+        if size == offset:
+            return 0
+        added = 0
+        for lines, (line, offset) in enumerate(iter_complete_lines(self.clean_path, offset), 1):
+            canonical = canonical_film_url(line) if line else None
+            if canonical is not None:
+                self._add(canonical)
+                added += 1
+            if lines % COMMIT_EVERY == 0:
+                self._set_offset(self.clean_path, offset)
+                self._conn.commit()
+        self._set_offset(self.clean_path, offset)
+        self._conn.commit()
+        return added
+
+    def merge(self, raw_path: str) -> Dict[str, int]:
+        """
+        Lit les nouveaux liens de `raw_path` et ajoute au fichier propre ceux
+        qui n'y sont pas encore. Le fichier propre est fsyncé AVANT la
+        validation de l'index : un lien marqué comme vu est toujours présent
+        dans le fichier (au pire, `sync_clean_file` rattrape l'index).
+        """
+        stats = {"read": 0, "invalid": 0, "duplicates": 0, "new": 0}
+        raw_offset = self._offset(raw_path)
+        if os.path.getsize(raw_path) < raw_offset:
+            raw_offset = 0  # fichier brut recréé : relecture complète
+        pending = 0
+        with open(self.clean_path, "ab") as clean:
+            for line, raw_offset in iter_complete_lines(raw_path, raw_offset):
+                if not line:
+                    continue
+                stats["read"] += 1
+                canonical = canonical_film_url(line)
+                if canonical is None:
+                    stats["invalid"] += 1
+                elif self._add(canonical):
+                    clean.write(canonical.encode("utf-8") + b"\n")
+                    stats["new"] += 1
+                else:
+                    stats["duplicates"] += 1
+                pending += 1
+                if pending >= COMMIT_EVERY:
+                    self._commit(clean, raw_path, raw_offset)
+                    pending = 0
+            self._commit(clean, raw_path, raw_offset)
+        return stats
+
+    def _commit(self, clean, raw_path: str, raw_offset: int):
+        clean.flush()
+        os.fsync(clean.fileno())
+        self._set_offset(raw_path, raw_offset)
+        self._set_offset(self.clean_path, clean.tell())
+        self._conn.commit()
+
+    def close(self):
+        self._conn.commit()
+        self._conn.close()
@@ -0,0 +1,185 @@
+# ---------------------------------------------------
+# Objectif : servir des pages Letterboxd sauvegardées depuis un serveur HTTP
+# local, pour tester le scraper sans envoyer une seule requête au vrai site.
+#
+# Usage :
+#   python3 mock_letterboxd_server.py --pages pages/ --port 8765
+#   python3 mock_letterboxd_server.py --cache-dir html_cache --limit 500
+#   python3 scraperletterboxd.py --base-url http://127.0.0.1:8765
+#
+# Latence, erreurs 500 et réponses 429 simulées :
+#   python3 mock_letterboxd_server.py --pages pages/ --latency-ms 150 \
+#       --jitter-ms 50 --error-rate 0.02 --throttle-rate 0.01
+# ---------------------------------------------------
+
+import argparse
+import glob
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+from film_urls import normalize_film_url
+from html_cache import HtmlCache
+
+# Page 404 volontairement longue (> 1000 caractères), comme celle du vrai site
+NOT_FOUND_HTML = ("<!DOCTYPE html><html><head><title>Letterboxd - Not Found</title>"
+                  "</head><body><section class=\"error\"><h1>Sorry, we can’t find "
+                  "the page you’ve requested.</h1>" + "<!-- padding -->" * 80 +
+                  "</section></body></html>")
+
+
+def load_pages_dir(pages_dir: str) -> Dict[str, str]:
+    """Fichiers `<slug>.html` d'un dossier -> {"/film/<slug>/": html}."""
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(pages_dir, "*.html"))):
+        slug = os.path.splitext(os.path.basename(path))[0]
+        with open(path, "r", encoding="utf-8") as f:
+            pages[f"/film/{slug}/"] = f.read()
+    return pages
+
+
+def load_pages_cache(cache_dir: str, limit: int) -> Dict[str, str]:
+    """Pages du cache HTML du scraper -> {chemin: html}."""
+    pages = {}
+    cache = HtmlCache(cache_dir, max_bytes=2 ** 62, track_access=False)
+    try:
+        for url, _ in cache.iter_urls():
+            if len(pages) >= limit:
+                break
+            html = cache.get(url)
+            if html is not None:
+                pages[urlsplit(url).path] = html
+    finally:
+        cache.close()
+    return pages
+
+
+class MockLetterboxdServer:
+    """
+    Serveur HTTP local qui sert un dictionnaire {chemin: html}, avec une
+    latence (fixe + aléatoire) et des taux d'erreurs 500 / 429 réglables.
+    """
+
+    def __init__(self, pages: Dict[str, str], host: str = "127.0.0.1", port: int = 0,
+                 latency_s: float = 0.0, jitter_s: float = 0.0,
+                 error_rate: float = 0.0, throttle_rate: float = 0.0,
+                 seed: Optional[int] = None):
+        self.pages = pages
+        self.request_count = 0
+        self.latency_s = latency_s
+        self.jitter_s = jitter_s
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        # Réponses servies par code HTTP (200, 404, 429, 500)
+        self.status_counts: Dict[int, int] = {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, comme le vrai site
+
+            def do_GET(self):
+                with server._lock:
+                    server.request_count += 1
+                    delay = server.latency_s + server._random.uniform(0, server.jitter_s)
+                    roll = server._random.random()
+                if delay > 0:
+                    time.sleep(delay)  # un thread par requête : pas de blocage global
+                if roll < server.throttle_rate:
+                    self._send(429, "Too Many Requests")
+                    return
+                if roll < server.throttle_rate + server.error_rate:
+                    self._send(500, "Internal Server Error")
+                    return
+                path = urlsplit(normalize_film_url("http://x" + self.path)).path
+                html = server.pages.get(path)
+                status = 200 if html is not None else 404
+                self._send(status, html if html is not None else NOT_FOUND_HTML)
+
+            def _send(self, status: int, html: str):
+                with server._lock:
+                    server.status_counts[status] = server.status_counts.get(status, 0) + 1
+                body = html.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # pas de log par requête
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockLetterboxdServer":
+        """Démarre le serveur dans un thread d'arrière-plan."""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "MockLetterboxdServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serveur local qui imite letterboxd.com à partir de pages sauvegardées.")
+    parser.add_argument("--pages", help="Dossier de pages <slug>.html.")
+    parser.add_argument("--cache-dir", help="Cache HTML du scraper (html_cache).")
+    parser.add_argument("--limit", type=int, default=1000,
+                        help="Nombre maximal de pages chargées depuis le cache.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0.0,
+                        help="Latence fixe ajoutée à chaque réponse.")
+    parser.add_argument("--jitter-ms", type=float, default=0.0,
+                        help="Latence aléatoire supplémentaire (0 à N ms).")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="Proportion de réponses 500.")
+    parser.add_argument("--throttle-rate", type=float, default=0.0,
+                        help="Proportion de réponses 429.")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.pages:
+        pages = load_pages_dir(args.pages)
+    elif args.cache_dir:
+        pages = load_pages_cache(args.cache_dir, args.limit)
+    else:
+        parser.error("--pages ou --cache-dir est requis.")
+
+    server = MockLetterboxdServer(pages, args.host, args.port,
+                                  latency_s=args.latency_ms / 1000,
+                                  jitter_s=args.jitter_ms / 1000,
+                                  error_rate=args.error_rate,
+                                  throttle_rate=args.throttle_rate, seed=args.seed)
+    print(f"🧪 {len(pages)} pages servies sur {server.base_url} (Ctrl-C pour arrêter)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
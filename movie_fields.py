@@ -0,0 +1,137 @@
+import re
+import sys
+from typing import (Any, Callable, Collection, Dict, FrozenSet, Iterable, List,
+                    Optional)
+
+# ====================================================================
+#                CHAMPS D'UN FILM (COMMUNS AUX EXTRACTEURS)
+# ====================================================================
+
+
+def default_movie_data(url: str) -> Dict[str, Any]:
+    """Retourne un enregistrement de film avec **TOUTES** les clés, dans l'ordre du CSV."""
+    return {
+        "film_url": url, "film_name": "", "release_year": None,
+        "duration_min": None, "main_language": "", "spoken_languages": "",
+        "genres": "", "first_genre": "", "themes": "", "synopsis": "",
+        "directors": "", "cast": "", "first_actor": "", "studios": "",
+        "origin_countries": "", "release_type": "", "premiere_festival": "",
+        "where_to_watch": "", "avg_rating": 0.0, "ratings_count": 0,
+        "views_count": 0, "lists_count": 0, "likes_count": 0,
+        "fans_count": 0, "is_top_250_ranked": False
+    }
+
+
+# --- Projection : n'extraire que certains champs ---
+
+# Toujours présents dans un enregistrement projeté (clé + test de succès)
+ALWAYS_EXTRACTED = ("film_url", "film_name")
+# Statistiques suivies par les passes de rafraîchissement
+STATS_FIELDS = ("avg_rating", "ratings_count", "views_count", "likes_count", "fans_count")
+
+
+def resolve_fields(fields: Optional[Iterable[str]]) -> Optional[FrozenSet[str]]:
+    """
+    Valide une liste de champs demandés (None = tous les champs). Lève
+    ValueError pour un nom inconnu.
+    """
+    if fields is None:
+        return None
+    known = default_movie_data("")
+    unknown = sorted(set(fields) - set(known))
+    if unknown:
+        raise ValueError(f"Champs inconnus : {', '.join(unknown)}. "
+                         f"Champs disponibles : {', '.join(known)}.")
+    return frozenset(fields)
+
+
+def wants(fields: Optional[Collection[str]], *names: str) -> bool:
+    """Vrai si l'un des champs `names` est demandé (ou si tous le sont)."""
+    return fields is None or any(name in fields for name in names)
+
+
+def projected_keys(fields: Optional[Collection[str]]) -> List[str]:
+    """Colonnes d'un enregistrement projeté, dans l'ordre du CSV."""
+    return [key for key in default_movie_data("")
+            if fields is None or key in ALWAYS_EXTRACTED or key in fields]
+
+
+def project_record(data: Dict[str, Any], fields: Optional[Collection[str]]) -> Dict[str, Any]:
+    """Ne garde que les champs demandés (plus l'URL et le titre)."""
+    if fields is None:
+        return data
+    return {key: data[key] for key in projected_keys(fields)}
+
+
+# Séparateur des champs à valeurs multiples dans le CSV et le JSON
+MULTI_VALUE_SEPARATOR = " | "
+# Champs à valeurs multiples (colonnes list<string> de l'export Parquet)
+LIST_FIELDS = (
+    "spoken_languages", "genres", "themes", "directors", "cast", "studios",
+    "origin_countries", "release_type", "premiere_festival", "where_to_watch",
+)
+
+
+# Champs catégoriels (peu de valeurs distinctes, répétées de film en film) :
+# leurs chaînes sont internées, une seule copie en mémoire par valeur.
+CATEGORICAL_FIELDS = (
+    "main_language", "spoken_languages", "genres", "first_genre",
+    "origin_countries", "release_type", "where_to_watch",
+)
+
+
+def intern_categorical(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Remplace (sur place) les valeurs catégorielles par leur version internée."""
+    for field in CATEGORICAL_FIELDS:
+        value = record.get(field)
+        if isinstance(value, str):
+            record[field] = sys.intern(value)
+    return record
+
+
+def split_multi_value(value: Optional[str]) -> List[str]:
+    """'Drama | Thriller' -> ['Drama', 'Thriller'] (liste vide si absent)."""
+    if not value:
+        return []
+    return [item for item in value.split(MULTI_VALUE_SEPARATOR) if item]
+
+
+# Nom de film des anciennes lignes d'erreur (exports antérieurs aux relances)
+ERROR_FILM_NAME = "ERROR_NETWORK/PAGE"
+
+
+def is_error_record(record: Dict[str, Any]) -> bool:
+    """Vrai pour une ligne d'erreur (titre vide ou ancien marqueur d'erreur)."""
+    film_name = record.get("film_name")
+    return not film_name or film_name == ERROR_FILM_NAME
+
+
+def safe_extract(func: Callable[[], Any], default: Any = None) -> Any:
+    """Tente d'exécuter une fonction d'extraction et retourne une valeur par défaut."""
+    try:
+        return func()
+    except (AttributeError, IndexError, ValueError, TypeError,
+            re.error, KeyError, StopIteration):
+        return default
+
+
+def parse_count(text: str) -> int:
+    """Convertit une chaîne (ex: '521,151' ou '5.2K') en un entier."""
+    if not text:
+        return 0
+    text = text.replace(",", "").strip().upper()
+    match = re.search(r"(\d*\.?\d+)\s*(K|M)?", text)
+    if not match:
+        return 0
+    value_str = match.group(1)
+    suffix = match.group(2)
+    try:
+        value = float(value_str)
+    except ValueError:
+        return 0
+    multiplier = 1
+    if suffix == "K":
+        multiplier = 1_000
+    elif suffix == "M":
+        multiplier = 1_000_000
+    return int(value * multiplier)
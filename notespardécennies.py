@@ -1,13 +1,18 @@
+import csv
+import os
+
 import pandas as pd
 import matplotlib.pyplot as plt
-import seaborn as sns
+
+from decade_stats import DecadeAggregateState
+from film_dimensions import FILM_DIMENSIONS_PATH, FilmDimensions
 
 # ===================================================================
 # 💡 ÉTAPE 1 : Configuration
 # ===================================================================
 
 # 1. Nom exact du fichier CSV
-NOM_FICHIER_CSV = 'movies_data_PROGRESSIVE.csv' 
+NOM_FICHIER_CSV = 'movies_data_PROGRESSIVE.csv'
 
 # 2. Nom EXACT de la colonne contenant l'année de sortie
 NOM_COLONNE_ANNEE = 'release_year'  # Exemple. Si c'est 'Annee_Sortie', mettez 'Annee_Sortie'
@@ -15,19 +20,85 @@ NOM_COLONNE_ANNEE = 'release_year'  # Exemple. Si c'est 'Annee_Sortie', mettez '
 # 3. Nom EXACT de la colonne contenant la note du film
 NOM_COLONNE_NOTE = 'avg_rating'  # Exemple. Si c'est 'Note_Globale', mettez 'Note_Globale'
 
+# 4. Colonne du titre (sert uniquement à écarter les lignes d'erreur)
+NOM_COLONNE_TITRE = 'film_name'
+TITRE_ERREUR = 'ERROR_NETWORK/PAGE'
+
+# 5. Nombre de lignes lues à la fois (mémoire bornée, même pour des millions de films)
+TAILLE_BLOC = 100_000
+
+# 6. Agrégats par décennie déjà calculés (seules les nouvelles lignes du CSV sont lues)
+FICHIER_ETAT = 'notes_par_decennie_etat.json'
+
+# 7. Export JSONL du scraper, source des tables de dimensions (genre, pays...)
+NOM_FICHIER_JSONL = 'movies_data_PROGRESSIVE.jsonl'
+
+# 8. Nombre de genres affichés dans le tableau genre × décennie
+NOMBRE_GENRES = 10
+
 # ===================================================================
 
-# Chargement du fichier
+# Seules les 3 colonnes utiles sont lues (pas de synopsis ni de casting),
+# avec des types explicites : pandas n'a rien à deviner.
+COLONNES = [NOM_COLONNE_TITRE, NOM_COLONNE_ANNEE, NOM_COLONNE_NOTE]
+TYPES = {NOM_COLONNE_TITRE: 'string', NOM_COLONNE_ANNEE: 'float32',
+         NOM_COLONNE_NOTE: 'float32'}
+
+
+def preparer_bloc(bloc: pd.DataFrame) -> pd.DataFrame:
+    """Écarte les lignes inutilisables et calcule la décennie (entier, ex: 1990)."""
+    valide = (
+        (bloc[NOM_COLONNE_TITRE].fillna('') != TITRE_ERREUR)
+        & bloc[NOM_COLONNE_ANNEE].notna()
+        & bloc[NOM_COLONNE_NOTE].notna()
+        & (bloc[NOM_COLONNE_NOTE] != 0.0)  # note absente enregistrée à 0.0
+    )
+    bloc = bloc[valide]
+    # La double barre // est l'opérateur de division entière
+    return pd.DataFrame({
+        'decade': ((bloc[NOM_COLONNE_ANNEE] // 10) * 10).astype('int16'),
+        NOM_COLONNE_NOTE: bloc[NOM_COLONNE_NOTE],
+    })
+
+
+# Chargement des seules lignes ajoutées depuis la dernière analyse
+etat = DecadeAggregateState.load(FICHIER_ETAT)
 try:
-    df = pd.read_csv(NOM_FICHIER_CSV)
-    print(f"✅ Fichier CSV '{NOM_FICHIER_CSV}' chargé avec succès !")
-    
-    # Vérification des colonnes
-    if NOM_COLONNE_ANNEE not in df.columns or NOM_COLONNE_NOTE not in df.columns:
-        print("❌ ERREUR : Les noms de colonnes (Année ou Note) sont incorrects.")
-        print("Vérifiez la casse et l'orthographe dans les variables ci-dessus.")
-        print(f"Colonnes disponibles dans le CSV: {list(df.columns)}")
-        exit()
+    taille_csv = os.path.getsize(NOM_FICHIER_CSV)
+    depart = etat.resume_offset(NOM_FICHIER_CSV)
+    if depart is None:
+        # Première analyse, ou CSV réécrit : tout est recalculé
+        etat.reset()
+
+    with open(NOM_FICHIER_CSV, 'rb') as f:
+        entete = next(csv.reader([f.readline().decode('utf-8')]))
+        # Vérification des colonnes
+        if any(colonne not in entete for colonne in COLONNES):
+            print("❌ ERREUR : Les noms de colonnes (Année ou Note) sont incorrects.")
+            print("Vérifiez la casse et l'orthographe dans les variables ci-dessus.")
+            print(f"Colonnes disponibles dans le CSV: {entete}")
+            exit()
+        if depart is not None:
+            f.seek(depart)
+
+        lignes_lues = 0
+        if f.tell() < taille_csv:
+            lecteur = pd.read_csv(f, header=None, names=entete, usecols=COLONNES,
+                                  dtype=TYPES, chunksize=TAILLE_BLOC, encoding='utf-8')
+            for bloc in lecteur:
+                lignes_lues += len(bloc)
+                bloc = preparer_bloc(bloc)
+                for decennie, notes in bloc.groupby('decade')[NOM_COLONNE_NOTE]:
+                    etat.add(decennie, notes.to_numpy())
+        etat.mark_read(NOM_FICHIER_CSV, f.tell(), lignes_lues)
+    etat.save()
+
+    if depart is None:
+        print(f"✅ Fichier CSV '{NOM_FICHIER_CSV}' chargé avec succès ! "
+              f"({lignes_lues} lignes lues)")
+    else:
+        print(f"✅ Fichier CSV '{NOM_FICHIER_CSV}' : {lignes_lues} nouvelles lignes "
+              f"intégrées ({etat.rows} au total, état dans '{FICHIER_ETAT}').")
 
 except FileNotFoundError:
     print(f"❌ ERREUR : Le fichier n'a pas été trouvé : {NOM_FICHIER_CSV}")
@@ -36,43 +107,45 @@ except FileNotFoundError:
 
 
 # ===================================================================
-# 💡 ÉTAPE 2 : Préparation des Données (Création de la Décennie)
+# 💡 ÉTAPE 2 : Préparation des Données (Décennie entière)
 # ===================================================================
 
-# Calcule la décennie (ex: 1997 devient '1990s')
-# La double barre // est l'opérateur de division entière
-df['decade'] = (df[NOM_COLONNE_ANNEE] // 10) * 10
-df['decade'] = df['decade'].astype(str) + 's' 
+if not etat.decades:
+    print("❌ ERREUR : Aucun film exploitable (année et note renseignées) dans le CSV.")
+    exit()
 
-# Trie par décennie pour un affichage propre sur le Box Plot
-df = df.sort_values(by='decade')
+# Décennies triées numériquement (1920 < 1990 < 2000), libellées '1990s' à l'affichage
+decennies = sorted(etat.decades)
+films_retenus = sum(sketch.count for sketch in etat.decades.values())
 
-print("\nPréparation des données terminée. Colonne 'decade' créée.")
+print(f"\nPréparation des données terminée. {films_retenus} films retenus "
+      f"dans {len(decennies)} décennies.")
 
 
 # ===================================================================
 # 💡 ÉTAPE 3 : Création et Sauvegarde du Box Plot
 # ===================================================================
 
-plt.figure(figsize=(14, 7))
+fig, ax = plt.subplots(figsize=(14, 7))
 
-# Box Plot (Boîte à moustaches) avec Seaborn
-# x=Décennie, y=Note. showmeans=True pour la moyenne
-sns.boxplot(x='decade', y=NOM_COLONNE_NOTE, data=df,
-            showmeans=True,  
-            meanprops={"marker":"D", "markerfacecolor": "red", "markeredgecolor":"black", "markersize": "8"}, 
-            medianprops={"color":"blue", "linewidth": 2} 
-           ) 
+# Box Plot (Boîte à moustaches) tracé directement depuis les agrégats :
+# quartiles, moustaches (1.5 × IQR) et moyenne, sans relire les films.
+ax.bxp([etat.decades[d].box_stats(f"{d}s") for d in decennies],
+       showmeans=True, showfliers=False, patch_artist=True,
+       boxprops={"facecolor": "#8fb3d9"},
+       meanprops={"marker":"D", "markerfacecolor": "red", "markeredgecolor":"black", "markersize": "8"},
+       medianprops={"color":"blue", "linewidth": 2}
+      )
 
 plt.title('Distribution des Notes de Films par Décennie', fontsize=18)
 plt.xlabel('Décennie de Sortie', fontsize=14)
 plt.ylabel(f'Note du Film ({NOM_COLONNE_NOTE})', fontsize=14)
-plt.xticks(rotation=45) 
+plt.xticks(rotation=45)
 plt.grid(axis='y', linestyle='--')
 
 # Sauvegarde de l'image
-plt.tight_layout() 
-plt.savefig('box_plot_notes_par_decennie.png') 
+plt.tight_layout()
+plt.savefig('box_plot_notes_par_decennie.png')
 print("\n✅ Graphique Box Plot créé et sauvegardé sous 'box_plot_notes_par_decennie.png'.")
 
 
@@ -80,8 +153,11 @@ print("\n✅ Graphique Box Plot créé et sauvegardé sous 'box_plot_notes_par_d
 # 💡 ÉTAPE 4 : Réponse Finale Numérique
 # ===================================================================
 
-# Calcule la note moyenne par décennie et trie du meilleur au moins bon
-moyennes_decennie = df.groupby('decade')[NOM_COLONNE_NOTE].mean().sort_values(ascending=False)
+# Note moyenne par décennie (somme / nombre), du meilleur au moins bon
+moyennes_decennie = pd.Series(
+    {f"{d}s": etat.decades[d].mean for d in decennies}, name=NOM_COLONNE_NOTE
+).sort_values(ascending=False)
+moyennes_decennie.index.name = 'decade'
 
 print("\n============================================================")
 print("Classement des Décennies par Note Moyenne :")
@@ -94,3 +170,24 @@ meilleure_note = moyennes_decennie.iloc[0]
 
 print(f"\n🏆 **RÉPONSE FINALE :** La décennie qui a produit les films les mieux notés (selon la moyenne) est la **{meilleure_decennie}** avec une note moyenne de **{meilleure_note:.2f}**.")
 print("============================================================")
+
+
+# ===================================================================
+# 💡 ÉTAPE 5 : Notes par Genre et par Décennie (tables de dimensions)
+# ===================================================================
+
+# Genres déjà découpés et codés en entiers (film_dimensions.npz) : le
+# tableau croisé ne redécoupe aucune chaîne " | ".
+if os.path.exists(NOM_FICHIER_JSONL):
+    dimensions, _ = FilmDimensions.load_or_build(NOM_FICHIER_JSONL, FILM_DIMENSIONS_PATH)
+    par_genre = dimensions.group_by('genres')
+    genres_principaux = par_genre.nlargest(NOMBRE_GENRES, 'films')['genres']
+    tableau = dimensions.crosstab('genres', 'decade', value='weighted_mean')
+    tableau = tableau.reindex(genres_principaux)
+    tableau.columns = [f"{d}s" for d in tableau.columns]
+
+    print(f"\nNote moyenne (pondérée par le nombre de notes) des {NOMBRE_GENRES} genres "
+          f"les plus fréquents, par décennie :")
+    print(tableau.round(2).to_string())
+else:
+    print(f"\nℹ️ '{NOM_FICHIER_JSONL}' introuvable : tableau genre × décennie ignoré.")
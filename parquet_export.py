@@ -0,0 +1,153 @@
+import argparse
+import os
+import sys
+from typing import Any, Dict, Iterable, List
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # export Parquet optionnel (pip install pyarrow)
+    pa = None
+    pq = None
+
+from export_sink import iter_final_records
+from movie_fields import (CATEGORICAL_FIELDS, LIST_FIELDS, default_movie_data,
+                          split_multi_value)
+
+# ====================================================================
+#                 EXPORT COLONNAIRE TYPÉ (PARQUET / ARROW)
+# ====================================================================
+# Schéma fixe déduit des clés de `default_movie_data` : compteurs entiers,
+# note en flottant, booléen du top 250 et vraies colonnes list<string>
+# pour les champs à valeurs multiples (plus de " | " à redécouper).
+# Le fichier est écrit par groupes de lignes (row groups) en streaming.
+
+PARQUET_ROW_GROUP_SIZE = 5000
+PARQUET_COMPRESSION = "zstd"
+
+
+def parquet_available() -> bool:
+    return pa is not None
+
+
+def _arrow_type(field: str, default: Any) -> "pa.DataType":
+    """Type Arrow d'un champ, d'après sa valeur par défaut."""
+    if field in LIST_FIELDS:
+        return pa.list_(pa.string())
+    if isinstance(default, bool):
+        return pa.bool_()
+    if isinstance(default, int):
+        return pa.int64()
+    if isinstance(default, float):
+        return pa.float64()
+    if default is None:
+        # release_year, duration_min : entiers éventuellement absents
+        return pa.int32()
+    return pa.string()
+
+
+def movie_schema() -> "pa.Schema":
+    """Schéma Arrow du jeu de données, dans l'ordre des colonnes du CSV."""
+    if pa is None:
+        raise ImportError("L'export Parquet nécessite 'pyarrow' (pip install pyarrow).")
+    return pa.schema([(field, _arrow_type(field, default))
+                      for field, default in default_movie_data("").items()])
+
+
+def _convert(value: Any, arrow_type: "pa.DataType", categorical: bool = False) -> Any:
+    """
+    Valeur du JSONL -> valeur Python compatible avec la colonne Arrow.
+    Les valeurs catégorielles sont internées : un row group en attente ne
+    garde qu'une copie de chaque genre, pays ou langue.
+    """
+    if pa.types.is_list(arrow_type):
+        items = split_multi_value(value)
+        return [sys.intern(item) for item in items] if categorical else items
+    if categorical and isinstance(value, str):
+        return sys.intern(value)
+    if value is None or value == "":
+        return None if not pa.types.is_string(arrow_type) else ""
+    if pa.types.is_boolean(arrow_type):
+        return bool(value)
+    if pa.types.is_integer(arrow_type):
+        return int(value)
+    if pa.types.is_floating(arrow_type):
+        return float(value)
+    return str(value)
+
+
+class ParquetExportSink:
+    """Écrit les films dans un fichier Parquet, un row group toutes les N lignes."""
+
+    def __init__(self, path: str, row_group_size: int = PARQUET_ROW_GROUP_SIZE):
+        self.schema = movie_schema()
+        self.path = path
+        self.row_group_size = max(1, row_group_size)
+        self.rows = 0
+        # Fichier temporaire : un Parquet n'est lisible qu'une fois son pied écrit
+        self._tmp_path = path + ".tmp"
+        self._writer = pq.ParquetWriter(self._tmp_path, self.schema,
+                                        compression=PARQUET_COMPRESSION)
+        self._columns: Dict[str, List[Any]] = {name: [] for name in self.schema.names}
+        self._buffered = 0
+
+    def write(self, record: Dict[str, Any]):
+        for field in self.schema:
+            self._columns[field.name].append(_convert(record.get(field.name), field.type,
+                                                      field.name in CATEGORICAL_FIELDS))
+        self._buffered += 1
+        if self._buffered >= self.row_group_size:
+            self._flush_row_group()
+
+    def _flush_row_group(self):
+        if not self._buffered:
+            return
+        table = pa.Table.from_pydict(self._columns, schema=self.schema)
+        self._writer.write_table(table)
+        self.rows += self._buffered
+        self._columns = {name: [] for name in self.schema.names}
+        self._buffered = 0
+
+    def close(self):
+        """Dernier row group, pied de fichier, puis remplacement atomique."""
+        self._flush_row_group()
+        self._writer.close()
+        os.replace(self._tmp_path, self.path)
+
+    def __enter__(self) -> "ParquetExportSink":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            # Écriture interrompue : on garde l'ancien fichier intact
+            self._writer.close()
+            os.remove(self._tmp_path)
+
+
+def write_parquet(records: Iterable[Dict[str, Any]], path: str,
+                  row_group_size: int = PARQUET_ROW_GROUP_SIZE) -> int:
+    """Écrit un flux d'enregistrements en Parquet (mémoire bornée par row group)."""
+    with ParquetExportSink(path, row_group_size) as sink:
+        for record in records:
+            sink.write(record)
+    return sink.rows
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Convertit l'export JSONL du scraper en Parquet typé.")
+    parser.add_argument("--jsonl", default="movies_data_PROGRESSIVE.jsonl",
+                        help="Export JSONL source (défaut : %(default)s).")
+    parser.add_argument("--output", default="movies_data_PROGRESSIVE.parquet",
+                        help="Fichier Parquet produit (défaut : %(default)s).")
+    parser.add_argument("--row-group-size", type=int, default=PARQUET_ROW_GROUP_SIZE)
+    args = parser.parse_args()
+
+    rows = write_parquet(iter_final_records(args.jsonl), args.output, args.row_group_size)
+    print(f"✅ {rows} films écrits dans {args.output}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+import asyncio
+import random
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+# ====================================================================
+#                   CONTRÔLE DU DÉBIT (PARTAGÉ PAR LES WORKERS)
+# ====================================================================
+# Tous les workers appellent `acquire(url)` avant chaque requête puis
+# `feedback(url, outcome, latency, stage)` après. Le contrôleur adaptatif
+# (seau à jetons + AIMD) accélère tant que les réponses sont saines et
+# ralentit dès qu'il voit des 429, du HTML tronqué ou une latence en hausse.
+# La latence est suivie par étape (`fetch_http`, `fetch_browser`) : un rendu
+# navigateur, bien plus lent, ne doit pas passer pour un site qui ralentit.
+
+OUTCOME_OK = "ok"
+# 429, HTML trop court : le site nous freine.
+OUTCOME_THROTTLED = "throttled"
+# Timeout, erreur réseau : pas d'accélération, pas de pénalité forte.
+OUTCOME_ERROR = "error"
+
+
+class RateController:
+    """Interface commune des contrôleurs de débit."""
+
+    async def acquire(self, url: str):
+        """Attend l'autorisation d'envoyer une requête vers `url`."""
+        raise NotImplementedError
+
+    def feedback(self, url: str, outcome: str, latency: float, stage: str = ""):
+        """Signale le résultat d'une requête (voir les constantes OUTCOME_*)."""
+
+    @property
+    def current_rate(self) -> float:
+        """Débit global actuel, en requêtes par seconde."""
+        raise NotImplementedError
+
+    def describe(self) -> str:
+        return f"{self.current_rate:.2f} req/s"
+
+
+class FixedPauseRateController(RateController):
+    """Ancien comportement : pause aléatoire fixe avant chaque requête d'un worker."""
+
+    def __init__(self, pause_min: float, pause_max: float):
+        self.pause_min = pause_min
+        self.pause_max = pause_max
+
+    async def acquire(self, url: str):
+        await asyncio.sleep(random.uniform(self.pause_min, self.pause_max))
+
+    @property
+    def current_rate(self) -> float:
+        return 2.0 / (self.pause_min + self.pause_max)
+
+    def describe(self) -> str:
+        return f"pause fixe {self.pause_min:.0f}–{self.pause_max:.0f} s par worker"
+
+
+class _TokenBucket:
+    """Seau à jetons : chaque réservation consomme un jeton, quitte à attendre."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.last = time.monotonic()
+
+    def reserve(self, now: float) -> float:
+        """Réserve un jeton et retourne le temps d'attente nécessaire (s)."""
+        self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+        self.tokens -= 1.0
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+
+class AdaptiveRateController(RateController):
+    """
+    Seau à jetons global dont le débit suit une loi AIMD (augmentation
+    additive, diminution multiplicative), plafonné globalement et par hôte.
+    """
+
+    def __init__(self, initial_rate: float, min_rate: float, max_rate: float,
+                 per_host_max: Optional[Dict[str, float]] = None,
+                 increase_step: float = 0.05, decrease_factor: float = 0.5,
+                 latency_factor: float = 2.0, cooldown: float = 10.0,
+                 burst: float = 1.0):
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.per_host_max = per_host_max or {}
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.latency_factor = latency_factor
+        self.cooldown = cooldown
+        self.burst = burst
+        self._rate = min(max(initial_rate, min_rate), max_rate)
+        self._bucket = _TokenBucket(self._rate, burst)
+        self._host_buckets: Dict[str, _TokenBucket] = {}
+        # Moyenne mobile et référence de latence, par étape de récupération
+        self._latency_ewma: Dict[str, float] = {}
+        self._latency_baseline: Dict[str, float] = {}
+        self._last_decrease = 0.0
+        self.throttle_events = 0
+
+    @property
+    def current_rate(self) -> float:
+        return self._rate
+
+    def host_rate(self, host: str) -> float:
+        """Débit effectif vers un hôte (débit global borné par son plafond)."""
+        return min(self._rate, self.per_host_max.get(host, self.max_rate))
+
+    def _host_bucket(self, host: str) -> _TokenBucket:
+        bucket = self._host_buckets.get(host)
+        if bucket is None:
+            bucket = _TokenBucket(self.host_rate(host), self.burst)
+            self._host_buckets[host] = bucket
+        return bucket
+
+    def _set_rate(self, rate: float):
+        self._rate = min(max(rate, self.min_rate), self.max_rate)
+        self._bucket.rate = self._rate
+        for host, bucket in self._host_buckets.items():
+            bucket.rate = self.host_rate(host)
+
+    async def acquire(self, url: str):
+        now = time.monotonic()
+        host = urlparse(url).netloc
+        wait = max(self._bucket.reserve(now), self._host_bucket(host).reserve(now))
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def _decrease(self):
+        now = time.monotonic()
+        # Une seule baisse par fenêtre : les requêtes déjà en vol
+        # ne doivent pas faire s'effondrer le débit.
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        self.throttle_events += 1
+        self._set_rate(self._rate * self.decrease_factor)
+
+    def feedback(self, url: str, outcome: str, latency: float, stage: str = ""):
+        if outcome == OUTCOME_THROTTLED:
+            self._decrease()
+            return
+        if outcome != OUTCOME_OK:
+            return
+
+        # Suivi de la latence (moyenne mobile) et de sa valeur de référence,
+        # chaque étape étant comparée à sa propre référence
+        ewma = self._latency_ewma.get(stage)
+        ewma = latency if ewma is None else 0.8 * ewma + 0.2 * latency
+        self._latency_ewma[stage] = ewma
+        # La référence suit le minimum observé, avec une lente dérive vers le
+        # haut pour s'adapter à un site durablement plus lent.
+        baseline = self._latency_baseline.get(stage)
+        baseline = ewma if baseline is None else min(ewma, baseline * 1.01)
+        self._latency_baseline[stage] = baseline
+
+        if ewma > self.latency_factor * baseline:
+            self._decrease()
+        else:
+            self._set_rate(self._rate + self.increase_step)
+
+    def describe(self) -> str:
+        return f"{self._rate:.2f} req/s (plafond {self.max_rate:.2f})"
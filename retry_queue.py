@@ -0,0 +1,105 @@
+import asyncio
+import json
+import random
+import time
+from typing import Dict, List, Optional
+
+# ====================================================================
+#            NOUVELLES TENTATIVES & FICHIER DES ÉCHECS DÉFINITIFS
+# ====================================================================
+# Les échecs transitoires (timeout, 429, HTML tronqué...) sont remis en
+# file après une attente exponentielle avec gigue, dans la limite d'un
+# budget de tentatives par URL. Les échecs définitifs (vraie 404, budget
+# épuisé) sont consignés avec leur raison dans un fichier JSONL à part,
+# au lieu de polluer le jeu de données avec des lignes d'erreur.
+
+
+class RetryPolicy:
+    """Attente exponentielle avec gigue et budget de tentatives par URL."""
+
+    def __init__(self, max_attempts: int = 4, base_delay: float = 30.0,
+                 max_delay: float = 600.0, jitter: float = 0.5):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+
+    def can_retry(self, attempt: int) -> bool:
+        """`attempt` = nombre de tentatives déjà effectuées pour l'URL."""
+        return attempt < self.max_attempts
+
+    def delay(self, attempt: int) -> float:
+        """Attente avant la tentative suivante (base × 2^(n-1), ± gigue)."""
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+
+class RetryScheduler:
+    """
+    Remet un lien dans la file de travail après son délai d'attente. Chaque
+    attente est une petite tâche asyncio : les workers restent libres.
+    """
+
+    def __init__(self, queue: asyncio.Queue, policy: RetryPolicy):
+        self.queue = queue
+        self.policy = policy
+        self._waiting: Dict[asyncio.Task, str] = {}
+
+    def schedule(self, link: str, attempt: int) -> float:
+        """Planifie la tentative `attempt + 1` de `link` et retourne le délai."""
+        delay = self.policy.delay(attempt)
+        task = asyncio.create_task(self._requeue(link, attempt + 1, delay))
+        self._waiting[task] = link
+        task.add_done_callback(self._waiting.pop)
+        return delay
+
+    @property
+    def waiting(self) -> int:
+        """Nombre de relances planifiées, pas encore remises dans la file."""
+        return len(self._waiting)
+
+    async def _requeue(self, link: str, attempt: int, delay: float):
+        await asyncio.sleep(delay)
+        await self.queue.put((link, attempt))
+
+    async def drain(self):
+        """Attend que la file soit vide ET qu'aucune relance ne soit en attente."""
+        while True:
+            await self.queue.join()
+            if not self._waiting:
+                return
+            await asyncio.wait(list(self._waiting))
+
+    async def cancel(self) -> List[str]:
+        """Annule les relances en attente et retourne les liens concernés."""
+        links = list(self._waiting.values())
+        tasks = list(self._waiting)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        return links
+
+
+class DeadLetterLog:
+    """Journal en ajout seul des films en échec définitif (une ligne JSON par échec)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8")
+
+    def record(self, film_url: str, status: str, reason: str, attempts: int):
+        entry = {"film_url": film_url, "status": status, "reason": reason,
+                 "attempts": attempts, "failed_at": time.time()}
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def describe_failure(error: Optional[BaseException]) -> str:
+    """Raison lisible d'un échec, pour le fichier des échecs."""
+    if error is None:
+        return "Titre manquant (404)"
+    message = str(error).splitlines()[0] if str(error) else ""
+    return f"{error.__class__.__name__}: {message}" if message else error.__class__.__name__
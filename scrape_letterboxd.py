@@ -2,110 +2,172 @@
 # Étape 1 : imports
 # ---------------------------------------------------
 
+import argparse
 import asyncio
+import time
+from typing import Awaitable, Callable, List, Optional, Set, Tuple
+
 from crawl4ai import AsyncWebCrawler
 from bs4 import BeautifulSoup
 
+from film_urls import rebase_url
+from http_fetcher import build_http_client
+
 
 # ---------------------------------------------------
-# Étape 2 : fonction pour récupérer le HTML rendu
+# Étape 2 : configuration
 # ---------------------------------------------------
 
-def crawl_get(url: str):
-    async def _run():
-        async with AsyncWebCrawler() as crawler:
-            result = await crawler.arun(url=url)
-            return result
-    return asyncio.run(_run())
+LINKS_FILE = "all_letterboxd_links.txt"
+POPULAR_PAGE_URL = "https://letterboxd.com/films/popular/page/{page}/"
+TOTAL_PAGES = 150
+# Nombre de films d'une page complète : une page plus courte est la
+# dernière de la liste, les pages suivantes ne sont pas demandées.
+FILMS_PER_PAGE = 72
+# Pages récupérées en même temps dans la même session de navigateur
+CONCURRENT_PAGES = 6
 
 
 # ---------------------------------------------------
-# # Étape 3 : Scraper les 150 premières pages
+# Étape 3 : extraction des liens d'une page "popular"
 # ---------------------------------------------------
 
-# TOTAL_PAGES = 150
-# FILMS_PER_PAGE = 72  # nombre attendu de films par page
-# all_links = []
-# page_counts = {}
-
-# for page in range(1, TOTAL_PAGES + 1):
-#     print(f"--- Page {page} ---")
-    
-#     # Récupère le HTML
-#     response = crawl_get(f"https://letterboxd.com/films/popular/page/{page}/")
-#     soup = BeautifulSoup(response.html, "html.parser")
-    
-#     # Trouve les films
-#     films = soup.find_all("li", class_="posteritem")
-#     page_counts[page] = len(films)
-#     print(f"Page {page}: {len(films)} films trouvés")
-    
-#     # Récupère les liens
-#     for film in films:
-#         a_tag = film.find("a", class_="frame")
-#         if a_tag and a_tag.get("href"):
-#             link = a_tag["href"]
-#         else:
-#             div_tag = film.find("div", class_="react-component")
-#             if div_tag and div_tag.get("data-target-link"):
-#                 link = div_tag["data-target-link"]
-#             else:
-#                 continue
-#         all_links.append("https://letterboxd.com" + link)
+def extract_film_links(html: str) -> List[str]:
+    """Retourne les URLs des films (li.posteritem) d'une page de liste."""
+    soup = BeautifulSoup(html, "html.parser")
+    links = []
+    for film in soup.find_all("li", class_="posteritem"):
+        a_tag = film.find("a", class_="frame")
+        if a_tag and a_tag.get("href"):
+            link = a_tag["href"]
+        else:
+            div_tag = film.find("div", class_="react-component")
+            if div_tag and div_tag.get("data-target-link"):
+                link = div_tag["data-target-link"]
+            else:
+                continue
+        links.append("https://letterboxd.com" + link)
+    return links
+
+
+def read_existing_links(path: str) -> Set[str]:
+    """Liens déjà présents dans le fichier (ensemble vide s'il n'existe pas)."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return set(f.read().splitlines())
+    except FileNotFoundError:
+        return set()
 
 
 # ---------------------------------------------------
-# # Étape 4 : Sauvegarde tous les liens dans un fichier
+# Étape 4 : parcours concurrent des pages dans UNE seule session
 # ---------------------------------------------------
 
-# with open("all_letterboxd_links.txt", "w", encoding="utf-8") as f:
-#     for link in all_links:
-#         f.write(link + "\n")
+async def fetch_pages(fetch: Callable[[str], Awaitable[str]], pages: List[int],
+                      base_url: Optional[str], concurrency: int,
+                      last_page: Callable[[], int]):
+    """
+    Récupère les pages en parallèle (nombre borné) et les rend dès leur
+    arrivée. Les pages au-delà de `last_page()` (fin de liste détectée entre-
+    temps) ne sont pas demandées.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch_one(page: int) -> Tuple[int, Optional[str]]:
+        url = rebase_url(POPULAR_PAGE_URL.format(page=page), base_url)
+        async with semaphore:
+            if page > last_page():
+                return page, None
+            try:
+                return page, await fetch(url)
+            except Exception as e:
+                print(f"❌ Page {page}: {e.__class__.__name__}")
+                return page, None
+
+    # Tâches créées dans l'ordre des pages : le sémaphore les sert dans cet
+    # ordre, si bien qu'au plus `concurrency` pages dépassent la fin de liste
+    tasks = [asyncio.ensure_future(fetch_one(page)) for page in pages]
+    for next_done in asyncio.as_completed(tasks):
+        yield await next_done
+
+
+async def discover_links(total_pages: int, output: str, concurrency: int,
+                         fetch_mode: str, base_url: Optional[str]) -> Tuple[int, int]:
+    """
+    Parcourt les pages populaires et ajoute immédiatement au fichier les liens
+    qui n'y sont pas encore. Retourne (liens ajoutés, total unique).
+    """
+    all_links = read_existing_links(output)
+    added_total = 0
+    pages = list(range(1, total_pages + 1))
+    # Dernière page de la liste (abaissée dès qu'une page est incomplète)
+    last_page = total_pages
+
+    async def run(fetch: Callable[[str], Awaitable[str]]):
+        nonlocal added_total, last_page
+        with open(output, "a", encoding="utf-8") as f:
+            async for page, html in fetch_pages(fetch, pages, base_url, concurrency,
+                                                lambda: last_page):
+                if html is None:
+                    continue
+                films = extract_film_links(html)
+                if len(films) < FILMS_PER_PAGE and page < last_page:
+                    last_page = page
+                    print(f"⏹️ Page {page}: {len(films)}/{FILMS_PER_PAGE} films, fin de la "
+                          f"liste : les pages suivantes ne sont pas demandées.")
+                missing_links = [link for link in films if link not in all_links]
+                all_links.update(missing_links)
+                added_total += len(missing_links)
+                print(f"Page {page}: {len(films)} films trouvés, "
+                      f"{len(missing_links)} nouveaux films ajoutés")
+                # Ajout immédiat des nouveaux liens (sécurisé)
+                if missing_links:
+                    f.write("".join(link + "\n" for link in missing_links))
+                    f.flush()
+
+    if fetch_mode == "http":
+        async with build_http_client(concurrency, 30.0) as client:
+            async def http_fetch(url: str) -> str:
+                response = await client.get(url)
+                response.raise_for_status()
+                return response.text
+            await run(http_fetch)
+    else:
+        async with AsyncWebCrawler() as crawler:
+            async def browser_fetch(url: str) -> str:
+                result = await crawler.arun(url=url)
+                return result.html
+            await run(browser_fetch)
+
+    return added_total, len(all_links)
 
 
 # ---------------------------------------------------
 # ÉTAPE 5 : Vérification et ajout des liens manquants
 # ---------------------------------------------------
 
-# Lire les liens déjà existants
-with open("all_letterboxd_links.txt", "r", encoding="utf-8") as f:
-    all_links = set(f.read().splitlines())
-
-TOTAL_PAGES = 150
-added_total = 0  # Compteur global
-
-# Parcours des pages pour vérifier les manquants
-for page in range(1, TOTAL_PAGES + 1):
-    print(f"--- Vérification page {page} ---")
-    response = crawl_get(f"https://letterboxd.com/films/popular/page/{page}/")
-    soup = BeautifulSoup(response.html, "html.parser")
-    films = soup.find_all("li", class_="posteritem")
-
-    missing_links = []
-    for film in films:
-        a_tag = film.find("a", class_="frame")
-        if a_tag and a_tag.get("href"):
-            link = a_tag["href"]
-        else:
-            div_tag = film.find("div", class_="react-component")
-            if div_tag and div_tag.get("data-target-link"):
-                link = div_tag["data-target-link"]
-            else:
-                continue
-        full_link = "https://letterboxd.com" + link
-        if full_link not in all_links:
-            all_links.add(full_link)
-            missing_links.append(full_link)
-
-    added_total += len(missing_links)
-    print(f"Page {page}: {len(missing_links)} nouveaux films ajoutés")
-
-    # Ajout immédiat des nouveaux liens (sécurisé)
-    if missing_links:
-        with open("all_letterboxd_links.txt", "a", encoding="utf-8") as f:
-            for link in missing_links:
-                f.write(link + "\n")
-
-print(f"\n✅ Mise à jour terminée.")
-print(f"➕ {added_total} nouveaux liens ajoutés")
-print(f"📦 Total unique final : {len(all_links)} liens")
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Collecte les URLs des films populaires de Letterboxd.")
+    parser.add_argument("--pages", type=int, default=TOTAL_PAGES,
+                        help="Nombre de pages /films/popular/ à parcourir.")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENT_PAGES,
+                        help="Pages récupérées en parallèle.")
+    parser.add_argument("--output", default=LINKS_FILE,
+                        help="Fichier de liens (les nouveaux liens y sont ajoutés).")
+    parser.add_argument("--fetch-mode", choices=("browser", "http"), default="browser",
+                        help="Navigateur (pages rendues) ou client HTTP simple.")
+    parser.add_argument("--base-url", default=None,
+                        help="Hôte de remplacement (serveur local de test).")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    started = time.monotonic()
+    added_total, unique_total = asyncio.run(discover_links(
+        args.pages, args.output, args.concurrency, args.fetch_mode, args.base_url
+    ))
+    print(f"\n✅ Mise à jour terminée en {time.monotonic() - started:.1f} s.")
+    print(f"➕ {added_total} nouveaux liens ajoutés")
+    print(f"📦 Total unique final : {unique_total} liens")
@@ -0,0 +1,224 @@
+import bisect
+import cProfile
+import json
+import os
+import pstats
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+# ====================================================================
+#             INSTRUMENTATION DU SCRAPING (MÉTRIQUES PAR ÉTAPE)
+# ====================================================================
+# Histogrammes de durée par étape (attente du débit, téléchargement,
+# analyse, écriture...), compteurs par résultat, taux d'erreur glissant,
+# profondeur des files, débit courant et ETA. Un instantané est exporté
+# périodiquement dans un fichier texte Prometheus (node_exporter
+# "textfile collector") et/ou une ligne JSON par intervalle.
+
+# Bornes des histogrammes, en secondes (format Prometheus "le")
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+# Fenêtre glissante du taux d'erreur et du débit de fin de films (ETA)
+ROLLING_WINDOW_S = 300.0
+METRIC_PREFIX = "letterboxd"
+
+
+class StageHistogram:
+    """Histogramme cumulatif d'une étape : compteurs par borne, somme et nombre."""
+
+    def __init__(self, buckets: Tuple[float, ...] = STAGE_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # dernière case : +Inf
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+
+    def quantile(self, q: float) -> float:
+        """Estimation (borne supérieure de la case qui contient le quantile)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return bound
+        return float("inf")
+
+    def summary(self) -> Dict[str, float]:
+        return {"count": self.count, "sum": round(self.total, 3),
+                "mean": round(self.total / self.count, 4) if self.count else 0.0,
+                "p50": self.quantile(0.5), "p99": self.quantile(0.99)}
+
+
+class ScrapeMetrics:
+    """Métriques d'un run, alimentées par les workers, la tâche d'écriture et le fetcher."""
+
+    def __init__(self, total: int, already_done: int = 0,
+                 window_s: float = ROLLING_WINDOW_S):
+        self.started_at = time.time()
+        self.total = total
+        self.completed = already_done
+        self._completed_at_start = already_done
+        self.window_s = window_s
+        self.stages: Dict[str, StageHistogram] = {}
+        self.counters: Dict[str, int] = {}
+        # (horodatage, erreur ?) de chaque tentative de récupération
+        self._attempts: Deque[Tuple[float, bool]] = deque()
+        self._completions: Deque[float] = deque()
+
+    def observe(self, stage: str, seconds: float):
+        """Ajoute une durée à l'histogramme de l'étape."""
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            histogram = self.stages[stage] = StageHistogram()
+        histogram.observe(seconds)
+
+    def increment(self, counter: str, value: int = 1):
+        self.counters[counter] = self.counters.get(counter, 0) + value
+
+    def record_attempt(self, error: bool):
+        """Une tentative de récupération d'un film (pour le taux d'erreur glissant)."""
+        now = time.time()
+        self._attempts.append((now, error))
+        self._trim(self._attempts, now, key=lambda item: item[0])
+
+    def record_completion(self, outcome: str):
+        """Un film terminé (succès ou échec définitif)."""
+        now = time.time()
+        self.completed += 1
+        self.increment(f"outcome_{outcome}")
+        self._completions.append(now)
+        self._trim(self._completions, now, key=lambda item: item)
+
+    def _trim(self, window: Deque, now: float, key: Callable[[Any], float]):
+        while window and now - key(window[0]) > self.window_s:
+            window.popleft()
+
+    def error_rate(self) -> float:
+        """Part des tentatives en erreur sur la fenêtre glissante."""
+        self._trim(self._attempts, time.time(), key=lambda item: item[0])
+        if not self._attempts:
+            return 0.0
+        return sum(1 for _, error in self._attempts if error) / len(self._attempts)
+
+    def throughput(self) -> float:
+        """Films terminés par seconde sur la fenêtre glissante."""
+        now = time.time()
+        self._trim(self._completions, now, key=lambda item: item)
+        span = min(self.window_s, now - self.started_at)
+        return len(self._completions) / span if span > 0 else 0.0
+
+    def eta_seconds(self) -> Optional[float]:
+        remaining = max(0, self.total - self.completed)
+        throughput = self.throughput()
+        if remaining == 0:
+            return 0.0
+        return remaining / throughput if throughput > 0 else None
+
+    def snapshot(self, gauges: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+        """État courant (sérialisable en JSON)."""
+        return {
+            "timestamp": round(time.time(), 3),
+            "elapsed_s": round(time.time() - self.started_at, 1),
+            "completed": self.completed,
+            "completed_this_run": self.completed - self._completed_at_start,
+            "total": self.total,
+            "throughput_per_s": round(self.throughput(), 4),
+            "eta_s": self.eta_seconds(),
+            "error_rate": round(self.error_rate(), 4),
+            "counters": dict(self.counters),
+            "gauges": dict(gauges or {}),
+            "stages": {name: h.summary() for name, h in sorted(self.stages.items())},
+        }
+
+    def prometheus_text(self, gauges: Optional[Dict[str, float]] = None) -> str:
+        """Instantané au format texte d'exposition Prometheus."""
+        p = METRIC_PREFIX
+        lines = [f"# HELP {p}_stage_seconds Durée des étapes du scraping.",
+                 f"# TYPE {p}_stage_seconds histogram"]
+        for stage, histogram in sorted(self.stages.items()):
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                lines.append(f'{p}_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} '
+                             f'{cumulative}')
+            lines.append(f'{p}_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} '
+                         f'{histogram.count}')
+            lines.append(f'{p}_stage_seconds_sum{{stage="{stage}"}} {histogram.total:.6f}')
+            lines.append(f'{p}_stage_seconds_count{{stage="{stage}"}} {histogram.count}')
+
+        lines += [f"# HELP {p}_events_total Compteurs par résultat et par événement.",
+                  f"# TYPE {p}_events_total counter"]
+        lines += [f'{p}_events_total{{event="{name}"}} {value}'
+                  for name, value in sorted(self.counters.items())]
+
+        values = {"completed": self.completed, "total": self.total,
+                  "throughput_per_second": self.throughput(),
+                  "error_rate": self.error_rate(),
+                  "eta_seconds": self.eta_seconds() if self.eta_seconds() is not None else -1}
+        values.update(gauges or {})
+        for name, value in sorted(values.items()):
+            lines += [f"# TYPE {p}_{name} gauge", f"{p}_{name} {float(value):.6g}"]
+        return "\n".join(lines) + "\n"
+
+    def export(self, prom_path: Optional[str], jsonl_path: Optional[str],
+               gauges: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+        """Réécrit le fichier Prometheus (atomiquement) et ajoute une ligne au JSONL."""
+        snapshot = self.snapshot(gauges)
+        if prom_path:
+            tmp_path = prom_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(self.prometheus_text(gauges))
+            os.replace(tmp_path, prom_path)
+        if jsonl_path:
+            with open(jsonl_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(snapshot, ensure_ascii=False) + "\n")
+        return snapshot
+
+
+def format_duration(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "?"
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    return f"{hours}h{rest // 60:02d}m" if hours else f"{rest // 60}m{rest % 60:02d}s"
+
+
+def describe_snapshot(snapshot: Dict[str, Any]) -> str:
+    """Résumé d'une ligne : progression, débit, erreurs, ETA et étapes les plus coûteuses."""
+    stages = sorted(snapshot["stages"].items(), key=lambda item: -item[1]["sum"])
+    costly = ", ".join(f"{name} {stats['sum'] / 60:.1f} min" for name, stats in stages[:3])
+    return (f"{snapshot['completed']}/{snapshot['total']} films | "
+            f"{snapshot['throughput_per_s'] * 3600:.0f} films/h | "
+            f"erreurs {snapshot['error_rate']:.1%} | "
+            f"ETA {format_duration(snapshot['eta_s'])} | {costly}")
+
+
+# --- Profilage échantillonné de l'extraction (dans la pool d'analyse) ---
+
+_profile_stats: Optional[pstats.Stats] = None
+
+
+def profile_call(profile_dir: str, func: Callable, *args) -> Any:
+    """
+    Exécute `func(*args)` sous cProfile et cumule les statistiques du
+    processus dans `profile_dir/extract_<pid>.prof` (lisible avec pstats
+    ou snakeviz).
+    """
+    global _profile_stats
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func, *args)
+    finally:
+        if _profile_stats is None:
+            _profile_stats = pstats.Stats(profiler)
+        else:
+            _profile_stats.add(profiler)
+        os.makedirs(profile_dir, exist_ok=True)
+        _profile_stats.dump_stats(os.path.join(profile_dir, f"extract_{os.getpid()}.prof"))
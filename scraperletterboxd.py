@@ -1,32 +1,161 @@
+import argparse
 import asyncio
-import csv
+import glob
 import json
-import random
+import os
 import re
-from typing import Any, Dict, List, Tuple
+import shutil
+import socket
+import time
+from collections import deque
+from concurrent.futures import (Executor, Future, ProcessPoolExecutor,
+                                ThreadPoolExecutor)
+from typing import (Any, Collection, Deque, Dict, FrozenSet, Iterator, List,
+                    Optional, Set, Tuple)
+from urllib.parse import urlsplit
 
 from crawl4ai import AsyncWebCrawler
 from bs4 import BeautifulSoup
 
+from checkpoint import (STATUS_ALIAS, STATUS_NETWORK_ERROR, STATUS_NOT_FOUND, STATUS_OK,
+                        CheckpointIndex, count_links, iter_remaining_links,
+                        seed_from_records, status_for_record)
+from html_cache import HtmlCache
+from movie_fields import (STATS_FIELDS, default_movie_data, intern_categorical,
+                          parse_count, project_record, projected_keys,
+                          resolve_fields, safe_extract, wants)
+from fast_extractor import direct_fields_only, extract_movie_data_fast
+from export_sink import (IncrementalExportSink, iter_final_records,
+                         iter_jsonl_records, migrate_legacy_json)
+from film_identity import FilmAliasIndex, extract_film_identity
+from film_urls import rebase_url
+from parquet_export import parquet_available, write_parquet
+from http_fetcher import (BlockedPageError, TieredFetcher, build_http_client)
+from browser_render import (FIRST_PARTY_DOMAINS, RENDER_FULL, RENDER_LEAN, RenderStats,
+                            build_browser_config, build_run_config, lean_page_hook)
+from rate_controller import (AdaptiveRateController, FixedPauseRateController,
+                             RateController)
+from retry_queue import (DeadLetterLog, RetryPolicy, RetryScheduler,
+                         describe_failure)
+from scrape_metrics import ScrapeMetrics, describe_snapshot, profile_call
+from stats_history import StatsHistory, stats_of
+from work_queue import WORK_PENDING, WorkTable
+
 # --- ⚙️ Configuration Anti-Détection & Performance ⚙️ ---
-# Temps de pause aléatoire entre les requêtes pour limiter le débit.
+# Contrôleur de débit : "adaptive" (seau à jetons + AIMD) ou "fixed"
+# (ancienne pause aléatoire de SAFE_PAUSE_MIN à SAFE_PAUSE_MAX secondes).
+RATE_CONTROLLER = "adaptive"
+# Temps de pause aléatoire entre les requêtes (mode "fixed").
 SAFE_PAUSE_MIN = 10.0
 SAFE_PAUSE_MAX = 15.0
+# Débits du mode "adaptive", en requêtes par seconde (tous workers confondus).
+RATE_INITIAL = 0.25
+RATE_MIN = 0.05
+RATE_MAX_GLOBAL = 4.0
+# Plafonds par hôte (le plus petit entre global et hôte s'applique).
+RATE_MAX_PER_HOST = {"letterboxd.com": 2.0}
+# AIMD : +RATE_INCREASE_STEP par réponse saine, ×RATE_DECREASE_FACTOR sur 429.
+RATE_INCREASE_STEP = 0.02
+RATE_DECREASE_FACTOR = 0.5
 # Timeout pour la navigation (90 secondes).
 NAVIGATION_TIMEOUT_MS = 90000
-# Nombre de requêtes concurrentes.
+# Rendu navigateur : "lean" (images, polices, CSS et domaines tiers bloqués,
+# rendu dès que les blocs lus par l'extracteur sont dans le DOM) ou "full"
+# (attente de l'événement `load`). Comparaison : benchmark_render.py.
+BROWSER_RENDER_MODE = RENDER_LEAN
+# Récupération des pages : "tiered" (client HTTP, navigateur seulement si la
+# page est incomplète) ou "browser" (toujours Firefox via crawl4ai).
+FETCH_MODE = "tiered"
+# Connexions HTTP gardées ouvertes (keep-alive) et timeout du client HTTP.
+HTTP_POOL_SIZE = 10
+HTTP_TIMEOUT_S = 30.0
+# Hôte de remplacement (ex: serveur local de test), None = letterboxd.com.
+LETTERBOXD_BASE_URL: Optional[str] = None
+# Nombre de requêtes concurrentes (= nombre de workers).
 CONCURRENT_REQUESTS = 3
+# Taille maximale de la file d'attente, en nombre de liens par worker.
+QUEUE_SIZE_PER_WORKER = 2
+# Nouvelles tentatives des échecs transitoires (timeout, 429, HTML tronqué) :
+# attente de RETRY_BASE_DELAY_S × 2^(n-1) secondes (± 50 %), plafonnée.
+RETRY_MAX_ATTEMPTS = 4
+RETRY_BASE_DELAY_S = 30.0
+RETRY_MAX_DELAY_S = 600.0
 
 # --- 📁 Fichiers 📁 ---
 LINKS_FILE_PATH = "all_letterboxd_links_clean.txt"
 JSON_FILE_PATH = "movies_data_PROGRESSIVE.json"
 CSV_FILE_PATH = "movies_data_PROGRESSIVE.csv"
+# Export progressif en ajout seul (une ligne JSON par film).
+JSONL_FILE_PATH = "movies_data_PROGRESSIVE.jsonl"
+# Export colonnaire typé (listes natives), écrit en fin de run si pyarrow
+# est installé. None = désactivé.
+PARQUET_FILE_PATH: Optional[str] = "movies_data_PROGRESSIVE.parquet"
+# Nombre de films écrits entre deux fsync des fichiers d'export.
+FSYNC_EVERY = 25
+# Index de reprise (statut par URL de film).
+CHECKPOINT_DB_PATH = "scraping_checkpoint.sqlite"
+# Identité des films : URL -> film (ID interne / URL canonique) et alias.
+FILM_ALIASES_DB_PATH = "film_aliases.sqlite"
+# Échecs définitifs (404, tentatives épuisées), avec leur raison.
+DEAD_LETTER_PATH = "failed_films.jsonl"
+# Cache disque du HTML brut (compressé) : évite de re-crawler pour ré-extraire.
+HTML_CACHE_DIR = "html_cache"
+# Âge maximal d'une page en cache avant nouveau téléchargement (None = illimité).
+HTML_CACHE_MAX_AGE_DAYS: Optional[float] = 30
+# Budget disque du cache (éviction LRU au-delà).
+HTML_CACHE_MAX_BYTES = 2 * 1024 ** 3
+# Extracteur : "bs4" (référence, BeautifulSoup) ou "lxml" (parcours unique, rapide).
+EXTRACTOR_BACKEND = "bs4"
+# Analyse du HTML hors de la boucle asyncio : "process" (pool de processus,
+# recommandé pour BeautifulSoup) ou "thread", et nombre de workers d'analyse.
+PARSE_EXECUTOR = "process"
+PARSE_WORKERS = 2
+# Ré-extraction hors ligne : nombre de processus (None = tous les cœurs).
+REEXTRACT_WORKERS: Optional[int] = None
+# Métriques du run (durée par étape, erreurs, files, débit, ETA), exportées
+# toutes les METRICS_INTERVAL_S secondes. None = fichier désactivé.
+METRICS_INTERVAL_S = 30.0
+METRICS_PROM_PATH: Optional[str] = "scraping_metrics.prom"
+METRICS_JSONL_PATH: Optional[str] = "scraping_metrics.jsonl"
+# Profilage cProfile d'une extraction sur N (0 = désactivé), cumulé par
+# processus d'analyse dans PROFILE_DIR.
+PROFILE_EXTRACT_EVERY = 0
+PROFILE_DIR = "profiles"
+# Ré-extraction projetée (--fields / --stats-only) : seuls les champs demandés
+# sont extraits et écrits dans ces fichiers (les exports complets ne sont
+# pas touchés).
+PROJECTED_JSONL_FILE_PATH = "movies_data_FIELDS.jsonl"
+PROJECTED_CSV_FILE_PATH = "movies_data_FIELDS.csv"
+# --- 🛰️ Mode distribué (--init-work, --worker, --merge-shards) 🛰️ ---
+# Table de travail partagée par tous les workers (sur un disque commun).
+WORK_DB_PATH = "work_queue.sqlite"
+# "WAL" si tous les workers tournent sur la même machine, "DELETE" si la
+# base est sur un système de fichiers partagé entre plusieurs machines.
+WORK_DB_JOURNAL_MODE = "WAL"
+# Sorties par worker (<worker_id>.jsonl, .csv, .failed.jsonl), à fusionner.
+SHARD_DIR = "shards"
+# Durée d'un bail, renouvelé toutes les LEASE_SECONDS / 3 secondes : doit
+# dépasser RETRY_MAX_DELAY_S (un lien en attente de relance reste réservé).
+LEASE_SECONDS = 900.0
+# Attente entre deux tentatives de réservation quand tout est déjà réservé.
+WORK_POLL_S = 15.0
+# Une URL dont le bail expire N fois de suite (worker tombé sur cette page)
+# passe en échec réseau (fichier des échecs, --retry-failed) au lieu d'être
+# réservée indéfiniment.
+WORK_MAX_CLAIMS = 3
+# --- 📊 Rafraîchissement des statistiques (--refresh) 📊 ---
+# Séries temporelles des statistiques et volatilité estimée de chaque film.
+STATS_HISTORY_DB_PATH = "stats_history.sqlite"
+# Nombre maximal de requêtes par passage de rafraîchissement.
+REFRESH_BUDGET = 500
+# Un film n'est pas re-téléchargé moins de N heures après son dernier relevé.
+REFRESH_MIN_INTERVAL_H = 24
 # Limite de lecture des liens (très élevée par défaut).
 SCRAPING_LIMIT = 999999
 
 # --- 📊 Variables Globales pour le Suivi (Reprise & Progression) 📊 ---
 completed_tasks_counter = 0
-# Verrou pour la modification des variables globales et de la liste.
+# Verrou des compteurs de progression (les écritures passent par une seule tâche).
 progress_lock = asyncio.Lock()
 
 
@@ -34,81 +163,38 @@ progress_lock = asyncio.Lock()
 #                               FONCTIONS UTILITAIRES
 # ====================================================================
 
-def read_all_links(filepath: str, limit: int) -> List[str]:
-    """Lit les N premiers liens d'un fichier texte."""
-    links = []
-    try:
-        with open(filepath, "r", encoding="utf-8") as f:
-            for line in f:
-                link = line.strip()
-                if link:
-                    links.append(link)
-                if len(links) >= limit:
-                    break
-    except FileNotFoundError:
-        print(f"❌ Erreur: Le fichier '{filepath}' est introuvable.")
-        return []
-    return links
+def save_result(sink: IncrementalExportSink, checkpoint: CheckpointIndex,
+                record: Dict[str, Any], status: str):
+    """
+    Ajoute une ligne aux exports et marque l'URL dans l'index de reprise.
+    Les exports sont toujours fsyncés AVANT la validation du checkpoint :
+    un film marqué comme traité est forcément présent sur disque.
+    """
+    sink.write(record)
+    checkpoint.mark(record["film_url"], status)
 
 
-def safe_extract(func, default: Any = None) -> Any:
-    """Tente d'exécuter une fonction d'extraction et retourne une valeur par défaut."""
-    try:
-        return func()
-    except (AttributeError, IndexError, ValueError, TypeError, 
-            re.error, KeyError, StopIteration):
-        return default
+def record_failure(session: "ScrapingSession", link: str, status: str,
+                   reason: str, attempts: int):
+    """Échec définitif : statut dans l'index de reprise + ligne dans le fichier des échecs."""
+    session.dead_letters.record(link, status, reason, attempts)
+    session.checkpoint.mark(link, status)
 
 
-def parse_count(text: str) -> int:
-    """Convertit une chaîne (ex: '521,151' ou '5.2K') en un entier."""
-    if not text:
-        return 0
-    text = text.replace(",", "").strip().upper()
-    match = re.search(r"(\d*\.?\d+)\s*(K|M)?", text)
-    if not match:
-        return 0
-    value_str = match.group(1)
-    suffix = match.group(2)
-    try:
-        value = float(value_str)
-    except ValueError:
-        return 0
-    multiplier = 1
-    if suffix == "K": 
-        multiplier = 1_000
-    elif suffix == "M": 
-        multiplier = 1_000_000
-    return int(value * multiplier)
+def write_parquet_export():
+    """Construit le Parquet typé à partir du JSONL (mêmes films que le JSON consolidé)."""
+    if PARQUET_FILE_PATH is None:
+        return
+    if not parquet_available():
+        print("ℹ️ Export Parquet ignoré : installez 'pyarrow' pour l'activer.")
+        return
+    rows = write_parquet(iter_final_records(JSONL_FILE_PATH), PARQUET_FILE_PATH)
+    print(f"🧱 Export Parquet : {rows} films dans {PARQUET_FILE_PATH}.")
 
 
 def get_default_movie_keys() -> List[str]:
     """Retourne la liste ordonnée des clés de données de film pour le CSV/JSON."""
-    default_data = extract_movie_data("", "default_url")
-    return list(default_data.keys())
-
-
-def write_progressive_exports(data_list: List[Dict], keys: List[str]):
-    """Écrit le JSON et le CSV pour sauvegarder l'état actuel de la liste."""
-    if not data_list:
-        return
-    # 1. Écriture du JSON
-    try:
-        with open(JSON_FILE_PATH, "w", encoding="utf-8") as f:
-            json.dump(data_list, f, ensure_ascii=False, indent=4)
-    except Exception as e:
-        print(f"\n❌ ERREUR SAUVEGARDE JSON: Impossible d'écrire "
-              f"{JSON_FILE_PATH}. {e}")
-
-    # 2. Écriture du CSV
-    try:
-        with open(CSV_FILE_PATH, "w", encoding="utf-8", newline="") as f:
-            writer = csv.DictWriter(f, fieldnames=keys, extrasaction='ignore')
-            writer.writeheader()
-            writer.writerows(data_list)
-    except Exception as e:
-        print(f"\n❌ ERREUR SAUVEGARDE CSV: Impossible d'écrire "
-              f"{CSV_FILE_PATH}. {e}")
+    return list(default_movie_data("default_url").keys())
 
 
 # ====================================================================
@@ -116,33 +202,31 @@ def write_progressive_exports(data_list: List[Dict], keys: List[str]):
 # ====================================================================
 
 async def fetch_html(crawler: AsyncWebCrawler, url: str) -> str:
-    """Récupère le HTML d'une URL avec le timeout configuré."""
+    """Récupère le HTML d'une URL avec le timeout et le mode de rendu configurés."""
     result = await crawler.arun(
         url=url,
-        wait_until='load',
-        timeout_ms=NAVIGATION_TIMEOUT_MS,
+        config=build_run_config(BROWSER_RENDER_MODE, NAVIGATION_TIMEOUT_MS),
     )
+    if getattr(result, "status_code", None) == 429:
+        raise BlockedPageError("HTTP 429 : trop de requêtes.")
     # Validation minimale du contenu HTML
     if not result.html or len(result.html) < 1000:
-        raise ValueError("Contenu HTML vide ou trop court. Erreur de page "
-                         "ou blocage probable.")
+        raise BlockedPageError("Contenu HTML vide ou trop court. Erreur de page "
+                               "ou blocage probable.")
     return result.html
 
 
-def extract_movie_data(html: str, url: str) -> Dict[str, Any]:
-    """Analyse le HTML et extrait toutes les métadonnées du film."""
+def extract_movie_data(html: str, url: str,
+                       fields: Optional[Collection[str]] = None) -> Dict[str, Any]:
+    """
+    Analyse le HTML et extrait toutes les métadonnées du film.
+    `fields` : champs à extraire (None = tous). Seuls les extracteurs de ces
+    champs tournent, et l'enregistrement ne contient qu'eux (plus l'URL et
+    le titre, toujours extraits).
+    """
     soup = BeautifulSoup(html, "html.parser")
     # ⚠️ Initialisation avec **TOUTES** les clés nécessaires
-    data: Dict[str, Any] = {
-        "film_url": url, "film_name": "", "release_year": None, 
-        "duration_min": None, "main_language": "", "spoken_languages": "", 
-        "genres": "", "first_genre": "", "themes": "", "synopsis": "", 
-        "directors": "", "cast": "", "first_actor": "", "studios": "", 
-        "origin_countries": "", "release_type": "", "premiere_festival": "", 
-        "where_to_watch": "", "avg_rating": 0.0, "ratings_count": 0, 
-        "views_count": 0, "lists_count": 0, "likes_count": 0, 
-        "fans_count": 0, "is_top_250_ranked": False
-    }
+    data: Dict[str, Any] = default_movie_data(url)
 
     # --- Extraction de Base (Vérification de Succès) ---
     data["film_name"] = safe_extract(
@@ -150,22 +234,25 @@ def extract_movie_data(html: str, url: str) -> Dict[str, Any]:
         default=""
     )
     if not data["film_name"]: 
-        return data
+        return project_record(data, fields)
 
     # --- Métadonnées Simples ---
-    data["release_year"] = safe_extract(
-        lambda: int(soup.find("a",
-                              href=lambda h: h and "/films/year/" in h).text.strip()), 
-        default=None
-    )
-    data["duration_min"] = safe_extract(
-        lambda: int(re.search(r"(\d+)\s*mins", 
-                              soup.select_one("p.text-link.text-footer").get_text()).group(1)), 
-        default=None
-    )
-    data["synopsis"] = safe_extract(
-        lambda: soup.select_one("div.truncate p").text.strip(), default=""
-    )
+    if wants(fields, "release_year"):
+        data["release_year"] = safe_extract(
+            lambda: int(soup.find("a",
+                                  href=lambda h: h and "/films/year/" in h).text.strip()), 
+            default=None
+        )
+    if wants(fields, "duration_min"):
+        data["duration_min"] = safe_extract(
+            lambda: int(re.search(r"(\d+)\s*mins", 
+                                  soup.select_one("p.text-link.text-footer").get_text()).group(1)), 
+            default=None
+        )
+    if wants(fields, "synopsis"):
+        data["synopsis"] = safe_extract(
+            lambda: soup.select_one("div.truncate p").text.strip(), default=""
+        )
 
     # --- Extraction par fonction spécialisée ---
     def extract_languages() -> Tuple[str, str]:
@@ -192,9 +279,10 @@ def extract_movie_data(html: str, url: str) -> Dict[str, Any]:
                 
         return main_lang, spoken_list
 
-    data["main_language"], data["spoken_languages"] = safe_extract(
-        extract_languages, default=("", "")
-    )
+    if wants(fields, "main_language", "spoken_languages"):
+        data["main_language"], data["spoken_languages"] = safe_extract(
+            extract_languages, default=("", "")
+        )
 
     def extract_genres() -> Tuple[str, str]:
         """Extrait la liste des genres et le premier genre."""
@@ -205,9 +293,10 @@ def extract_movie_data(html: str, url: str) -> Dict[str, Any]:
         genres = [a.text.strip() for a in genre_div.find_all("a")] if genre_div else []
         return " | ".join(genres), genres[0] if genres else ""
 
-    data["genres"], data["first_genre"] = safe_extract(
-        extract_genres, default=("", "")
-    )
+    if wants(fields, "genres", "first_genre"):
+        data["genres"], data["first_genre"] = safe_extract(
+            extract_genres, default=("", "")
+        )
 
     def extract_themes() -> str:
         """Extrait les thèmes et mini-thèmes."""
@@ -220,7 +309,8 @@ def extract_movie_data(html: str, url: str) -> Dict[str, Any]:
         }
         return " | ".join(sorted(list(themes)))
 
-    data["themes"] = safe_extract(extract_themes, default="")
+    if wants(fields, "themes"):
+        data["themes"] = safe_extract(extract_themes, default="")
 
     def extract_cast_and_directors() -> Tuple[str, str, str]:
         """Extrait les réalisateurs, la liste des acteurs et le premier acteur."""
@@ -232,14 +322,16 @@ def extract_movie_data(html: str, url: str) -> Dict[str, Any]:
         first_actor = cast[0] if cast else ""
         return directors, full_cast, first_actor
 
-    data["directors"], data["cast"], data["first_actor"] = safe_extract(
-        extract_cast_and_directors, default=("", "", "")
-    )
+    if wants(fields, "directors", "cast", "first_actor"):
+        data["directors"], data["cast"], data["first_actor"] = safe_extract(
+            extract_cast_and_directors, default=("", "", "")
+        )
 
-    data["studios"] = safe_extract(
-        lambda: " | ".join([a.text.strip() for a in soup.find_all("a", href=True) 
-                            if "/studio/" in a["href"]]), default=""
-    )
+    if wants(fields, "studios"):
+        data["studios"] = safe_extract(
+            lambda: " | ".join([a.text.strip() for a in soup.find_all("a", href=True) 
+                                if "/studio/" in a["href"]]), default=""
+        )
 
     def extract_countries() -> str:
         """Extrait le(s) pays d'origine."""
@@ -250,13 +342,15 @@ def extract_movie_data(html: str, url: str) -> Dict[str, Any]:
             countries = [a.text.strip() for a in country_div.select("a.text-slug")]
             return " | ".join(countries)
         return ""
-    data["origin_countries"] = safe_extract(extract_countries, default="")
+    if wants(fields, "origin_countries"):
+        data["origin_countries"] = safe_extract(extract_countries, default="")
 
-    data["release_type"] = safe_extract(
-        lambda: " | ".join([h3.text.strip() for h3 in soup.find_all("h3", 
-                                                                    class_="release-table-title")]), 
-        default=""
-    )
+    if wants(fields, "release_type"):
+        data["release_type"] = safe_extract(
+            lambda: " | ".join([h3.text.strip() for h3 in soup.find_all("h3", 
+                                                                        class_="release-table-title")]), 
+            default=""
+        )
 
     def extract_premiere() -> str:
         """Extrait le nom du festival de première."""
@@ -272,7 +366,8 @@ def extract_movie_data(html: str, url: str) -> Dict[str, Any]:
                         premiere_festival_list.append(fest_tag.text.strip())
         return " | ".join(premiere_festival_list)
         
-    data["premiere_festival"] = safe_extract(extract_premiere, default="")
+    if wants(fields, "premiere_festival"):
+        data["premiere_festival"] = safe_extract(extract_premiere, default="")
 
     def extract_watch_platforms() -> str:
         """Extrait où regarder le film (plateformes et options)."""
@@ -291,13 +386,15 @@ def extract_movie_data(html: str, url: str) -> Dict[str, Any]:
                     platforms.append(f"{platform_name}: {', '.join(options)}")
                 return " | ".join(platforms)
     
-    data["where_to_watch"] = safe_extract(extract_watch_platforms, default="")
+    if wants(fields, "where_to_watch"):
+        data["where_to_watch"] = safe_extract(extract_watch_platforms, default="")
 
     # --- Bloc d'extraction des Statistiques ---
-    data["avg_rating"] = safe_extract(
-        lambda: float(soup.select_one("span.average-rating a").text.strip()), 
-        default=0.0
-    )
+    if wants(fields, "avg_rating"):
+        data["avg_rating"] = safe_extract(
+            lambda: float(soup.select_one("span.average-rating a").text.strip()), 
+            default=0.0
+        )
 
     def extract_ratings_count() -> int:
         """Extrait le nombre total de notes."""
@@ -309,7 +406,8 @@ def extract_movie_data(html: str, url: str) -> Dict[str, Any]:
                 return parse_count(match.group(1))
         return 0
 
-    data["ratings_count"] = safe_extract(extract_ratings_count, default=0)
+    if wants(fields, "ratings_count"):
+        data["ratings_count"] = safe_extract(extract_ratings_count, default=0)
     
     def extract_statistic_from_aria(class_suffix: str) -> int:
         """Extrait les statistiques (vues, listes) à partir de l'attribut aria-label."""
@@ -321,154 +419,1142 @@ def extract_movie_data(html: str, url: str) -> Dict[str, Any]:
                 return parse_count(match.group(1))
         return 0
 
-    data["views_count"] = safe_extract(
-        lambda: extract_statistic_from_aria("watches"), default=0
-    )
-    data["lists_count"] = safe_extract(
-        lambda: extract_statistic_from_aria("lists"), default=0
-    )
-    data["likes_count"] = safe_extract(
-        lambda: extract_statistic_from_aria("likes"), default=0
-    )
-    data["fans_count"] = safe_extract(
-        lambda: parse_count(soup.select_one('a[href*="/fans/"]').text.strip()), 
-        default=0
-    )
+    for field, class_suffix in (("views_count", "watches"), ("lists_count", "lists"),
+                                ("likes_count", "likes")):
+        if wants(fields, field):
+            data[field] = safe_extract(
+                lambda: extract_statistic_from_aria(class_suffix), default=0
+            )
+    if wants(fields, "fans_count"):
+        data["fans_count"] = safe_extract(
+            lambda: parse_count(soup.select_one('a[href*="/fans/"]').text.strip()), 
+            default=0
+        )
 
-    top_250_link = soup.select_one(
-        'a[href*="official-top-250-narrative-feature-films"]'
-    )
-    data["is_top_250_ranked"] = bool(top_250_link)
+    if wants(fields, "is_top_250_ranked"):
+        top_250_link = soup.select_one(
+            'a[href*="official-top-250-narrative-feature-films"]'
+        )
+        data["is_top_250_ranked"] = bool(top_250_link)
+
+    return project_record(data, fields)
 
-    return data
+
+def run_extractor(html: str, url: str,
+                  fields: Optional[Collection[str]] = None) -> Dict[str, Any]:
+    """
+    Extrait les données du film avec le backend choisi (EXTRACTOR_BACKEND).
+    Statistiques seules (rafraîchissement, --stats-only) : requêtes XPath lxml
+    dès que lxml est installé, car BeautifulSoup analyserait toute la page
+    (parité vérifiée par benchmark_extractors.py).
+    """
+    if EXTRACTOR_BACKEND == "lxml" or direct_fields_only(fields):
+        return extract_movie_data_fast(html, url, fields)
+    return extract_movie_data(html, url, fields)
 
 
 # ====================================================================
 #                               FONCTION PRINCIPALE
 # ====================================================================
 
-async def scrape_movie(crawler: AsyncWebCrawler, link: str, all_data: List[Dict], 
-                       total_links: int, keys: List[str]):
+class LazyBrowser:
+    """Navigateur crawl4ai démarré seulement à la première page qui en a besoin."""
+
+    def __init__(self):
+        self._crawler: Optional[AsyncWebCrawler] = None
+        self._lock = asyncio.Lock()
+        self.render_stats = RenderStats()
+
+    async def fetch(self, url: str) -> str:
+        async with self._lock:
+            if self._crawler is None:
+                print(f"🦊 Démarrage du navigateur, rendu {BROWSER_RENDER_MODE} "
+                      f"(page incomplète en HTTP)...")
+                crawler = AsyncWebCrawler(config=build_browser_config("firefox"))
+                # Filtrage des requêtes (mode allégé) et comptage des octets reçus
+                first_party = FIRST_PARTY_DOMAINS
+                if LETTERBOXD_BASE_URL:
+                    first_party += (urlsplit(LETTERBOXD_BASE_URL).hostname,)
+                crawler.crawler_strategy.set_hook(
+                    "on_page_context_created",
+                    lean_page_hook(first_party, self.render_stats,
+                                   block=BROWSER_RENDER_MODE == RENDER_LEAN))
+                await crawler.start()
+                self._crawler = crawler
+        return await fetch_html(self._crawler, url)
+
+    def describe(self) -> Optional[str]:
+        """Bilan du navigateur (None s'il n'a pas servi)."""
+        if self._crawler is None:
+            return None
+        return f"rendu {BROWSER_RENDER_MODE} : {self.render_stats.describe()}"
+
+    async def close(self):
+        if self._crawler is not None:
+            await self._crawler.close()
+            self._crawler = None
+
+
+class ScrapeOutcome:
+    """Résultat final d'un film, transmis par les workers à la tâche d'écriture."""
+
+    __slots__ = ("link", "status", "attempts", "movie_data", "reason", "identity")
+
+    def __init__(self, link: str, status: str, attempts: int,
+                 movie_data: Optional[Dict[str, Any]] = None, reason: str = "",
+                 identity: Tuple[Optional[str], Optional[str]] = (None, None)):
+        self.link = link
+        self.status = status
+        self.attempts = attempts
+        self.movie_data = movie_data
+        self.reason = reason
+        # (ID interne, URL canonique) lus sur la page
+        self.identity = identity
+
+
+class FetchSession:
     """
-    Tâche asynchrone pour scraper un seul film, mettre à jour la liste de données 
-    et gérer la progression ainsi que les erreurs.
+    Ressources pour télécharger et analyser des pages (`get_html`,
+    `parse_html`) : ce dont a besoin le rafraîchissement des statistiques.
     """
-    global completed_tasks_counter
-    # Données d'erreur par défaut
-    error_data = {"film_url": link, "film_name": "ERROR_NETWORK/PAGE", 
-                  "ratings_count": 0, "fans_count": 0}
 
+    def __init__(self, fetcher: TieredFetcher, parse_executor: Executor,
+                 rate_controller: RateController, html_cache: HtmlCache,
+                 total_links: int, metrics: ScrapeMetrics):
+        self.fetcher = fetcher
+        self.parse_executor = parse_executor
+        self.rate_controller = rate_controller
+        self.html_cache = html_cache
+        self.total_links = total_links
+        self.metrics = metrics
+
+
+class ScrapingSession(FetchSession):
+    """Ressources partagées par tous les workers pendant un run (exports, reprise, relances)."""
+
+    def __init__(self, fetcher: TieredFetcher, parse_executor: Executor,
+                 results: asyncio.Queue, sink: IncrementalExportSink,
+                 checkpoint: CheckpointIndex, rate_controller: RateController,
+                 html_cache: HtmlCache, retries: RetryScheduler,
+                 dead_letters: DeadLetterLog, total_links: int,
+                 metrics: ScrapeMetrics, aliases: Optional[FilmAliasIndex] = None):
+        super().__init__(fetcher, parse_executor, rate_controller, html_cache,
+                         total_links, metrics)
+        self.results = results
+        self.sink = sink
+        self.checkpoint = checkpoint
+        self.retries = retries
+        self.dead_letters = dead_letters
+        self.aliases = aliases
+
+
+def cache_max_age_seconds() -> Optional[float]:
+    """Âge maximal du cache HTML en secondes (None = pas d'expiration)."""
+    if HTML_CACHE_MAX_AGE_DAYS is None:
+        return None
+    return HTML_CACHE_MAX_AGE_DAYS * 86400
+
+
+async def get_html(session: FetchSession, link: str, use_cache: bool = True) -> str:
+    """
+    Retourne le HTML depuis le cache disque, sinon le télécharge et le met en cache.
+    use_cache=False : toujours télécharger (rafraîchissement), le cache est mis à jour.
+    """
+    metrics = session.metrics
+    if use_cache:
+        started = time.monotonic()
+        html = session.html_cache.get(link, max_age=cache_max_age_seconds())
+        metrics.observe("cache_read", time.monotonic() - started)
+        if html is not None:
+            metrics.increment("cache_hit")
+            return html
+    # Le fetcher attend le feu vert du contrôleur de débit avant chaque requête
+    # (attente et téléchargement sont mesurés par le fetcher lui-même)
+    html = await session.fetcher.fetch(rebase_url(link, LETTERBOXD_BASE_URL))
+    started = time.monotonic()
+    # Compression et commit SQLite hors de la boucle asyncio
+    await asyncio.to_thread(session.html_cache.put, link, html)
+    metrics.observe("cache_write", time.monotonic() - started)
+    return html
+
+
+def _init_parse_worker(extractor_backend: str):
+    global EXTRACTOR_BACKEND
+    EXTRACTOR_BACKEND = extractor_backend
+
+
+def build_parse_executor() -> Executor:
+    """Pool d'analyse du HTML : la boucle asyncio ne fait plus que du réseau."""
+    if PARSE_EXECUTOR == "thread":
+        return ThreadPoolExecutor(max_workers=PARSE_WORKERS)
+    return ProcessPoolExecutor(max_workers=PARSE_WORKERS,
+                               initializer=_init_parse_worker,
+                               initargs=(EXTRACTOR_BACKEND,))
+
+
+async def parse_html(session: FetchSession, html: str, link: str,
+                     fields: Optional[Collection[str]] = None) -> Dict[str, Any]:
+    """Exécute l'extracteur dans la pool d'analyse, sans bloquer les autres workers."""
+    loop = asyncio.get_running_loop()
+    metrics = session.metrics
+    metrics.increment("parsed")
+    started = time.monotonic()
     try:
-        html = await fetch_html(crawler, link)
-        movie_data = extract_movie_data(html, link)
+        if PROFILE_EXTRACT_EVERY and metrics.counters["parsed"] % PROFILE_EXTRACT_EVERY == 0:
+            # Échantillon profilé (cumulé dans PROFILE_DIR par le processus d'analyse)
+            movie_data = await loop.run_in_executor(session.parse_executor, profile_call,
+                                                    PROFILE_DIR, run_extractor, html, link,
+                                                    fields)
+        else:
+            movie_data = await loop.run_in_executor(session.parse_executor, run_extractor,
+                                                    html, link, fields)
+        # Les chaînes reçues de la pool sont des copies : genres, pays et
+        # langues sont ramenés à une seule instance partagée.
+        return intern_categorical(movie_data)
+    finally:
+        metrics.observe("parse", time.monotonic() - started)
+
+
+def build_rate_controller() -> RateController:
+    """Instancie le contrôleur de débit choisi dans la configuration."""
+    if RATE_CONTROLLER == "fixed":
+        return FixedPauseRateController(SAFE_PAUSE_MIN, SAFE_PAUSE_MAX)
+    return AdaptiveRateController(
+        initial_rate=RATE_INITIAL,
+        min_rate=RATE_MIN,
+        max_rate=RATE_MAX_GLOBAL,
+        per_host_max=RATE_MAX_PER_HOST,
+        increase_step=RATE_INCREASE_STEP,
+        decrease_factor=RATE_DECREASE_FACTOR,
+    )
 
-        # Logique de sauvegarde et de progression (protégée par un verrou)
-        async with progress_lock:
-            completed_tasks_counter += 1
-            current_progress = completed_tasks_counter
-    
-            if movie_data.get("film_name") and movie_data.get("film_name") != "":
-                all_data.append(movie_data)
-                
-                # Sauvegarde immédiate après le succès
-                write_progressive_exports(all_data, keys) 
-                
-                status = "✅ Succès"
-                if movie_data["avg_rating"] == 0.0 or movie_data["ratings_count"] == 0:
-                    status = "⚠️ Succès (Stats Manquantes)"
-                    
-                print(f"{status} [{current_progress}/{total_links}]: "
-                      f"{movie_data['film_name']} -> SAUVEGARDÉ!")
-
-            else:
-                all_data.append(error_data) # Ajout de la ligne d'erreur/404
-                write_progressive_exports(all_data, keys)
-                print(f"⚠️ Ignoré [{current_progress}/{total_links}]: Titre manquant "
-                      f"(probablement 404) pour {link}. -> SAUVEGARDÉ!")
 
+async def scrape_movie(session: ScrapingSession, link: str, attempt: int = 1):
+    """
+    Tâche asynchrone pour scraper un seul film : téléchargement, analyse dans
+    la pool, puis remise du résultat à la tâche d'écriture. Un échec
+    transitoire est replanifié ; un échec définitif part dans le fichier
+    des échecs.
+    """
+    rate_controller = session.rate_controller
+    retry_policy = session.retries.policy
+
+    try:
+        html = await get_html(session, link)
+        movie_data = await parse_html(session, html, link)
     except Exception as e:
-        # Erreur critique (Timeout, réseau, etc.)
-        async with progress_lock:
-            completed_tasks_counter += 1
-            current_progress = completed_tasks_counter
-            all_data.append(error_data) # Ajout de la ligne d'erreur
-            write_progressive_exports(all_data, keys)
-        
-        print(f"❌ ERREUR CRITIQUE [{current_progress}/{total_links}] sur {link}: "
-              f"{e.__class__.__name__}. Ajout de la ligne d'erreur. -> SAUVEGARDÉ!")
-    
-    # Pause cruciale pour limiter le débit
-    pause_time = random.uniform(SAFE_PAUSE_MIN, SAFE_PAUSE_MAX) 
-    await asyncio.sleep(pause_time)
+        session.metrics.record_attempt(error=True)
+        # Erreur transitoire (Timeout, réseau, 429, etc.) : nouvelle tentative
+        if retry_policy.can_retry(attempt):
+            session.metrics.increment("retry")
+            delay = session.retries.schedule(link, attempt)
+            print(f"🔁 Échec {attempt}/{retry_policy.max_attempts} sur {link}: "
+                  f"{e.__class__.__name__}. Nouvelle tentative dans {delay:.0f} s "
+                  f"(débit {rate_controller.describe()})")
+            return
+        outcome = ScrapeOutcome(link, STATUS_NETWORK_ERROR, attempt,
+                                reason=describe_failure(e))
+    else:
+        session.metrics.record_attempt(error=False)
+        if movie_data.get("film_name") and movie_data.get("film_name") != "":
+            outcome = ScrapeOutcome(link, STATUS_OK, attempt, movie_data=movie_data,
+                                    identity=extract_film_identity(html, link))
+        else:
+            # Vraie 404 : échec définitif, inutile de réessayer
+            outcome = ScrapeOutcome(link, STATUS_NOT_FOUND, attempt,
+                                    reason=describe_failure(None))
+    await session.results.put(outcome)
+
+
+async def write_outcome(session: ScrapingSession, outcome: ScrapeOutcome):
+    """Écrit un résultat (exports ou fichier des échecs) et affiche la progression."""
+    global completed_tasks_counter
+    async with progress_lock:
+        completed_tasks_counter += 1
+        current_progress = completed_tasks_counter
+    started = time.monotonic()
+    total_links = session.total_links
+    rate_controller = session.rate_controller
+
+    primary_url = (session.aliases.record(outcome.link, *outcome.identity)
+                   if outcome.status == STATUS_OK else outcome.link)
+    if primary_url != outcome.link:
+        # Autre URL d'un film déjà scrapé (slug redirigé) : pas de doublon exporté
+        session.checkpoint.mark(outcome.link, STATUS_ALIAS)
+        print(f"🔗 Alias [{current_progress}/{total_links}]: {outcome.link} "
+              f"-> {primary_url} (déjà scrapé, ignoré)")
+
+    elif outcome.status == STATUS_OK:
+        movie_data = outcome.movie_data
+        # Sauvegarde immédiate après le succès (ajout d'une seule ligne)
+        save_result(session.sink, session.checkpoint, movie_data, STATUS_OK)
+
+        status = "✅ Succès"
+        if movie_data["avg_rating"] == 0.0 or movie_data["ratings_count"] == 0:
+            status = "⚠️ Succès (Stats Manquantes)"
+
+        print(f"{status} [{current_progress}/{total_links}]: "
+              f"{movie_data['film_name']} -> SAUVEGARDÉ! "
+              f"(débit {rate_controller.describe()})")
+
+    elif outcome.status == STATUS_NOT_FOUND:
+        record_failure(session, outcome.link, outcome.status, outcome.reason,
+                       outcome.attempts)
+        print(f"⚠️ Ignoré [{current_progress}/{total_links}]: Titre manquant "
+              f"(probablement 404) pour {outcome.link}. -> {DEAD_LETTER_PATH}")
+
+    else:
+        record_failure(session, outcome.link, outcome.status, outcome.reason,
+                       outcome.attempts)
+        print(f"❌ ERREUR CRITIQUE [{current_progress}/{total_links}] sur {outcome.link}: "
+              f"{outcome.reason} après {outcome.attempts} tentatives. "
+              f"-> {DEAD_LETTER_PATH} (débit {rate_controller.describe()})")
+
+    # Les exports sont toujours fsyncés AVANT la validation du checkpoint.
+    # Le fsync part dans un thread : les workers continuent pendant l'écriture.
+    if session.checkpoint.pending >= FSYNC_EVERY:
+        await asyncio.to_thread(session.sink.flush)
+        session.checkpoint.commit()
+    session.metrics.observe("write", time.monotonic() - started)
+    session.metrics.record_completion(STATUS_ALIAS if primary_url != outcome.link
+                                      else outcome.status)
+
+
+async def write_results(session: ScrapingSession):
+    """Seule tâche qui écrit sur disque, jusqu'au marqueur de fin (None)."""
+    while True:
+        outcome: Optional[ScrapeOutcome] = await session.results.get()
+        try:
+            if outcome is None:
+                return
+            await write_outcome(session, outcome)
+        finally:
+            session.results.task_done()
+
+
+async def monitor_loop_lag(stats: Dict[str, float], interval: float = 0.1):
+    """Mesure le retard de la boucle asyncio (un traitement bloquant le fait grimper)."""
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        stats["max"] = max(stats["max"], loop.time() - started - interval)
+
+
+def export_metrics(session: ScrapingSession, queue: asyncio.Queue,
+                   in_flight: Set[str]) -> Dict[str, Any]:
+    """Exporte un instantané des métriques avec la profondeur des files."""
+    gauges = {
+        "queue_links": queue.qsize(),
+        "queue_results": session.results.qsize(),
+        "in_flight": len(in_flight),
+        "retries_waiting": session.retries.waiting,
+        "rate_requests_per_second": session.rate_controller.current_rate,
+    }
+    return session.metrics.export(METRICS_PROM_PATH, METRICS_JSONL_PATH, gauges)
+
+
+async def report_metrics(session: ScrapingSession, queue: asyncio.Queue,
+                         in_flight: Set[str]):
+    """Exporte et affiche les métriques toutes les METRICS_INTERVAL_S secondes."""
+    while True:
+        await asyncio.sleep(METRICS_INTERVAL_S)
+        snapshot = export_metrics(session, queue, in_flight)
+        print(f"📈 {describe_snapshot(snapshot)}")
+
+
+def is_known_alias(checkpoint: CheckpointIndex, aliases: FilmAliasIndex, link: str) -> bool:
+    """Vrai si `link` est une autre URL d'un film déjà scrapé (checkpoint ou index des alias)."""
+    return (checkpoint.status(link) == STATUS_ALIAS
+            or aliases.duplicate_of(link) is not None)
 
 
-async def main():
-    """Fonction principale pour lire les liens, gérer la reprise et lancer le scraping."""
-    links = read_all_links(LINKS_FILE_PATH, SCRAPING_LIMIT)
-    total_links = len(links)
+def forget_unexported(checkpoint: Any, jsonl_path: str, own_only: bool = False) -> int:
+    """
+    Après une écriture interrompue (ligne coupée), remet à traiter les films
+    validés `ok` dont le JSONL n'a plus de ligne complète. Retourne leur nombre.
+    """
+    exported = {record.get("film_url") for record in iter_jsonl_records(jsonl_path)}
+    ok_urls = (checkpoint.urls_with_status(STATUS_OK, own_only=True) if own_only
+               else checkpoint.urls_with_status(STATUS_OK))
+    lost = [url for url in ok_urls if url not in exported]
+    for url in lost:
+        checkpoint.forget(url)
+    checkpoint.commit()
+    if lost:
+        print(f"🔁 {len(lost)} film(s) validé(s) sans ligne complète : à traiter à nouveau.")
+    return len(lost)
+
+
+def skip_known_aliases(session: ScrapingSession, links: Iterator[str]) -> Iterator[str]:
+    """
+    Écarte AVANT téléchargement les URLs connues comme alias d'un film déjà
+    scrapé (vues lors d'un run précédent) : statut `alias` dans le checkpoint.
+    """
+    for link in links:
+        primary_url = session.aliases.duplicate_of(link)
+        if primary_url is None:
+            yield link
+            continue
+        session.checkpoint.mark(link, STATUS_ALIAS)
+        session.metrics.record_completion(STATUS_ALIAS)
+        print(f"🔗 Alias ignoré sans téléchargement : {link} -> {primary_url}")
+
+
+async def produce_links(queue: asyncio.Queue, links: Iterator[str]):
+    """Alimente la file au fil de l'eau (bloque tant qu'elle est pleine)."""
+    for link in links:
+        await queue.put((link, 1))
+
+
+async def produce_leased_links(queue: asyncio.Queue, session: ScrapingSession,
+                               batch_size: int):
+    """
+    Mode distribué : réserve les liens par petits lots dans la table partagée.
+    S'arrête quand plus aucun lien n'est disponible ni réservé par un autre
+    worker (un bail expiré d'un worker arrêté est repris ici).
+    """
+    work: WorkTable = session.checkpoint
+    while True:
+        links = work.claim(batch_size)
+        abandoned = work.take_abandoned()
+        for link in abandoned:
+            record_failure(session, link, STATUS_NETWORK_ERROR,
+                           f"bail expiré {work.max_claims} fois (worker arrêté sur cette page)",
+                           work.max_claims)
+            print(f"☠️ Abandon de {link} : réservé {work.max_claims + 1} fois sans succès.")
+        if not links and not abandoned:
+            if work.pending:
+                # Rien à réserver : on valide tout de suite nos statuts, sans
+                # attendre le lot suivant, pour que les autres workers sachent
+                # que ces liens sont terminés (shard fsyncé d'abord).
+                session.sink.flush()
+                work.commit()
+            if work.unfinished_elsewhere() == 0:
+                return
+            await asyncio.sleep(WORK_POLL_S)
+            continue
+        for link in skip_known_aliases(session, links):
+            await queue.put((link, 1))
+
+
+async def renew_leases(work: WorkTable):
+    """Battement de cœur : prolonge les baux des liens détenus par ce worker."""
+    while True:
+        await asyncio.sleep(work.lease_seconds / 3)
+        work.renew()
+
+
+async def worker(queue: asyncio.Queue, session: ScrapingSession,
+                 in_flight: Set[str]):
+    """Consomme les couples (lien, n° de tentative) de la file jusqu'à l'annulation."""
+    while True:
+        link, attempt = await queue.get()
+        try:
+            in_flight.add(link)
+            await scrape_movie(session, link, attempt)
+            in_flight.discard(link)
+        finally:
+            queue.task_done()
+
+
+async def main(retry_failed: bool = False, worker_id: Optional[str] = None):
+    """
+    Fonction principale pour gérer la reprise et lancer le scraping.
+    retry_failed=True : ne relance que les films en échec réseau du checkpoint.
+    worker_id : mode distribué, les liens sont réservés dans WORK_DB_PATH et
+    les résultats écrits dans les fichiers du worker (voir `worker_shard_paths`).
+    """
     keys = get_default_movie_keys()  # Obtenir les clés pour le CSV
+    checkpoint: Any
+    if worker_id is not None:
+        # La table de travail partagée tient lieu d'index de reprise
+        checkpoint = WorkTable(WORK_DB_PATH, worker_id, LEASE_SECONDS,
+                               journal_mode=WORK_DB_JOURNAL_MODE,
+                               max_claims=WORK_MAX_CLAIMS)
+    else:
+        checkpoint = CheckpointIndex(CHECKPOINT_DB_PATH)
 
-    if total_links == 0:
-        print("Aucun lien trouvé. Arrêt.")
-        return
+        # --- Reprise (chargement du seul index de checkpoint) ---
+        migrated = migrate_legacy_json(JSON_FILE_PATH, JSONL_FILE_PATH)
+        if migrated:
+            print(f"🔁 Migration : {migrated} résultats convertis de "
+                  f"{JSON_FILE_PATH} vers {JSONL_FILE_PATH}.")
+        if checkpoint.is_empty():
+            seeded = seed_from_records(checkpoint, iter_jsonl_records(JSONL_FILE_PATH))
+            if seeded:
+                print(f"🔁 Index de reprise initialisé avec {seeded} URLs depuis "
+                      f"{JSONL_FILE_PATH}.")
+
+    links: Optional[Iterator[str]] = None
+    if worker_id is not None:
+        total_links = checkpoint.count()
+        if checkpoint.unfinished() == 0:
+            print(f"Aucun lien à traiter dans {WORK_DB_PATH} "
+                  f"{checkpoint.status_counts()} (lancez --init-work). Arrêt.")
+            checkpoint.close()
+            return
+        global completed_tasks_counter
+        completed_tasks_counter = total_links - checkpoint.unfinished()
+        print(f"🛰️ Worker {worker_id} : {WORK_DB_PATH} {checkpoint.status_counts()}, "
+              f"résultats dans {JSONL_FILE_PATH}.")
+    elif retry_failed:
+        # Passe de réparation : uniquement les échecs réseau déjà enregistrés
+        failed = checkpoint.urls_with_status(STATUS_NETWORK_ERROR)
+        total_links = len(failed)
+        links = iter(failed)
+        if total_links == 0:
+            print(f"Aucun échec réseau dans {CHECKPOINT_DB_PATH}. Arrêt.")
+            checkpoint.close()
+            return
+        print(f"🔁 Relance de {total_links} films en échec réseau "
+              f"{checkpoint.status_counts()}.")
+    else:
+        done = checkpoint.count()
+        try:
+            total_links = count_links(LINKS_FILE_PATH, SCRAPING_LIMIT)
+        except FileNotFoundError:
+            print(f"❌ Erreur: Le fichier '{LINKS_FILE_PATH}' est introuvable.")
+            checkpoint.close()
+            return
 
-    print(f"{total_links} liens trouvés. Démarrage du scraping parallèle "
-          f"(max {CONCURRENT_REQUESTS} requêtes concurrentes)...")
+        if total_links == 0:
+            print("Aucun lien trouvé. Arrêt.")
+            checkpoint.close()
+            return
 
-    # --- Reprise (Tentative de chargement des données existantes) ---
-    all_data: List[Dict] = []
+        if done:
+            completed_tasks_counter = done
+            print(f"✅ Reprise : {done} URLs déjà traitées d'après "
+                  f"{CHECKPOINT_DB_PATH} {checkpoint.status_counts()}.")
+        else:
+            print(f"Démarrage à zéro: L'index {CHECKPOINT_DB_PATH} est vide.")
+        # Les liens restants sont lus paresseusement et comparés à l'index
+        # SQLite (aucun ensemble d'URLs en mémoire) : mémoire constante.
+        links = iter_remaining_links(LINKS_FILE_PATH, SCRAPING_LIMIT, checkpoint)
+
+    rate_controller = build_rate_controller()
+    html_cache = HtmlCache(HTML_CACHE_DIR, HTML_CACHE_MAX_BYTES)
+    # Nettoyage des écritures interrompues et application du budget disque
+    # (pas en mode distribué : d'autres workers écrivent peut-être dans le cache)
+    cache_stats = html_cache.compact() if worker_id is None else {}
+    print(f"🗄️ Cache HTML : {html_cache.total_bytes / 1024 ** 2:.1f} Mo "
+          f"dans {HTML_CACHE_DIR} ({html_cache.codec}) {cache_stats}.")
+    print(f"{total_links} liens trouvés. Démarrage du scraping avec "
+          f"{CONCURRENT_REQUESTS} workers (débit {rate_controller.describe()})...")
+
+    # --- Démarrage du Crawler ---
+    sink = IncrementalExportSink(JSONL_FILE_PATH, CSV_FILE_PATH, keys,
+                                 fsync_every=FSYNC_EVERY)
+    if sink.interrupted:
+        # Films validés dont la ligne a été coupée : à traiter à nouveau
+        lost = forget_unexported(checkpoint, JSONL_FILE_PATH, own_only=worker_id is not None)
+        completed_tasks_counter = max(0, completed_tasks_counter - lost)
+    queue: asyncio.Queue = asyncio.Queue(
+        maxsize=CONCURRENT_REQUESTS * QUEUE_SIZE_PER_WORKER
+    )
+    retries = RetryScheduler(queue, RetryPolicy(
+        RETRY_MAX_ATTEMPTS, RETRY_BASE_DELAY_S, RETRY_MAX_DELAY_S
+    ))
+    dead_letters = DeadLetterLog(DEAD_LETTER_PATH)
+    # Résultats analysés, en attente de la tâche d'écriture
+    results: asyncio.Queue = asyncio.Queue(
+        maxsize=CONCURRENT_REQUESTS * QUEUE_SIZE_PER_WORKER
+    )
+    parse_executor = build_parse_executor()
+    in_flight: Set[str] = set()
+    tasks: List[asyncio.Task] = []
+    loop_lag = {"max": 0.0}
+    browser = LazyBrowser()
+    http_client = (build_http_client(HTTP_POOL_SIZE, HTTP_TIMEOUT_S)
+                   if FETCH_MODE == "tiered" else None)
+    # En mode --retry-failed, la progression ne porte que sur les films relancés
+    metrics = ScrapeMetrics(total_links,
+                            already_done=0 if retry_failed else completed_tasks_counter)
+    fetcher = TieredFetcher(rate_controller, browser.fetch, http_client, metrics=metrics)
+    aliases = FilmAliasIndex(FILM_ALIASES_DB_PATH)
+    session = ScrapingSession(fetcher, parse_executor, results, sink, checkpoint,
+                              rate_controller, html_cache, retries, dead_letters,
+                              total_links, metrics, aliases)
+    writer = asyncio.create_task(write_results(session))
     try:
-        with open(JSON_FILE_PATH, "r", encoding="utf-8") as f:
-            all_data = json.load(f)
-            global completed_tasks_counter
-            completed_tasks_counter = len(all_data)
-            print(f"✅ Reprise : {len(all_data)} résultats chargés depuis "
-                  f"{JSON_FILE_PATH}.")
+        tasks.append(asyncio.create_task(monitor_loop_lag(loop_lag)))
+        tasks.append(asyncio.create_task(report_metrics(session, queue, in_flight)))
+        tasks.extend(
+            asyncio.create_task(worker(queue, session, in_flight))
+            for _ in range(CONCURRENT_REQUESTS)
+        )
+        if worker_id is not None:
+            tasks.append(asyncio.create_task(renew_leases(checkpoint)))
+            await produce_leased_links(queue, session,
+                                       CONCURRENT_REQUESTS * QUEUE_SIZE_PER_WORKER)
+        else:
+            await produce_links(queue, skip_known_aliases(session, links))
+        # Fin : file vide et plus aucune nouvelle tentative en attente
+        await retries.drain()
+    finally:
+        # Arrêt propre (Ctrl-C) : annulation des workers puis sauvegarde
+        waiting = await retries.cancel()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        # La tâche d'écriture vide la file des résultats déjà analysés
+        await results.put(None)
+        await writer
+        parse_executor.shutdown(wait=True, cancel_futures=True)
+        final_metrics = export_metrics(session, queue, in_flight)
+        if in_flight or waiting:
+            print(f"\n⏸️ {len(in_flight)} films en cours et {len(waiting)} en attente "
+                  f"de nouvelle tentative : ils seront repris au prochain lancement.")
+        if worker_id is not None:
+            # Le shard sera consolidé par --merge-shards ; les liens encore
+            # réservés sont rendus aux autres workers par `close()`.
+            sink.close()
+            total_rows = checkpoint.worker_counts().get(worker_id, 0)
+        else:
+            # Construction unique du JSON consolidé (même en cas d'interruption)
+            total_rows = sink.finalize(JSON_FILE_PATH)
+            write_parquet_export()
+        aliases.close()
+        checkpoint_summary = checkpoint.status_counts()
+        checkpoint.close()
+        dead_letters.close()
+        html_cache.close()
+        if http_client is not None:
+            await http_client.aclose()
+        browser_summary = browser.describe()
+        await browser.close()
+        print(f"🌐 Pages récupérées : {fetcher.describe()}.")
+        if browser_summary:
+            print(f"🦊 Navigateur, {browser_summary}.")
+        print(f"⏱️ Retard max de la boucle asyncio : {loop_lag['max'] * 1000:.0f} ms.")
+        print(f"📈 {describe_snapshot(final_metrics)}")
+
+    if worker_id is not None:
+        print(f"\n✨ Worker {worker_id} terminé. {total_rows} films traités par ce "
+              f"worker sur {total_links} liens {checkpoint_summary}. "
+              f"Fusion : python3 scraperletterboxd.py --merge-shards")
+        if checkpoint.lost:
+            print(f"⚠️ {checkpoint.lost} statut(s) non validé(s) : bail repris par un "
+                  f"autre worker.")
+        return
+    print(f"\n✨ Scraping Terminé. {total_rows} films exportés sur "
+          f"{total_links} liens totaux {checkpoint_summary}.")
+    print(f"Fichiers de sortie : **{JSON_FILE_PATH}** et **{CSV_FILE_PATH}** "
+          f"(consolidé à partir de **{JSONL_FILE_PATH}**).")
+
+
+# ====================================================================
+#              MODE DISTRIBUÉ (TABLE DE TRAVAIL PARTAGÉE)
+# ====================================================================
+
+def default_worker_id() -> str:
+    """Identifiant unique d'un worker : machine + processus."""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def worker_shard_paths(worker_id: str) -> Dict[str, str]:
+    """Fichiers de sortie propres à un worker (aucune écriture partagée)."""
+    base = os.path.join(SHARD_DIR, worker_id)
+    return {
+        "jsonl": base + ".jsonl",
+        "csv": base + ".csv",
+        "failed": base + ".failed.jsonl",
+        "metrics_prom": base + ".metrics.prom",
+        "metrics_jsonl": base + ".metrics.jsonl",
+    }
+
 
+def init_work():
+    """
+    Charge le fichier de liens dans la table de travail partagée (à lancer
+    une fois, avant les workers). Les liens déjà traités d'après le
+    checkpoint gardent leur statut : seuls les autres seront réservés.
+    """
+    checkpoint = CheckpointIndex(CHECKPOINT_DB_PATH)
+    aliases = FilmAliasIndex(FILM_ALIASES_DB_PATH)
+    work = WorkTable(WORK_DB_PATH, journal_mode=WORK_DB_JOURNAL_MODE)
+    try:
+        # Les alias connus ne sont jamais réservés par les workers
+        links = iter_remaining_links(LINKS_FILE_PATH, SCRAPING_LIMIT, set(),
+                                     skip=lambda link: is_known_alias(checkpoint, aliases,
+                                                                      link))
+        added = work.load((link, checkpoint.status(link) or WORK_PENDING)
+                          for link in links)
+        summary = work.status_counts()
     except FileNotFoundError:
-        print(f"Démarrage à zéro: Le fichier {JSON_FILE_PATH} n'existe pas encore.")
-    except json.JSONDecodeError:
-        print("⚠️ ERREUR : Le fichier JSON est corrompu. Démarrage à zéro.")
-   
-    
-    #  Filtrer la liste pour reprendre après le dernier lien traité
-    links_to_scrape = links[len(all_data):]
-    if not links_to_scrape:
-        print("Toutes les URLs ont déjà été traitées. Le scraping est terminé.")
+        print(f"❌ Erreur: Le fichier '{LINKS_FILE_PATH}' est introuvable.")
         return
-    
-    print(f"Reprise du scraping au lien n°{len(all_data) + 1}. "
-          f"{len(links_to_scrape)} liens restants à traiter.")
-    
-    # --- Démarrage du Crawler ---
-    async with AsyncWebCrawler(
-        browser='firefox',
-        max_concurrent_requests=CONCURRENT_REQUESTS
-    ) as crawler:
-        tasks = [
-            scrape_movie(crawler, link, all_data, total_links, keys) 
-            for link in links_to_scrape
-        ]
-        
-        await asyncio.gather(*tasks)
+    finally:
+        work.close()
+        aliases.close()
+        checkpoint.close()
+    print(f"🛰️ {added} liens ajoutés à {WORK_DB_PATH} {summary}. Lancez les "
+          f"workers : python3 scraperletterboxd.py --worker")
 
-    print(f"\n✨ Scraping Terminé. {len(all_data)} lignes traitées sur "
-          f"{total_links} liens totaux.")
-    print(f"Fichiers de sortie : **{JSON_FILE_PATH}** et **{CSV_FILE_PATH}** "
-          f"(progressivement mis à jour).")
+
+def merge_shards():
+    """
+    Fusionne les sorties des workers dans les exports principaux : films
+    ajoutés au JSONL, échecs au fichier des échecs, statuts au checkpoint,
+    puis consolidation (JSON, CSV, Parquet). Les shards fusionnés sont
+    déplacés dans SHARD_DIR/merged/ : une nouvelle fusion ne les relit pas.
+    """
+    shards = sorted(path for path in glob.glob(os.path.join(SHARD_DIR, "*.jsonl"))
+                    if not path.endswith((".failed.jsonl", ".metrics.jsonl")))
+    failed_shards = sorted(glob.glob(os.path.join(SHARD_DIR, "*.failed.jsonl")))
+    if not shards and not failed_shards:
+        print(f"Aucun shard à fusionner dans {SHARD_DIR}. Arrêt.")
+        return
+    merged_dir = os.path.join(SHARD_DIR, "merged")
+    os.makedirs(merged_dir, exist_ok=True)
+    keys = get_default_movie_keys()
+    checkpoint = CheckpointIndex(CHECKPOINT_DB_PATH)
+    sink = IncrementalExportSink(JSONL_FILE_PATH, CSV_FILE_PATH, keys,
+                                 fsync_every=FSYNC_EVERY * 20)
+    merged, failures = 0, 0
+    try:
+        for shard in shards:
+            for record in iter_jsonl_records(shard):
+                save_result(sink, checkpoint, record, status_for_record(record))
+                merged += 1
+        with open(DEAD_LETTER_PATH, "a", encoding="utf-8") as dead_letters:
+            for shard in failed_shards:
+                for entry in iter_jsonl_records(shard):
+                    dead_letters.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                    checkpoint.mark(entry["film_url"], entry["status"])
+                    failures += 1
+            dead_letters.flush()
+            os.fsync(dead_letters.fileno())
+        if os.path.exists(WORK_DB_PATH):
+            # Alias détectés par les workers : aucun film exporté pour ces URLs
+            work = WorkTable(WORK_DB_PATH, journal_mode=WORK_DB_JOURNAL_MODE)
+            for link in work.urls_with_status(STATUS_ALIAS):
+                checkpoint.mark(link, STATUS_ALIAS)
+            work.close()
+        # Exports sur disque AVANT le checkpoint, puis shards mis de côté
+        sink.flush()
+        checkpoint.commit()
+        csv_shards = [shard[:-len(".jsonl")] + ".csv" for shard in shards]
+        for path in shards + csv_shards + failed_shards:
+            if os.path.exists(path):
+                shutil.move(path, os.path.join(merged_dir, os.path.basename(path)))
+        total_rows = sink.finalize(JSON_FILE_PATH)
+        write_parquet_export()
+        checkpoint_summary = checkpoint.status_counts()
+    finally:
+        sink.close()
+        checkpoint.close()
+
+    if os.path.exists(WORK_DB_PATH):
+        work = WorkTable(WORK_DB_PATH, journal_mode=WORK_DB_JOURNAL_MODE)
+        print(f"🧩 Films traités par worker : {work.worker_counts()}.")
+        print(f"🛰️ Table de travail {WORK_DB_PATH} : {work.status_counts()}.")
+        work.close()
+    print(f"\n✨ Fusion terminée : {merged} films et {failures} échecs depuis "
+          f"{len(shards) + len(failed_shards)} shards. {total_rows} films exportés "
+          f"{checkpoint_summary}.")
+    print(f"Fichiers de sortie : **{JSON_FILE_PATH}** et **{CSV_FILE_PATH}**.")
+
+
+# ====================================================================
+#             DÉDOUBLONNAGE DES FILMS DÉJÀ EXPORTÉS (ALIAS D'URL)
+# ====================================================================
+
+def dedup_films():
+    """
+    Passe unique sur les exports existants : chaque film n'est gardé que
+    sous sa première URL. L'identité d'un film vient de l'index des alias,
+    sinon de sa page dans le cache HTML (URL canonique, ID interne). Les
+    URLs écartées passent au statut `alias` dans le checkpoint : elles ne
+    seront plus téléchargées. Le JSONL est réécrit (un film par ligne),
+    puis JSON, CSV et Parquet sont reconstruits.
+    """
+    aliases = FilmAliasIndex(FILM_ALIASES_DB_PATH)
+    html_cache = HtmlCache(HTML_CACHE_DIR, HTML_CACHE_MAX_BYTES)
+    checkpoint = CheckpointIndex(CHECKPOINT_DB_PATH)
+    kept, duplicates, without_page = 0, 0, 0
+    tmp_path = JSONL_FILE_PATH + ".dedup.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as out:
+            for record in iter_final_records(JSONL_FILE_PATH):
+                link = record["film_url"]
+                primary_url = aliases.duplicate_of(link)
+                if primary_url is None:
+                    html = html_cache.get(link)
+                    if html is None:
+                        without_page += 1
+                        primary_url = link
+                    else:
+                        primary_url = aliases.record(link, *extract_film_identity(html, link))
+                if primary_url != link:
+                    checkpoint.mark(link, STATUS_ALIAS)
+                    duplicates += 1
+                    print(f"🔗 Doublon retiré : {link} -> {primary_url}")
+                    continue
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                kept += 1
+            out.flush()
+            os.fsync(out.fileno())
+        # JSONL réécrit sur disque AVANT le checkpoint
+        os.replace(tmp_path, JSONL_FILE_PATH)
+        checkpoint.commit()
+        sink = IncrementalExportSink(JSONL_FILE_PATH, CSV_FILE_PATH,
+                                     get_default_movie_keys())
+        total_rows = sink.finalize(JSON_FILE_PATH)
+        write_parquet_export()
+        checkpoint_summary = checkpoint.status_counts()
+        alias_summary = aliases.counts()
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        checkpoint.close()
+        html_cache.close()
+        aliases.close()
+
+    print(f"\n✨ Dédoublonnage terminé : {duplicates} doublons retirés, {total_rows} films "
+          f"exportés {checkpoint_summary} ({without_page} films absents du cache, "
+          f"identité inconnue). Index {FILM_ALIASES_DB_PATH} : {alias_summary}.")
+
+
+# ====================================================================
+#           RAFRAÎCHISSEMENT DES STATISTIQUES (BUDGET DE REQUÊTES)
+# ====================================================================
+
+async def refresh_film(session: FetchSession, history: StatsHistory,
+                       link: str, counts: Dict[str, int]):
+    """Re-télécharge un film, n'extrait que ses statistiques et ajoute un relevé."""
+    try:
+        html = await get_html(session, link, use_cache=False)
+        movie_data = await parse_html(session, html, link, STATS_FIELDS)
+    except Exception as e:
+        # Pas de nouvelle tentative : le film reste prioritaire au prochain passage
+        session.metrics.record_attempt(error=True)
+        counts["errors"] += 1
+        print(f"❌ Échec du rafraîchissement de {link}: {describe_failure(e)}")
+        return
+    session.metrics.record_attempt(error=False)
+    stats = stats_of(movie_data)
+    if not movie_data.get("film_name") or not any(stats):
+        # 404 ou bloc de statistiques absent : aucun relevé plutôt qu'un faux zéro
+        counts["missing"] += 1
+        return
+    change = history.record(link, stats)
+    counts["refreshed"] += 1
+    if change:
+        counts["changed"] += 1
+    session.metrics.record_completion(STATUS_OK)
+    print(f"📊 [{counts['refreshed']}/{session.total_links}] "
+          f"{movie_data['film_name']} : {stats[1]} notes, {stats[2]} vues "
+          f"(variation {(change or 0.0) * 100:.2f} %)")
+    if history.pending >= FSYNC_EVERY:
+        history.commit()
+
+
+async def refresh(budget: int):
+    """
+    Passage de rafraîchissement : intègre les derniers films scrapés à
+    l'historique, puis re-télécharge au plus `budget` films, les plus
+    volatils et les plus anciens d'abord, et ajoute leurs statistiques
+    aux séries temporelles (STATS_HISTORY_DB_PATH). Les exports ne sont
+    pas modifiés.
+    """
+    history = StatsHistory(STATS_HISTORY_DB_PATH)
+    with CheckpointIndex(CHECKPOINT_DB_PATH) as checkpoint:
+        synced = history.sync_records(JSONL_FILE_PATH, checkpoint.updated_at)
+    if synced:
+        print(f"🔁 {synced} films de {JSONL_FILE_PATH} intégrés à {STATS_HISTORY_DB_PATH}.")
+    now = time.time()
+    due = history.select_due(budget, now, REFRESH_MIN_INTERVAL_H * 3600)
+    if not due:
+        print(f"Aucun film à rafraîchir dans {STATS_HISTORY_DB_PATH} "
+              f"{history.counts()}. Arrêt.")
+        history.close()
+        return
+    total_drift = history.total_drift(now)
+    covered = sum(drift for _, drift in due)
+    print(f"📊 Rafraîchissement de {len(due)} films sur {history.counts()['films']} "
+          f"(dérive attendue couverte : {covered / total_drift * 100 if total_drift else 0:.0f} %).")
+
+    rate_controller = build_rate_controller()
+    html_cache = HtmlCache(HTML_CACHE_DIR, HTML_CACHE_MAX_BYTES)
+    parse_executor = build_parse_executor()
+    browser = LazyBrowser()
+    http_client = (build_http_client(HTTP_POOL_SIZE, HTTP_TIMEOUT_S)
+                   if FETCH_MODE == "tiered" else None)
+    metrics = ScrapeMetrics(len(due))
+    fetcher = TieredFetcher(rate_controller, browser.fetch, http_client, metrics=metrics)
+    # Ni exports, ni checkpoint, ni nouvelles tentatives : téléchargement et analyse seuls
+    session = FetchSession(fetcher, parse_executor, rate_controller, html_cache,
+                           len(due), metrics)
+    queue: asyncio.Queue = asyncio.Queue()
+    for link, _ in due:
+        queue.put_nowait(link)
+    counts = {"refreshed": 0, "changed": 0, "missing": 0, "errors": 0}
+
+    async def refresh_worker():
+        while not queue.empty():
+            await refresh_film(session, history, queue.get_nowait(), counts)
+
+    try:
+        await asyncio.gather(*(refresh_worker() for _ in range(CONCURRENT_REQUESTS)))
+    finally:
+        parse_executor.shutdown(wait=True, cancel_futures=True)
+        most_volatile = history.most_volatile(5)
+        history.close()
+        html_cache.close()
+        if http_client is not None:
+            await http_client.aclose()
+        browser_summary = browser.describe()
+        await browser.close()
+        print(f"🌐 Pages récupérées : {fetcher.describe()}.")
+        if browser_summary:
+            print(f"🦊 Navigateur, {browser_summary}.")
+
+    print(f"\n✨ Rafraîchissement terminé : {counts['refreshed']} relevés "
+          f"({counts['changed']} avec variation), {counts['missing']} pages sans "
+          f"statistiques, {counts['errors']} échecs.")
+    for film_url, volatility, snapshots in most_volatile:
+        print(f"  📈 {film_url} : {volatility * 100:.2f} %/jour ({snapshots} relevés)")
+
+
+# ====================================================================
+#                     RÉ-EXTRACTION HORS LIGNE (CACHE HTML)
+# ====================================================================
+
+# Cache et champs demandés, fixés une fois par processus de la pool
+# (voir `_init_reextract_worker`)
+_worker_html_cache: Optional[HtmlCache] = None
+_worker_fields: Optional[FrozenSet[str]] = None
+
+
+def _init_reextract_worker(cache_dir: str, extractor_backend: str,
+                           fields: Optional[FrozenSet[str]] = None):
+    global _worker_html_cache, _worker_fields, EXTRACTOR_BACKEND
+    # Lecture seule : les processus de la pool n'écrivent pas dans l'index
+    _worker_html_cache = HtmlCache(cache_dir, HTML_CACHE_MAX_BYTES, track_access=False)
+    _worker_fields = fields
+    EXTRACTOR_BACKEND = extractor_backend
+
+
+def _reextract_one(link: str) -> Optional[Dict[str, Any]]:
+    """Exécuté dans un processus de la pool : lit le HTML en cache et l'analyse."""
+    html = _worker_html_cache.get(link)
+    if html is None:
+        return None
+    return run_extractor(html, link, _worker_fields)
+
+
+def iter_ordered_results(executor: ProcessPoolExecutor, records: Iterator[Dict[str, Any]],
+                         window: int) -> Iterator[Tuple[Dict[str, Any], Optional[Dict]]]:
+    """
+    Soumet les films à la pool avec une fenêtre bornée et rend les couples
+    (ancien enregistrement, ré-extraction) dans l'ordre d'entrée (sortie
+    déterministe, mémoire constante).
+    """
+    pending: Deque[Tuple[Dict[str, Any], Future]] = deque()
+    for record in records:
+        pending.append((record, executor.submit(_reextract_one, record["film_url"])))
+        if len(pending) >= window:
+            done_record, future = pending.popleft()
+            yield done_record, future.result()
+    while pending:
+        done_record, future = pending.popleft()
+        yield done_record, future.result()
+
+
+def reextract(workers: Optional[int] = None, fields: Optional[FrozenSet[str]] = None):
+    """
+    Ré-applique `extract_movie_data` à chaque film déjà exporté dont la page
+    est dans le cache HTML, dans l'ordre du JSONL, sans aucune requête
+    réseau. Un film absent du cache (scrapé avant le cache, évincé, venu
+    d'un shard) ou dont la page en cache n'a pas de titre garde son
+    enregistrement actuel : aucun film n'est perdu. Les exports sont
+    réécrits dans des fichiers temporaires, remplacés seulement à la fin
+    de la passe (un arrêt en cours de route laisse les anciens intacts).
+    fields : seuls ces champs sont extraits, dans les fichiers projetés
+    (PROJECTED_JSONL_FILE_PATH / PROJECTED_CSV_FILE_PATH).
+    """
+    workers = workers or os.cpu_count() or 1
+    if fields is None:
+        keys = get_default_movie_keys()
+        jsonl_path, csv_path = JSONL_FILE_PATH, CSV_FILE_PATH
+    else:
+        keys = projected_keys(fields)
+        jsonl_path, csv_path = PROJECTED_JSONL_FILE_PATH, PROJECTED_CSV_FILE_PATH
+    print(f"🔁 Ré-extraction depuis {HTML_CACHE_DIR} avec {workers} processus "
+          f"(extracteur {EXTRACTOR_BACKEND}, champs : "
+          f"{'tous' if fields is None else ', '.join(keys)})...")
+
+    started = time.monotonic()
+    extracted, missing, not_found, duplicates = 0, 0, 0, 0
+    checkpoint = CheckpointIndex(CHECKPOINT_DB_PATH)
+    aliases = FilmAliasIndex(FILM_ALIASES_DB_PATH)
+
+    def unique_records() -> Iterator[Dict[str, Any]]:
+        """Films exportés, sans les alias d'un film déjà exporté (slug redirigé)."""
+        nonlocal duplicates
+        for record in iter_final_records(JSONL_FILE_PATH):
+            if is_known_alias(checkpoint, aliases, record["film_url"]):
+                duplicates += 1
+                continue
+            yield record
+
+    tmp_jsonl_path, tmp_csv_path = jsonl_path + ".reextract.tmp", csv_path + ".reextract.tmp"
+    sink = IncrementalExportSink(tmp_jsonl_path, tmp_csv_path, keys,
+                                 fsync_every=FSYNC_EVERY * 20, truncate=True)
+    try:
+        with ProcessPoolExecutor(max_workers=workers,
+                                 initializer=_init_reextract_worker,
+                                 initargs=(HTML_CACHE_DIR, EXTRACTOR_BACKEND,
+                                           fields)) as executor:
+            for record, movie_data in iter_ordered_results(executor, unique_records(),
+                                                           window=workers * 8):
+                if movie_data is None or not movie_data.get("film_name"):
+                    # Page absente du cache, ou page en cache sans titre :
+                    # l'enregistrement actuel est conservé tel quel
+                    if movie_data is None:
+                        missing += 1
+                    else:
+                        not_found += 1
+                    sink.write(project_record(record, fields))
+                    continue
+                sink.write(movie_data)
+                extracted += 1
+                if extracted % 500 == 0:
+                    print(f"  {extracted} films ré-extraits "
+                          f"({extracted / (time.monotonic() - started):.0f} films/s)")
+        # Passe complète : fichiers sur disque, puis remplacement atomique
+        sink.close()
+        os.replace(tmp_jsonl_path, jsonl_path)
+        os.replace(tmp_csv_path, csv_path)
+    finally:
+        sink.close()
+        for path in (tmp_jsonl_path, tmp_csv_path):
+            if os.path.exists(path):
+                os.remove(path)
+        aliases.close()
+        checkpoint.close()
+
+    if fields is None:
+        total_rows = IncrementalExportSink(jsonl_path, csv_path, keys).finalize(JSON_FILE_PATH)
+        write_parquet_export()
+    else:
+        # Une ligne par film : rien à consolider
+        total_rows = extracted + missing + not_found
+        print(f"📁 Champs projetés écrits dans {csv_path} et {jsonl_path}.")
+
+    print(f"\n✨ Ré-extraction terminée : {total_rows} lignes en "
+          f"{time.monotonic() - started:.1f} s ({extracted} films ré-extraits, "
+          f"{missing} absents du cache et {not_found} pages en cache sans titre "
+          f"conservés tels quels, {duplicates} alias écartés).")
 
 
 # ====================================================================
 #                                  RUN
 # ====================================================================
 
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Scraper des pages de films Letterboxd.")
+    parser.add_argument("--reextract", action="store_true",
+                        help="Ré-extrait les données depuis le cache HTML, sans réseau.")
+    parser.add_argument("--refresh", type=int, nargs="?", const=REFRESH_BUDGET,
+                        metavar="BUDGET",
+                        help=f"Re-télécharge les statistiques des films les plus volatils, "
+                             f"au plus BUDGET requêtes (défaut : {REFRESH_BUDGET}), "
+                             f"historique dans {STATS_HISTORY_DB_PATH}.")
+    parser.add_argument("--retry-failed", action="store_true",
+                        help=f"Relance uniquement les films en échec réseau "
+                             f"(voir {DEAD_LETTER_PATH}).")
+    projection = parser.add_mutually_exclusive_group()
+    projection.add_argument("--fields",
+                            help="Avec --reextract : champs à extraire, séparés par "
+                                 "des virgules (ex: avg_rating,ratings_count).")
+    projection.add_argument("--stats-only", action="store_true",
+                            help=f"Avec --reextract : uniquement {', '.join(STATS_FIELDS)}.")
+    parser.add_argument("--dedup-films", action="store_true",
+                        help="Fusionne dans les exports les films scrapés sous plusieurs "
+                             "URLs (slugs redirigés), d'après le cache HTML.")
+    distributed = parser.add_mutually_exclusive_group()
+    distributed.add_argument("--init-work", action="store_true",
+                             help=f"Charge les liens dans la table partagée {WORK_DB_PATH}.")
+    distributed.add_argument("--worker", action="store_true",
+                             help="Worker distribué : réserve les liens dans la table "
+                                  f"partagée et écrit dans {SHARD_DIR}/.")
+    distributed.add_argument("--merge-shards", action="store_true",
+                             help=f"Fusionne les sorties des workers ({SHARD_DIR}/).")
+    parser.add_argument("--worker-id",
+                        help="Identifiant du worker (défaut : machine-pid).")
+    parser.add_argument("--workers", type=int, default=REEXTRACT_WORKERS,
+                        help="Nombre de processus pour --reextract (défaut : tous les cœurs).")
+    parser.add_argument("--extractor", choices=("bs4", "lxml"), default=EXTRACTOR_BACKEND,
+                        help="Backend d'extraction (défaut : %(default)s).")
+    parser.add_argument("--fetch-mode", choices=("tiered", "browser"), default=FETCH_MODE,
+                        help="HTTP puis navigateur si besoin, ou toujours le navigateur.")
+    parser.add_argument("--render-mode", choices=(RENDER_LEAN, RENDER_FULL),
+                        default=BROWSER_RENDER_MODE,
+                        help="Rendu navigateur allégé ou complet (défaut : %(default)s).")
+    parser.add_argument("--profile-every", type=int, default=PROFILE_EXTRACT_EVERY,
+                        help=f"Profile une extraction sur N avec cProfile, dans "
+                             f"{PROFILE_DIR}/ (0 = désactivé).")
+    parser.add_argument("--base-url", default=LETTERBOXD_BASE_URL,
+                        help="Hôte de remplacement, ex: http://127.0.0.1:8765 "
+                             "(mock_letterboxd_server.py).")
+    args = parser.parse_args()
+    fields = STATS_FIELDS if args.stats_only else (
+        [field.strip() for field in args.fields.split(",") if field.strip()]
+        if args.fields else None)
+    try:
+        args.fields = resolve_fields(fields)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.fields is not None and not args.reextract:
+        parser.error("--fields / --stats-only s'utilisent avec --reextract.")
+    if args.worker_id is not None and not args.worker:
+        parser.error("--worker-id s'utilise avec --worker.")
+    actions = [args.reextract, args.retry_failed, args.refresh is not None,
+               args.init_work, args.worker, args.merge_shards, args.dedup_films]
+    if sum(actions) > 1:
+        parser.error("Une seule action à la fois : --reextract, --retry-failed, --refresh, "
+                     "--init-work, --worker, --merge-shards ou --dedup-films.")
+    if args.refresh is not None and args.refresh < 1:
+        parser.error("--refresh : le budget doit être d'au moins 1 requête.")
+    return args
+
+
 if __name__ == "__main__":
+    args = parse_args()
+    EXTRACTOR_BACKEND = args.extractor
+    FETCH_MODE = args.fetch_mode
+    BROWSER_RENDER_MODE = args.render_mode
+    LETTERBOXD_BASE_URL = args.base_url
+    PROFILE_EXTRACT_EVERY = args.profile_every
     try:
-        # debug=False par défaut, c'est mieux pour la performance
-        asyncio.run(main())
+        if args.reextract:
+            reextract(args.workers, args.fields)
+        elif args.refresh is not None:
+            asyncio.run(refresh(args.refresh))
+        elif args.dedup_films:
+            dedup_films()
+        elif args.init_work:
+            init_work()
+        elif args.merge_shards:
+            merge_shards()
+        elif args.worker:
+            worker_id = args.worker_id or default_worker_id()
+            shard = worker_shard_paths(worker_id)
+            os.makedirs(SHARD_DIR, exist_ok=True)
+            JSONL_FILE_PATH = shard["jsonl"]
+            CSV_FILE_PATH = shard["csv"]
+            DEAD_LETTER_PATH = shard["failed"]
+            METRICS_PROM_PATH = shard["metrics_prom"]
+            METRICS_JSONL_PATH = shard["metrics_jsonl"]
+            asyncio.run(main(worker_id=worker_id))
+        else:
+            # debug=False par défaut, c'est mieux pour la performance
+            asyncio.run(main(retry_failed=args.retry_failed))
     except KeyboardInterrupt:
         print("\n\n👋 Scraping interrompu manuellement. Les données sont sauvegardées.")
     except Exception as e:
         print(f"\n\n🛑 Une erreur inattendue s'est produite lors de "
               f"l'exécution principale : {e}")
-              
\ No newline at end of file
@@ -0,0 +1,263 @@
+import json
+import os
+import sqlite3
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from file_offsets import iter_complete_lines, prefix_fingerprint
+from movie_fields import STATS_FIELDS, is_error_record
+
+# ====================================================================
+#       HISTORIQUE DES STATISTIQUES ET PLANIFICATION DES RAFRAÎCHISSEMENTS
+# ====================================================================
+# Les compteurs d'un film (notes, vues, likes, fans) bougent tous les jours
+# pour une sortie récente et presque plus pour un film des années 1950.
+# Chaque relevé est AJOUTÉ à une série temporelle (`snapshots`) au lieu
+# d'écraser le précédent, et chaque film garde une estimation de sa
+# volatilité : variation relative par jour, lissée (moyenne mobile
+# exponentielle). La priorité d'un film est la dérive attendue depuis son
+# dernier relevé (volatilité × jours écoulés) : un budget de requêtes est
+# dépensé d'abord sur les films les plus volatils et les plus anciens.
+
+DAY_S = 86400.0
+# Poids du dernier relevé dans la moyenne mobile de la volatilité.
+VOLATILITY_ALPHA = 0.5
+# Volatilité a priori (variation relative par jour) d'un film de l'année,
+# divisée par (1 + âge en années) pour les plus anciens.
+PRIOR_VOLATILITY_NEW = 0.05
+# Volatilité a priori quand l'année de sortie est inconnue.
+PRIOR_VOLATILITY_UNKNOWN = 0.01
+# Relevés intégrés entre deux validations lors de la synchronisation.
+COMMIT_EVERY = 5_000
+
+
+def prior_volatility(release_year: Optional[int], now: Optional[float] = None) -> float:
+    """Volatilité de départ d'un film, avant son deuxième relevé."""
+    if not release_year:
+        return PRIOR_VOLATILITY_UNKNOWN
+    current_year = time.gmtime(now if now is not None else time.time()).tm_year
+    age = max(0, current_year - int(release_year))
+    return PRIOR_VOLATILITY_NEW / (1 + age)
+
+
+def stats_of(record: Dict[str, Any]) -> Tuple[float, int, int, int, int]:
+    """Valeurs de STATS_FIELDS d'un enregistrement, dans l'ordre."""
+    return (float(record.get("avg_rating") or 0.0),
+            *(int(record.get(field) or 0) for field in STATS_FIELDS[1:]))
+
+
+def relative_change(previous: Tuple, current: Tuple) -> float:
+    """Plus forte variation relative entre deux relevés (0.02 = 2 %)."""
+    change = 0.0
+    for old, new in zip(previous, current):
+        old, new = old or 0, new or 0
+        change = max(change, abs(new - old) / max(abs(old), 1.0))
+    return change
+
+
+class StatsHistory:
+    """Séries temporelles des statistiques et état de rafraîchissement par film."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.pending = 0
+        self._conn = sqlite3.connect(db_path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS snapshots ("
+            " film_url TEXT NOT NULL,"
+            " fetched_at REAL NOT NULL,"
+            " avg_rating REAL,"
+            " ratings_count INTEGER,"
+            " views_count INTEGER,"
+            " likes_count INTEGER,"
+            " fans_count INTEGER,"
+            " PRIMARY KEY (film_url, fetched_at)) WITHOUT ROWID"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS refresh_state ("
+            " film_url TEXT PRIMARY KEY,"
+            " release_year INTEGER,"
+            " last_fetched REAL NOT NULL,"
+            " volatility REAL NOT NULL,"
+            " snapshots INTEGER NOT NULL)"
+        )
+        # Position déjà intégrée du JSONL du scraper
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS file_offsets ("
+            " path TEXT PRIMARY KEY,"
+            " offset INTEGER NOT NULL,"
+            " fingerprint TEXT)"
+        )
+        # Bases créées avant l'empreinte de la partie intégrée
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(file_offsets)")]
+        if "fingerprint" not in columns:
+            self._conn.execute("ALTER TABLE file_offsets ADD COLUMN fingerprint TEXT")
+        self._conn.commit()
+
+    # --- Relevés ---
+
+    def record(self, film_url: str, stats: Tuple, fetched_at: Optional[float] = None,
+               release_year: Optional[int] = None) -> Optional[float]:
+        """
+        Ajoute un relevé à la série du film et met à jour sa volatilité.
+        Retourne la variation relative depuis le relevé précédent (None pour
+        un premier relevé ou un relevé plus ancien que le dernier connu).
+        Validé par `commit()`.
+        """
+        fetched_at = fetched_at if fetched_at is not None else time.time()
+        cursor = self._conn.execute(
+            "INSERT OR IGNORE INTO snapshots VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (film_url, fetched_at, *stats),
+        )
+        if cursor.rowcount == 0:
+            return None
+        self.pending += 1
+        state = self._conn.execute(
+            "SELECT last_fetched, volatility FROM refresh_state WHERE film_url = ?",
+            (film_url,),
+        ).fetchone()
+        if state is None:
+            self._conn.execute(
+                "INSERT INTO refresh_state VALUES (?, ?, ?, ?, 1)",
+                (film_url, release_year, fetched_at,
+                 prior_volatility(release_year, fetched_at)),
+            )
+            return None
+        last_fetched, volatility = state
+        if fetched_at <= last_fetched:
+            return None
+        previous = self._conn.execute(
+            "SELECT avg_rating, ratings_count, views_count, likes_count, fans_count"
+            " FROM snapshots WHERE film_url = ? AND fetched_at = ?",
+            (film_url, last_fetched),
+        ).fetchone()
+        change = relative_change(previous, stats)
+        # Au moins une heure d'écart : deux relevés rapprochés ne gonflent pas le taux
+        days = max(fetched_at - last_fetched, 3600.0) / DAY_S
+        volatility = VOLATILITY_ALPHA * (change / days) + (1 - VOLATILITY_ALPHA) * volatility
+        self._conn.execute(
+            "UPDATE refresh_state SET last_fetched = ?, volatility = ?,"
+            " snapshots = snapshots + 1,"
+            " release_year = COALESCE(release_year, ?) WHERE film_url = ?",
+            (fetched_at, volatility, release_year, film_url),
+        )
+        return change
+
+    def sync_records(self, jsonl_path: str,
+                     fetched_at: Callable[[str], Optional[float]]) -> int:
+        """
+        Intègre comme relevés les films ajoutés au JSONL du scraper depuis le
+        dernier passage (seules les nouvelles lignes sont lues). `fetched_at`
+        donne la date de récupération d'une URL (None : maintenant).
+        Un JSONL réécrit (--reextract, --dedup-films) est relu en entier : les
+        relevés déjà connus sont ignorés, et les films qui n'y figurent plus
+        ne sont plus planifiés (leur série est conservée).
+        Retourne le nombre de films intégrés.
+        """
+        key = os.path.abspath(jsonl_path)
+        row = self._conn.execute("SELECT offset, fingerprint FROM file_offsets WHERE path = ?",
+                                 (key,)).fetchone()
+        offset, fingerprint = row if row else (0, None)
+        try:
+            rewritten = bool(offset) and (os.path.getsize(jsonl_path) < offset
+                                          or prefix_fingerprint(jsonl_path, offset)
+                                          != fingerprint)
+        except FileNotFoundError:
+            return 0
+        if rewritten:
+            # Position enregistrée seulement en fin de relecture complète
+            offset = 0
+            self._conn.execute("CREATE TEMP TABLE IF NOT EXISTS sync_seen ("
+                               " film_url TEXT PRIMARY KEY) WITHOUT ROWID")
+            self._conn.execute("DELETE FROM temp.sync_seen")
+        added = 0
+        for line, offset in iter_complete_lines(jsonl_path, offset):
+            try:
+                record = json.loads(line) if line else None
+            except json.JSONDecodeError:
+                continue
+            if record is None or is_error_record(record):
+                continue
+            film_url = record["film_url"]
+            self.record(film_url, stats_of(record), fetched_at(film_url) or time.time(),
+                        record.get("release_year"))
+            if rewritten:
+                self._conn.execute("INSERT OR IGNORE INTO temp.sync_seen VALUES (?)",
+                                   (film_url,))
+            added += 1
+            if added % COMMIT_EVERY == 0:
+                if rewritten:
+                    self.commit()
+                else:
+                    self._save_offset(key, jsonl_path, offset)
+        if rewritten:
+            self._conn.execute("DELETE FROM refresh_state WHERE film_url NOT IN"
+                               " (SELECT film_url FROM temp.sync_seen)")
+            self._conn.execute("DELETE FROM temp.sync_seen")
+        self._save_offset(key, jsonl_path, offset)
+        return added
+
+    def _save_offset(self, key: str, jsonl_path: str, offset: int):
+        self._conn.execute(
+            "INSERT INTO file_offsets (path, offset, fingerprint) VALUES (?, ?, ?)"
+            " ON CONFLICT(path) DO UPDATE SET offset = excluded.offset,"
+            " fingerprint = excluded.fingerprint",
+            (key, offset, prefix_fingerprint(jsonl_path, offset)),
+        )
+        self.commit()
+
+    # --- Planification ---
+
+    def select_due(self, budget: int, now: Optional[float] = None,
+                   min_interval_s: float = 0.0) -> List[Tuple[str, float]]:
+        """
+        Les `budget` films dont la dérive attendue (volatilité × jours depuis le
+        dernier relevé) est la plus forte, avec cette dérive. Les films
+        relevés il y a moins de `min_interval_s` secondes sont écartés.
+        """
+        now = now if now is not None else time.time()
+        return self._conn.execute(
+            "SELECT film_url, volatility * (? - last_fetched) / ? AS drift"
+            " FROM refresh_state WHERE last_fetched <= ?"
+            " ORDER BY drift DESC LIMIT ?",
+            (now, DAY_S, now - min_interval_s, budget),
+        ).fetchall()
+
+    def total_drift(self, now: Optional[float] = None) -> float:
+        """Dérive attendue de tout le jeu de données (ce qu'un re-crawl complet rattraperait)."""
+        now = now if now is not None else time.time()
+        return self._conn.execute(
+            "SELECT COALESCE(SUM(volatility * (? - last_fetched) / ?), 0)"
+            " FROM refresh_state", (now, DAY_S),
+        ).fetchone()[0]
+
+    def most_volatile(self, limit: int = 10) -> List[Tuple[str, float, int]]:
+        """Films les plus volatils : (URL, variation relative par jour, nombre de relevés)."""
+        return self._conn.execute(
+            "SELECT film_url, volatility, snapshots FROM refresh_state"
+            " WHERE snapshots > 1 ORDER BY volatility DESC LIMIT ?", (limit,),
+        ).fetchall()
+
+    def series(self, film_url: str) -> List[Dict[str, Any]]:
+        """Série temporelle d'un film, du plus ancien au plus récent relevé."""
+        columns = ("fetched_at",) + STATS_FIELDS
+        return [dict(zip(columns, row)) for row in self._conn.execute(
+            f"SELECT fetched_at, {', '.join(STATS_FIELDS)} FROM snapshots"
+            " WHERE film_url = ? ORDER BY fetched_at", (film_url,),
+        )]
+
+    def counts(self) -> Dict[str, int]:
+        films, snapshots = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(snapshots), 0) FROM refresh_state"
+        ).fetchone()
+        return {"films": films, "snapshots": snapshots}
+
+    def commit(self):
+        self._conn.commit()
+        self.pending = 0
+
+    def close(self):
+        self.commit()
+        self._conn.close()
@@ -0,0 +1,41 @@
+from film_identity import FilmAliasIndex, extract_film_identity
+
+PAGE = """<!DOCTYPE html><html><head>
+<link rel="canonical" href="https://letterboxd.com/film/the-matrix/">
+</head><body>
+<nav><div class="react-component" data-film-id="1111" data-item-slug="popular-film"
+ data-item-link="/film/popular-film/"></div></nav>
+<section class="film-header">
+<div class="react-component poster" data-film-id="51518" data-item-slug="the-matrix"
+ data-item-link="/film/the-matrix/"></div>
+<h1 class="headline-1 primaryname"><span class="name">The Matrix</span></h1>
+</section>
+<section id="related"><div data-film-id="2222" data-target-link="/film/the-matrix-reloaded/"></div></section>
+</body></html>"""
+
+
+def test_related_film_id_before_main_element():
+    film_id, canonical = extract_film_identity(PAGE, "https://letterboxd.com/film/the-matrix/")
+    assert (film_id, canonical) == ("51518", "https://letterboxd.com/film/the-matrix/")
+
+
+def test_id_fallback_uses_visited_url_without_canonical():
+    page = PAGE.replace('<link rel="canonical" href="https://letterboxd.com/film/the-matrix/">', "")
+    assert extract_film_identity(page, "https://letterboxd.com/film/the-matrix/") == ("51518", None)
+    # Aucun élément au slug de la page : identifiant inconnu plutôt qu'un film lié
+    assert extract_film_identity(page, "https://letterboxd.com/film/other/") == (None, None)
+
+
+def test_aliases_keyed_on_canonical_url(tmp_path):
+    index = FilmAliasIndex(str(tmp_path / "aliases.sqlite"))
+    canonical = "https://letterboxd.com/film/the-matrix/"
+    assert index.record(canonical, "51518", canonical) == canonical
+    # Ancien slug redirigé : alias du film principal
+    assert index.record("https://letterboxd.com/film/matrix/", "51518", canonical) == canonical
+    assert index.duplicate_of("https://letterboxd.com/film/matrix/") == canonical
+    # Page sans URL canonique : l'identifiant retrouve le film déjà connu
+    assert index.record("https://letterboxd.com/film/matrix-1999/", "51518", None) == canonical
+    # Deux films différents partageant par erreur un ID restent distincts
+    other = "https://letterboxd.com/film/the-matrix-reloaded/"
+    assert index.record(other, "51518", other) == other
+    index.close()
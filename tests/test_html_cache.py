@@ -0,0 +1,46 @@
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+from html_cache import HtmlCache
+
+URLS = [f"https://letterboxd.com/film/bench-film-{i}/" for i in range(20)]
+
+
+def last_access(root, url):
+    conn = sqlite3.connect(str(root / "index.sqlite"))
+    try:
+        return conn.execute("SELECT last_access FROM pages WHERE url = ?", (url,)).fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_puts_from_threads_while_reading(tmp_path):
+    cache = HtmlCache(str(tmp_path), max_bytes=2 ** 30, codec="gzip")
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        for url in URLS:
+            pool.submit(cache.put, url, f"<html>{url}</html>")
+            cache.get(URLS[0])
+    assert all(cache.get(url) == f"<html>{url}</html>" for url in URLS)
+    cache.close()
+
+
+def test_last_access_written_in_batches(tmp_path):
+    cache = HtmlCache(str(tmp_path), max_bytes=2 ** 30, codec="gzip", access_batch=3)
+    for url in URLS[:3]:
+        cache.put(url, "<html>a</html>")
+    written = last_access(tmp_path, URLS[0])
+    cache.get(URLS[0])
+    cache.get(URLS[1])
+    assert last_access(tmp_path, URLS[0]) == written
+    cache.get(URLS[2])  # 3e page lue : lot écrit
+    assert last_access(tmp_path, URLS[0]) > written
+    cache.close()
+
+
+def test_read_only_reader_does_not_write(tmp_path):
+    HtmlCache(str(tmp_path), max_bytes=2 ** 30, codec="gzip").put(URLS[0], "<html>a</html>")
+    written = last_access(tmp_path, URLS[0])
+    reader = HtmlCache(str(tmp_path), max_bytes=2 ** 30, track_access=False, access_batch=1)
+    assert reader.get(URLS[0]) == "<html>a</html>"
+    reader.close()
+    assert last_access(tmp_path, URLS[0]) == written
@@ -0,0 +1,22 @@
+from rate_controller import OUTCOME_OK, AdaptiveRateController
+
+
+def test_browser_latency_does_not_throttle_http():
+    controller = AdaptiveRateController(1.0, 0.1, 10.0, cooldown=0.0)
+    for _ in range(20):
+        controller.feedback("https://letterboxd.com/film/a/", OUTCOME_OK, 0.1, "fetch_http")
+    # Escalades navigateur : 30x plus lentes, mais comparées à leur propre référence
+    for _ in range(3):
+        controller.feedback("https://letterboxd.com/film/b/", OUTCOME_OK, 3.0, "fetch_browser")
+    for _ in range(5):
+        controller.feedback("https://letterboxd.com/film/c/", OUTCOME_OK, 0.1, "fetch_http")
+    assert controller.throttle_events == 0
+
+
+def test_http_latency_spike_still_throttles():
+    controller = AdaptiveRateController(1.0, 0.1, 10.0, cooldown=0.0)
+    for _ in range(20):
+        controller.feedback("https://letterboxd.com/film/a/", OUTCOME_OK, 0.1, "fetch_http")
+    for _ in range(5):
+        controller.feedback("https://letterboxd.com/film/a/", OUTCOME_OK, 3.0, "fetch_http")
+    assert controller.throttle_events > 0
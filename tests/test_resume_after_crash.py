@@ -0,0 +1,93 @@
+import asyncio
+import csv
+import json
+import random
+
+import pytest
+
+from benchmark_pipeline import synthetic_film_page
+from checkpoint import CheckpointIndex
+from export_sink import IncrementalExportSink, iter_final_records, iter_jsonl_records
+
+
+def film_record(index: int) -> dict:
+    return {"film_url": f"https://letterboxd.com/film/bench-film-{index}/",
+            "film_name": f"Bench Film {index}", "synopsis": "Ligne 1\nLigne 2"}
+
+
+KEYS = ["film_url", "film_name", "synopsis"]
+
+
+def test_sink_cuts_partial_line_on_reopen(tmp_path):
+    jsonl, csv_path = str(tmp_path / "m.jsonl"), str(tmp_path / "m.csv")
+    with IncrementalExportSink(jsonl, csv_path, KEYS) as sink:
+        for i in range(3):
+            sink.write(film_record(i))
+    # Arrêt brutal au milieu de l'écriture du 4e film
+    partial = json.dumps(film_record(3))[:40]
+    with open(jsonl, "a", encoding="utf-8") as f:
+        f.write(partial)
+    with open(csv_path, "a", encoding="utf-8", newline="") as f:
+        f.write('https://letterboxd.com/film/bench-film-3/,Bench Film 3,"Ligne 1\n')
+
+    sink = IncrementalExportSink(jsonl, csv_path, KEYS)
+    assert sink.interrupted
+    sink.write(film_record(4))
+    sink.close()
+
+    urls = [record["film_url"] for record in iter_jsonl_records(jsonl)]
+    assert urls == [film_record(i)["film_url"] for i in (0, 1, 2, 4)]
+    with open(csv_path, encoding="utf-8", newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert [row["film_name"] for row in rows] == [f"Bench Film {i}" for i in (0, 1, 2, 4)]
+    assert rows[-1]["synopsis"] == "Ligne 1\nLigne 2"
+
+
+def test_sink_keeps_complete_files(tmp_path):
+    jsonl, csv_path = str(tmp_path / "m.jsonl"), str(tmp_path / "m.csv")
+    with IncrementalExportSink(jsonl, csv_path, KEYS) as sink:
+        sink.write(film_record(0))
+    sizes = (len(open(jsonl, "rb").read()), len(open(csv_path, "rb").read()))
+    sink = IncrementalExportSink(jsonl, csv_path, KEYS)
+    sink.close()
+    assert not sink.interrupted
+    assert (len(open(jsonl, "rb").read()), len(open(csv_path, "rb").read())) == sizes
+
+
+def test_scraper_resume_after_mid_write_crash(tmp_path, monkeypatch):
+    """10 films, ligne coupée (film marqué ok), puis reprise sur 20 liens."""
+    scraper = pytest.importorskip("scraperletterboxd")
+    from mock_letterboxd_server import MockLetterboxdServer
+
+    monkeypatch.chdir(tmp_path)
+    rng = random.Random(0)
+    pages = {f"/film/bench-film-{i}/": synthetic_film_page(i, rng, padding_kb=0)
+             for i in range(20)}
+    links = [f"https://letterboxd.com/film/bench-film-{i}/" for i in range(20)]
+    with open(scraper.LINKS_FILE_PATH, "w", encoding="utf-8") as f:
+        f.write("".join(link + "\n" for link in links))
+
+    with MockLetterboxdServer(pages) as server:
+        for name, value in {"LETTERBOXD_BASE_URL": server.base_url, "RATE_INITIAL": 1000,
+                            "RATE_MAX_GLOBAL": 1000, "RATE_MAX_PER_HOST": {},
+                            "CONCURRENT_REQUESTS": 4, "SCRAPING_LIMIT": 10}.items():
+            monkeypatch.setattr(scraper, name, value)
+        asyncio.run(scraper.main())
+
+        # Arrêt brutal : la ligne du 11e film est à moitié écrite alors que le
+        # checkpoint l'a déjà validé
+        lost = links[10]
+        with open(scraper.JSONL_FILE_PATH, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"film_url": lost, "film_name": "Bench Film 10"})[:45])
+        with CheckpointIndex(scraper.CHECKPOINT_DB_PATH) as checkpoint:
+            checkpoint.mark(lost, "ok")
+
+        monkeypatch.setattr(scraper, "SCRAPING_LIMIT", 20)
+        asyncio.run(scraper.main())
+
+    exported = [record["film_url"] for record in iter_final_records(scraper.JSONL_FILE_PATH)]
+    assert sorted(exported) == sorted(links)
+    with open(scraper.CSV_FILE_PATH, encoding="utf-8", newline="") as f:
+        assert sorted(row["film_url"] for row in csv.DictReader(f)) == sorted(links)
+    with CheckpointIndex(scraper.CHECKPOINT_DB_PATH) as checkpoint:
+        assert checkpoint.status_counts() == {"ok": 20}
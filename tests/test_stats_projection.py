@@ -0,0 +1,26 @@
+import pytest
+
+from benchmark_extractors import iter_shipped_pages
+from movie_fields import STATS_FIELDS
+
+scraper = pytest.importorskip("scraperletterboxd")
+pytest.importorskip("lxml")
+
+
+def test_stats_only_matches_bs4_reference(monkeypatch):
+    monkeypatch.setattr(scraper, "EXTRACTOR_BACKEND", "bs4")
+    for url, html in iter_shipped_pages():
+        assert (scraper.run_extractor(html, url, STATS_FIELDS)
+                == scraper.extract_movie_data(html, url, STATS_FIELDS))
+
+
+def test_stats_only_does_not_parse_with_bs4(monkeypatch):
+    def full_parse(*args):
+        raise AssertionError("analyse BeautifulSoup complète")
+
+    monkeypatch.setattr(scraper, "EXTRACTOR_BACKEND", "bs4")
+    monkeypatch.setattr(scraper, "extract_movie_data", full_parse)
+    url, html = next(iter_shipped_pages())
+    assert scraper.run_extractor(html, url, STATS_FIELDS)["film_url"] == url
+    with pytest.raises(AssertionError):
+        scraper.run_extractor(html, url, ("avg_rating", "genres"))
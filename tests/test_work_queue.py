@@ -0,0 +1,47 @@
+from work_queue import WORK_PENDING, WorkTable
+
+URL = "https://letterboxd.com/film/bench-film-0/"
+
+
+def test_commit_skips_lease_taken_by_another_worker(tmp_path):
+    db_path = str(tmp_path / "work.sqlite")
+    slow = WorkTable(db_path, "slow", lease_seconds=-1.0)  # bail déjà expiré
+    slow.load([(URL, WORK_PENDING)])
+    assert slow.claim(10) == [URL]
+    fast = WorkTable(db_path, "fast")
+    assert fast.claim(10) == [URL]
+
+    slow.mark(URL, "network_error")
+    slow.commit()
+    assert slow.lost == 1
+    fast.mark(URL, "ok")
+    fast.commit()
+    assert fast.lost == 0
+    assert fast.status_counts() == {"ok": 1}
+    assert fast.worker_counts() == {"fast": 1}
+    slow.close()
+    fast.close()
+
+
+def test_url_abandoned_after_max_claims(tmp_path):
+    db_path = str(tmp_path / "work.sqlite")
+    WorkTable(db_path).load([(URL, WORK_PENDING)])
+    # Chaque worker tombe sur la page : son bail expire sans validation
+    for index in range(2):
+        crashed = WorkTable(db_path, f"crashed-{index}", lease_seconds=-1.0, max_claims=2)
+        assert crashed.claim(10) == [URL]
+    survivor = WorkTable(db_path, "survivor", max_claims=2)
+    assert survivor.claim(10) == []
+    assert survivor.take_abandoned() == [URL]
+    survivor.mark(URL, "network_error")
+    survivor.commit()
+    assert survivor.status_counts() == {"network_error": 1}
+
+
+def test_clean_release_does_not_count_as_claim(tmp_path):
+    db_path = str(tmp_path / "work.sqlite")
+    WorkTable(db_path).load([(URL, WORK_PENDING)])
+    for index in range(3):
+        stopped = WorkTable(db_path, f"stopped-{index}", max_claims=1)
+        assert stopped.claim(10) == [URL]
+        stopped.close()  # arrêt propre : bail rendu
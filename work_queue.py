@@ -0,0 +1,266 @@
+import sqlite3
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# ====================================================================
+#          TABLE DE TRAVAIL PARTAGÉE (BAUX POUR PLUSIEURS WORKERS)
+# ====================================================================
+# Mode distribué : la liste des liens est chargée une fois dans une table
+# SQLite partagée. Chaque processus worker (sur une ou plusieurs machines)
+# réserve des URLs sous un bail (lease) qui expire : il le renouvelle tant
+# qu'il travaille dessus, et un worker arrêté brutalement cesse de le
+# renouveler, si bien que ses URLs redeviennent disponibles pour les
+# autres. Les transactions sont courtes (réservation, renouvellement,
+# validation par lots) : les workers ne se bloquent jamais longtemps.
+# Une URL dont le bail expire à chaque réservation (page qui fait tomber
+# les workers) est abandonnée après `max_claims` réservations : elle part
+# dans le fichier des échecs au lieu de tourner indéfiniment.
+
+WORK_PENDING = "pending"
+WORK_LEASED = "leased"
+
+
+class WorkTable:
+    """
+    Table `film_url` -> (statut, worker, fin du bail). Expose aussi `mark`,
+    `commit`, `pending`, `status_counts` et `close`, comme `CheckpointIndex`,
+    pour servir d'index de reprise à un worker.
+    """
+
+    def __init__(self, db_path: str, worker_id: str = "", lease_seconds: float = 900.0,
+                 journal_mode: str = "WAL", busy_timeout_s: float = 60.0,
+                 max_claims: Optional[int] = None):
+        self.db_path = db_path
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        # None : pas de limite au nombre de réservations d'une URL
+        self.max_claims = max_claims
+        self.pending = 0
+        # Statuts non validés : le bail avait été repris par un autre worker
+        self.lost = 0
+        # URLs réservées par ce worker et pas encore terminées
+        self.held: Set[str] = set()
+        # URLs réservées trop souvent, à passer en échec (voir `take_abandoned`)
+        self._abandoned: List[str] = []
+        self._marks: List[Tuple[str, float, str, str, str, str]] = []
+        # Autocommit : chaque opération ouvre et ferme sa propre transaction
+        self._conn = sqlite3.connect(db_path, timeout=busy_timeout_s, isolation_level=None)
+        # WAL : plusieurs processus sur la même machine. Plusieurs machines
+        # (système de fichiers partagé) : "DELETE", car WAL exige une
+        # mémoire partagée locale.
+        self._conn.execute(f"PRAGMA journal_mode={journal_mode}")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS work ("
+            " film_url TEXT PRIMARY KEY,"
+            " position INTEGER NOT NULL,"
+            " status TEXT NOT NULL,"
+            " worker TEXT,"
+            " lease_expires REAL,"
+            " claims INTEGER NOT NULL DEFAULT 0,"
+            " updated_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS work_claimable ON work (status, position)"
+        )
+
+    # --- Chargement (une seule fois, avant de lancer les workers) ---
+
+    def load(self, links: Iterable[Tuple[str, str]], batch_size: int = 10_000) -> int:
+        """
+        Ajoute des couples (URL, statut initial) dans l'ordre du fichier de
+        liens ; les URLs déjà présentes sont ignorées. Retourne le nombre d'ajouts.
+        """
+        position = self._conn.execute(
+            "SELECT COALESCE(MAX(position), -1) + 1 FROM work").fetchone()[0]
+        added = 0
+        batch: List[Tuple[str, int, str, float]] = []
+        for film_url, status in links:
+            batch.append((film_url, position, status, time.time()))
+            position += 1
+            if len(batch) >= batch_size:
+                added += self._insert(batch)
+                batch = []
+        return added + self._insert(batch)
+
+    def _insert(self, batch: List[Tuple[str, int, str, float]]) -> int:
+        if not batch:
+            return 0
+        before = self._conn.total_changes
+        self._conn.execute("BEGIN IMMEDIATE")
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO work (film_url, position, status, updated_at)"
+            " VALUES (?, ?, ?, ?)", batch
+        )
+        self._conn.execute("COMMIT")
+        return self._conn.total_changes - before
+
+    # --- Baux ---
+
+    def claim(self, limit: int) -> List[str]:
+        """
+        Réserve jusqu'à `limit` URLs disponibles (jamais réservées, ou dont le
+        bail a expiré), dans l'ordre du fichier de liens. Celles qui dépassent
+        `max_claims` réservations restent réservées mais ne sont pas rendues :
+        elles attendent dans `take_abandoned()`.
+        """
+        now = time.time()
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = self._conn.execute(
+                "UPDATE work SET status = ?, worker = ?, lease_expires = ?,"
+                " claims = claims + 1, updated_at = ?"
+                " WHERE film_url IN ("
+                "  SELECT film_url FROM work"
+                "  WHERE status = ? OR (status = ? AND lease_expires < ?)"
+                "  ORDER BY position LIMIT ?)"
+                " RETURNING film_url, position, claims",
+                (WORK_LEASED, self.worker_id, now + self.lease_seconds, now,
+                 WORK_PENDING, WORK_LEASED, now, limit),
+            ).fetchall()
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        rows.sort(key=lambda row: row[1])
+        self.held.update(film_url for film_url, *_ in rows)
+        links = []
+        for film_url, _, claims in rows:
+            if self.max_claims is not None and claims > self.max_claims:
+                self._abandoned.append(film_url)
+            else:
+                links.append(film_url)
+        return links
+
+    def take_abandoned(self) -> List[str]:
+        """URLs réservées plus de `max_claims` fois (à marquer en échec par l'appelant)."""
+        abandoned, self._abandoned = self._abandoned, []
+        return abandoned
+
+    def renew(self) -> int:
+        """Prolonge le bail de toutes les URLs encore détenues (battement de cœur)."""
+        if not self.held:
+            return 0
+        expires = time.time() + self.lease_seconds
+        self._conn.execute("BEGIN IMMEDIATE")
+        self._conn.executemany(
+            "UPDATE work SET lease_expires = ? WHERE film_url = ? AND worker = ?"
+            " AND status = ?",
+            [(expires, film_url, self.worker_id, WORK_LEASED) for film_url in self.held],
+        )
+        self._conn.execute("COMMIT")
+        return len(self.held)
+
+    def release(self) -> int:
+        """
+        Rend immédiatement aux autres workers les URLs détenues (arrêt propre).
+        Cette réservation ne compte pas dans `max_claims`.
+        """
+        if not self.held:
+            return 0
+        self._conn.execute("BEGIN IMMEDIATE")
+        self._conn.executemany(
+            "UPDATE work SET status = ?, worker = NULL, lease_expires = NULL,"
+            " claims = MAX(claims - 1, 0)"
+            " WHERE film_url = ? AND worker = ? AND status = ?",
+            [(WORK_PENDING, film_url, self.worker_id, WORK_LEASED)
+             for film_url in self.held],
+        )
+        self._conn.execute("COMMIT")
+        released = len(self.held)
+        self.held.clear()
+        return released
+
+    def unfinished(self) -> int:
+        """URLs pas encore terminées (disponibles ou réservées par un worker)."""
+        return self._conn.execute(
+            "SELECT COUNT(*) FROM work WHERE status IN (?, ?)",
+            (WORK_PENDING, WORK_LEASED),
+        ).fetchone()[0]
+
+    def unfinished_elsewhere(self) -> int:
+        """
+        URLs encore disponibles ou réservées par un AUTRE worker. Celles de ce
+        worker (en cours, ou terminées mais pas encore validées) sont exclues.
+        """
+        return self._conn.execute(
+            "SELECT COUNT(*) FROM work WHERE status = ? OR (status = ? AND worker != ?)",
+            (WORK_PENDING, WORK_LEASED, self.worker_id),
+        ).fetchone()[0]
+
+    def count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM work").fetchone()[0]
+
+    # --- Interface d'index de reprise (comme CheckpointIndex) ---
+
+    def mark(self, film_url: str, status: str, timestamp: Optional[float] = None):
+        """Statut final d'une URL. Validé par `commit()` (après le fsync du shard)."""
+        self._marks.append((status, timestamp if timestamp is not None else time.time(),
+                            self.worker_id, film_url, self.worker_id, WORK_LEASED))
+        self.pending += 1
+
+    def forget(self, film_url: str):
+        """Remet une URL à traiter (disponible pour tous les workers)."""
+        self._marks = [mark for mark in self._marks if mark[3] != film_url]
+        self._conn.execute(
+            "UPDATE work SET status = ?, worker = NULL, lease_expires = NULL,"
+            " updated_at = ? WHERE film_url = ?", (WORK_PENDING, time.time(), film_url)
+        )
+        self.held.discard(film_url)
+
+    def commit(self):
+        """
+        Valide en une seule courte transaction les statuts en attente. Seules
+        les URLs dont ce worker détient encore le bail sont mises à jour : si
+        le bail a expiré et qu'un autre worker l'a repris, c'est lui qui
+        validera (le film est alors aussi dans notre shard, dédoublonné à la
+        fusion).
+        """
+        if self._marks:
+            # Dernier statut de chaque URL (une URL validée n'est plus réservée)
+            marks = list({mark[3]: mark for mark in self._marks}.values())
+            self._conn.execute("BEGIN IMMEDIATE")
+            updated = self._conn.executemany(
+                "UPDATE work SET status = ?, updated_at = ?, worker = ?,"
+                " lease_expires = NULL WHERE film_url = ? AND worker = ? AND status = ?",
+                marks,
+            ).rowcount
+            self._conn.execute("COMMIT")
+            lost = len(marks) - updated
+            if lost:
+                self.lost += lost
+                print(f"⚠️ {lost} statut(s) non validé(s) : bail expiré et repris "
+                      f"par un autre worker (allongez LEASE_SECONDS).")
+            # Bail conservé (et renouvelé) jusqu'à la validation
+            self.held.difference_update(mark[3] for mark in self._marks)
+            self._marks = []
+        self.pending = 0
+
+    def urls_with_status(self, status: str, own_only: bool = False) -> List[str]:
+        """URLs ayant un statut donné (own_only : seulement celles de ce worker)."""
+        if own_only:
+            return [row[0] for row in self._conn.execute(
+                "SELECT film_url FROM work WHERE status = ? AND worker = ?"
+                " ORDER BY position", (status, self.worker_id)
+            )]
+        return [row[0] for row in self._conn.execute(
+            "SELECT film_url FROM work WHERE status = ? ORDER BY position", (status,)
+        )]
+
+    def status_counts(self) -> Dict[str, int]:
+        return dict(self._conn.execute(
+            "SELECT status, COUNT(*) FROM work GROUP BY status"
+        ))
+
+    def worker_counts(self) -> Dict[str, int]:
+        """URLs terminées par worker (répartition du travail)."""
+        return dict(self._conn.execute(
+            "SELECT worker, COUNT(*) FROM work WHERE status NOT IN (?, ?)"
+            " GROUP BY worker", (WORK_PENDING, WORK_LEASED)
+        ))
+
+    def close(self):
+        """Validation finale, libération des baux restants, puis fermeture."""
+        self.commit()
+        self.release()
+        self._conn.close()